@@ -0,0 +1,13 @@
+"""
+Benchmarks reproducibles con datos sintéticos.
+
+    python -m benchmarks                       # todos los casos
+    python -m benchmarks --casos decodificacion,carga_reportes_100
+    python -m benchmarks --guardar-base        # escribe benchmarks/base.json
+    python -m benchmarks --comparar            # compara con la base (código 1 si hay regresión)
+
+Los datos (videos 720p con un patrón tipo rostro, marcas, resultados y un
+modelo Keras mínimo) se generan en una carpeta temporal con semilla fija;
+ver `benchmarks.datos_sinteticos`. Los casos cuyas dependencias no están
+instaladas (cv2, tensorflow, ffmpeg) se reportan como omitidos.
+"""
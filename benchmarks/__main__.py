@@ -0,0 +1,169 @@
+"""
+Ejecuta los benchmarks y escribe/compara resultados JSON.
+
+    python -m benchmarks [--casos a,b] [--repeticiones 5] [--detector stub|mediapipe]
+                         [--salida ruta.json] [--guardar-base] [--comparar [base.json]]
+                         [--tolerancia 0.15]
+"""
+
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.casos import CASOS, Contexto, RAIZ
+from utils.instrumentacion import percentil
+
+DIRECTORIO_RESULTADOS = RAIZ / "benchmarks" / "resultados"
+RUTA_BASE = RAIZ / "benchmarks" / "base.json"
+VERSION_FORMATO = 1
+
+logger = logging.getLogger("benchmarks")
+
+
+def _entorno() -> dict:
+    versiones = {}
+    for modulo in ("numpy", "cv2", "tensorflow", "mediapipe", "PySide6"):
+        if importlib.util.find_spec(modulo) is None:
+            continue
+        try:
+            versiones[modulo] = getattr(__import__(modulo), "__version__", "?")
+        except Exception as e:
+            versiones[modulo] = f"error: {e}"
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "versiones": versiones,
+        "ffmpeg": shutil.which("ffmpeg") is not None,
+    }
+
+
+def medir(caso, ctx: Contexto, repeticiones: int) -> dict:
+    """Prepara el caso, hace una pasada de calentamiento y cronometra `repeticiones` pasadas."""
+    faltan = caso.faltantes()
+    if faltan:
+        return {"omitido": f"falta {', '.join(faltan)}"}
+    try:
+        operacion = caso.preparar(ctx)
+        operacion.funcion()  # calentamiento (cachés del SO, imports perezosos)
+        duraciones = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            operacion.funcion()
+            duraciones.append(time.perf_counter() - inicio)
+    except Exception as e:
+        logger.exception(f"Error en {caso.nombre}")
+        return {"error": str(e)}
+
+    ordenadas = sorted(duraciones)
+    mediana = statistics.median(ordenadas)
+    return {
+        "descripcion": caso.descripcion,
+        "repeticiones": repeticiones,
+        "mediana_s": round(mediana, 6),
+        "min_s": round(ordenadas[0], 6),
+        "p95_s": round(percentil(ordenadas, 95), 6),
+        "unidades": operacion.unidades,
+        "unidad": operacion.unidad,
+        "por_segundo": round(operacion.unidades / mediana, 2) if mediana > 0 else None,
+    }
+
+
+def comparar(actual: dict, base: dict, tolerancia: float) -> list:
+    """Casos cuya mediana empeoró más que `tolerancia` (fracción) respecto a la base."""
+    regresiones = []
+    for nombre, medicion in actual["casos"].items():
+        referencia = base.get("casos", {}).get(nombre, {})
+        if "mediana_s" not in medicion or "mediana_s" not in referencia:
+            continue
+        razon = medicion["mediana_s"] / referencia["mediana_s"] if referencia["mediana_s"] > 0 else 1.0
+        medicion["vs_base"] = round(razon, 3)
+        if razon > 1.0 + tolerancia:
+            regresiones.append((nombre, razon))
+    return regresiones
+
+
+def _imprimir(resultado: dict):
+    print(f"{'caso':<30} {'mediana':>12} {'min':>12} {'throughput':>22} {'vs base':>8}")
+    for nombre, m in resultado["casos"].items():
+        if "mediana_s" not in m:
+            print(f"{nombre:<30} {m.get('omitido') or 'ERROR: ' + m.get('error', '')}")
+            continue
+        throughput = f"{m['por_segundo']:.1f} {m['unidad']}/s" if m["por_segundo"] else ""
+        vs = f"{m['vs_base']:.2f}x" if "vs_base" in m else ""
+        print(f"{nombre:<30} {m['mediana_s'] * 1000:>10.2f}ms {m['min_s'] * 1000:>10.2f}ms {throughput:>22} {vs:>8}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks con datos sintéticos")
+    parser.add_argument("--casos", help="nombres separados por coma (por defecto todos)")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--detector", choices=("stub", "mediapipe"), default="stub")
+    parser.add_argument("--salida", type=Path, help="JSON de resultados (por defecto benchmarks/resultados/)")
+    parser.add_argument("--guardar-base", action="store_true", help=f"guardar también como {RUTA_BASE.name}")
+    parser.add_argument("--comparar", nargs="?", const=RUTA_BASE, type=Path, help="base con la que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.15, help="empeoramiento admitido (0.15 = 15%%)")
+    parser.add_argument("--listar", action="store_true", help="mostrar los casos disponibles y salir")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s - %(message)s")
+
+    if args.listar:
+        for caso in CASOS:
+            print(f"{caso.nombre:<30} {caso.descripcion}")
+        return 0
+
+    casos = CASOS
+    if args.casos:
+        pedidos = [n.strip() for n in args.casos.split(",") if n.strip()]
+        desconocidos = set(pedidos) - {c.nombre for c in CASOS}
+        if desconocidos:
+            parser.error(f"casos desconocidos: {', '.join(sorted(desconocidos))}")
+        casos = [c for c in CASOS if c.nombre in pedidos]
+
+    resultado = {
+        "version": VERSION_FORMATO,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "detector": args.detector,
+        "entorno": _entorno(),
+        "casos": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="benchmarks_") as temporal:
+        ctx = Contexto(Path(temporal), detector=args.detector)
+        for caso in casos:
+            print(f"▶ {caso.nombre}...", file=sys.stderr)
+            resultado["casos"][caso.nombre] = medir(caso, ctx, args.repeticiones)
+
+    regresiones = []
+    if args.comparar:
+        if not args.comparar.exists():
+            parser.error(f"no existe la base {args.comparar}")
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            regresiones = comparar(resultado, json.load(f), args.tolerancia)
+
+    salida = args.salida or DIRECTORIO_RESULTADOS / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    destinos = [salida] + ([RUTA_BASE] if args.guardar_base else [])
+    for destino in destinos:
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        with open(destino, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+    _imprimir(resultado)
+    print(f"\nResultados: {salida}")
+    if regresiones:
+        for nombre, razon in regresiones:
+            print(f"❌ Regresión en {nombre}: {razon:.2f}x la base (tolerancia {args.tolerancia:.0%})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
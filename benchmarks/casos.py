@@ -0,0 +1,258 @@
+"""
+Casos de benchmark.
+
+Cada caso recibe el `Contexto` (carpeta temporal y datos sintéticos que se
+generan una sola vez y se comparten) y devuelve una `Operacion`: la función
+que se cronometra y cuántas unidades (frames, entrevistas, ...) procesa por
+llamada, para reportar también el throughput. La preparación no se mide.
+"""
+
+import sys
+import shutil
+import logging
+import subprocess
+import importlib.util
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks import datos_sinteticos
+from benchmarks.detector_stub import crear_detector
+
+RAIZ = Path(__file__).resolve().parent.parent
+SEGUNDOS_CLIP = 5.0
+FPS_CLIP = 30.0
+FRAMES_MUESTRA = 30
+TAMAÑOS_REPORTES = (10, 100, 1000)
+
+
+@dataclass
+class Operacion:
+    funcion: Callable[[], object]
+    unidades: int = 1
+    unidad: str = "op"
+
+
+@dataclass
+class Caso:
+    nombre: str
+    preparar: Callable[["Contexto"], Operacion]
+    requiere: Tuple[str, ...] = ()
+    descripcion: str = ""
+
+    def faltantes(self) -> List[str]:
+        """Módulos (o 'ffmpeg') requeridos que no están disponibles."""
+        faltan = []
+        for requisito in self.requiere:
+            if requisito == "ffmpeg":
+                if shutil.which("ffmpeg") is None:
+                    faltan.append(requisito)
+            elif importlib.util.find_spec(requisito) is None:
+                faltan.append(requisito)
+        return faltan
+
+
+class Contexto:
+    """Datos sintéticos compartidos entre casos, generados bajo demanda."""
+
+    def __init__(self, directorio: Path, detector: str = "stub"):
+        self.directorio = Path(directorio)
+        self.detector = detector
+        self._cache: Dict[str, object] = {}
+
+    def _obtener(self, clave: str, crear: Callable[[], object]):
+        if clave not in self._cache:
+            self._cache[clave] = crear()
+        return self._cache[clave]
+
+    def video(self) -> Path:
+        return self._obtener("video", lambda: datos_sinteticos.generar_video(
+            self.directorio / "videos" / "entrevista_sintetica.mp4", SEGUNDOS_CLIP, FPS_CLIP))
+
+    def frames(self) -> list:
+        def leer():
+            import cv2
+            cap = cv2.VideoCapture(str(self.video()))
+            frames = []
+            try:
+                while len(frames) < FRAMES_MUESTRA:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    frames.append(frame)
+            finally:
+                cap.release()
+            return frames
+        return self._obtener("frames", leer)
+
+    def modelo(self) -> Path:
+        return self._obtener("modelo", lambda: datos_sinteticos.generar_modelo_keras(
+            self.directorio / "modelos" / "modelo_sintetico.h5"))
+
+    def analizador(self, con_modelo: bool = False):
+        """Analisis con el detector elegido (y el modelo sintético si se pide)."""
+        clave = "analizador_modelo" if con_modelo else "analizador"
+
+        def crear():
+            from classes.analisis import Analisis
+            if con_modelo:
+                analizador = Analisis(self.modelo()) if self.detector == "mediapipe" else _sin_dependencias(Analisis)
+                if analizador._model is None:
+                    import tensorflow as tf
+                    analizador._model = tf.keras.models.load_model(str(self.modelo()), compile=False)
+            else:
+                analizador = _sin_dependencias(Analisis)
+            analizador._face_detection = crear_detector(self.detector)
+            return analizador
+        return self._obtener(clave, crear)
+
+    def resultados(self, entrevistas: int) -> Path:
+        def crear():
+            directorio = self.directorio / f"resultados_{entrevistas}"
+            datos_sinteticos.generar_resultados(directorio, entrevistas)
+            return directorio
+        return self._obtener(f"resultados_{entrevistas}", crear)
+
+    def marcas(self) -> Path:
+        def crear():
+            directorio = self.directorio / "marcas"
+            return datos_sinteticos.generar_marcas(directorio, datos_sinteticos.id_entrevista(0),
+                                                   duracion=1.5, archivo_video=str(self.video()))
+        return self._obtener("marcas", crear)
+
+
+def _sin_dependencias(clase):
+    """
+    Instancia de Analisis sin cargar el modelo ni comprobar tensorflow/mediapipe:
+    crop_face y preprocess_frame no los necesitan.
+    """
+    analizador = clase.__new__(clase)
+    analizador.logger = logging.getLogger("classes.analisis")
+    analizador.modelo_path = Path("sintetico.h5")
+    analizador.emotion_map = {i: emo for i, emo in enumerate(datos_sinteticos.EMOCIONES)}
+    analizador._model = None
+    analizador._face_detection = None
+    analizador.mp_face = None
+    return analizador
+
+
+# ----------------------------------------------------------------------
+# Casos
+# ----------------------------------------------------------------------
+def _decodificacion(ctx: Contexto) -> Operacion:
+    import cv2
+    ruta = str(ctx.video())
+
+    def leer_todo():
+        cap = cv2.VideoCapture(ruta)
+        try:
+            while cap.read()[0]:
+                pass
+        finally:
+            cap.release()
+    return Operacion(leer_todo, int(SEGUNDOS_CLIP * FPS_CLIP), "frames")
+
+
+def _crop_face(ctx: Contexto) -> Operacion:
+    analizador, frames = ctx.analizador(), ctx.frames()
+    return Operacion(lambda: [analizador.crop_face(f) for f in frames], len(frames), "frames")
+
+
+def _preprocess_frame(ctx: Contexto) -> Operacion:
+    analizador = ctx.analizador()
+    recortes = [analizador.crop_face(f) for f in ctx.frames()]
+    return Operacion(lambda: [analizador.preprocess_frame(r) for r in recortes], len(recortes), "frames")
+
+
+def _inferencia(ctx: Contexto) -> Operacion:
+    analizador = ctx.analizador(con_modelo=True)
+    entrada = analizador.preprocess_frame(analizador.crop_face(ctx.frames()[0]))
+    analizador.model.predict(entrada, verbose=0)  # calentar (trazado del grafo)
+    return Operacion(lambda: [analizador.model.predict(entrada, verbose=0) for _ in range(FRAMES_MUESTRA)],
+                     FRAMES_MUESTRA, "inferencias")
+
+
+def _analisis_fragmento(ctx: Contexto) -> Operacion:
+    analizador, ruta = ctx.analizador(con_modelo=True), ctx.video()
+    return Operacion(lambda: analizador.analizar_fragmento_con_tiempos(ruta),
+                     int(SEGUNDOS_CLIP * FPS_CLIP), "frames")
+
+
+def _corte_fragmento(ctx: Contexto) -> Operacion:
+    from classes.fragmento import Fragmento
+    from classes.marcas import Marcas
+
+    marcas = Marcas(datos_sinteticos.id_entrevista(0), ctx.video(), ctx.marcas())
+    marcas.importar_json(ctx.marcas())
+    marca = marcas.marcas[0]
+    destino = ctx.directorio / "fragmentos"
+
+    def cortar():
+        Fragmento(marca, destino).generar_fragmento(ctx.video())
+    return Operacion(cortar, 1, "fragmentos")
+
+
+def _carga_reportes(entrevistas: int, en_frio: bool):
+    """Lo que hace `load_reportes_data` (DatosReportes.listar_entrevistas) sin Qt."""
+    def preparar(ctx: Contexto) -> Operacion:
+        from classes.catalogo_resultados import CatalogoResultados
+        resultados = ctx.resultados(entrevistas)
+        ruta_db = ctx.directorio / f"catalogo_{entrevistas}_{'frio' if en_frio else 'caliente'}.sqlite3"
+        usar_analitica = importlib.util.find_spec("numpy") is not None
+
+        def cargar():
+            if en_frio and ruta_db.exists():
+                ruta_db.unlink()
+            catalogo = CatalogoResultados(ruta_db, resultados)
+            catalogo.reindexar()
+            if usar_analitica:
+                from classes.analitica import MotorAnalitica
+                MotorAnalitica(catalogo, cohortes={}).sincronizar()
+            return catalogo.entrevistas()
+
+        if not en_frio:
+            cargar()  # catálogo ya poblado: arranque habitual
+        return Operacion(cargar, entrevistas, "entrevistas")
+    return preparar
+
+
+_CODIGO_ARRANQUE = """
+import sys
+sys.path.insert(0, {raiz!r})
+from classes.catalogo_resultados import CatalogoResultados
+from classes.resultados_analisis import leer_resumen
+from classes.marcas import Marcas
+from classes.entrevista_preguntas import EntrevistaPreguntas
+from utils.progreso import MedidorProgreso
+from utils.instrumentacion import Instrumentacion
+CatalogoResultados({db!r}, {resultados!r}).entrevistas()
+"""
+
+
+def _arranque_sin_gui(ctx: Contexto) -> Operacion:
+    """Intérprete nuevo que importa el núcleo (sin Qt) y lista el catálogo de 100 entrevistas."""
+    resultados = ctx.resultados(100)
+    ruta_db = ctx.directorio / "catalogo_arranque.sqlite3"
+    from classes.catalogo_resultados import CatalogoResultados
+    CatalogoResultados(ruta_db, resultados).reindexar()
+    codigo = _CODIGO_ARRANQUE.format(raiz=str(RAIZ), db=str(ruta_db), resultados=str(resultados))
+
+    def arrancar():
+        subprocess.run([sys.executable, "-c", codigo], check=True, cwd=str(ctx.directorio))
+    return Operacion(arrancar, 1, "arranques")
+
+
+CASOS: List[Caso] = [
+    Caso("decodificacion", _decodificacion, ("cv2",), "cv2.VideoCapture.read de un clip 720p"),
+    Caso("crop_face", _crop_face, ("cv2",), "Analisis.crop_face (detector según --detector)"),
+    Caso("preprocess_frame", _preprocess_frame, ("cv2",), "Analisis.preprocess_frame sobre rostros recortados"),
+    Caso("inferencia", _inferencia, ("cv2", "tensorflow"), "predict del modelo Keras sintético, lote de 1"),
+    Caso("analisis_fragmento", _analisis_fragmento, ("cv2", "tensorflow"), "analizar_fragmento_con_tiempos completo"),
+    Caso("corte_fragmento", _corte_fragmento, ("cv2", "ffmpeg"), "Fragmento.generar_fragmento (ffmpeg)"),
+]
+for _n in TAMAÑOS_REPORTES:
+    CASOS.append(Caso(f"carga_reportes_{_n}", _carga_reportes(_n, en_frio=True), (),
+                      f"catálogo nuevo: reindexar {_n} entrevistas y listar"))
+    CASOS.append(Caso(f"carga_reportes_{_n}_caliente", _carga_reportes(_n, en_frio=False), (),
+                      f"catálogo al día: revisar {_n} entrevistas y listar"))
+CASOS.append(Caso("arranque_sin_gui", _arranque_sin_gui, (), "intérprete nuevo + importaciones del núcleo"))
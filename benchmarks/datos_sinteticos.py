@@ -0,0 +1,133 @@
+"""
+Generadores de datos sintéticos para los benchmarks.
+
+Todo es determinista (semilla fija): dos ejecuciones generan los mismos
+videos, marcas y resultados, así las mediciones son comparables entre
+máquinas y versiones.
+"""
+
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+from classes.catalogo_resultados import EMOCIONES
+from classes.diario_marcas import escribir_json_atomico
+from classes.resultados_analisis import guardar_resultado
+
+SEMILLA = 1234
+PREGUNTAS_POR_ENTREVISTA = 8
+FRAMES_DETALLE = 60
+
+
+def id_entrevista(indice: int) -> str:
+    """Ids con el formato de la app (`YYYY-MM-DD_NNN`), uno por día desde 2025-01-01."""
+    fecha = datetime(2025, 1, 1) + timedelta(days=indice // 10)
+    return f"{fecha:%Y-%m-%d}_{indice % 10 + 1:03d}"
+
+
+def generar_video(ruta, segundos: float = 5.0, fps: float = 30.0, ancho: int = 1280, alto: int = 720) -> Path:
+    """Clip mp4 con el patrón tipo rostro de `video_io.sintetico` (720p por defecto)."""
+    import cv2
+    from video_io.sintetico import generar_frames_sinteticos
+
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    escritor = cv2.VideoWriter(str(ruta), cv2.VideoWriter_fourcc(*"mp4v"), fps, (ancho, alto))
+    if not escritor.isOpened():
+        raise RuntimeError(f"No se pudo crear el video sintético: {ruta}")
+    try:
+        for frame in generar_frames_sinteticos(int(segundos * fps), ancho, alto):
+            escritor.write(frame)
+    finally:
+        escritor.release()
+    return ruta
+
+
+def generar_marcas(directorio, entrevista_id: str, preguntas: int = PREGUNTAS_POR_ENTREVISTA,
+                   duracion: float = 4.0, archivo_video: str = "") -> Path:
+    """`marcas_<id>.json` con `preguntas` marcas cerradas consecutivas."""
+    marcas = []
+    inicio = 1.0
+    for pregunta_id in range(1, preguntas + 1):
+        marcas.append({
+            "entrevista_id": entrevista_id,
+            "pregunta_id": pregunta_id,
+            "inicio": round(inicio, 3),
+            "fin": round(inicio + duracion, 3),
+            "nota": "",
+        })
+        inicio += duracion + 0.5
+    ruta = Path(directorio) / f"marcas_{entrevista_id}.json"
+    escribir_json_atomico(ruta, {
+        "entrevista_id": entrevista_id,
+        "archivo_video": archivo_video or f"data/videos_originales/entrevista_{entrevista_id}.mp4",
+        "marcas": marcas,
+    })
+    return ruta
+
+
+def _frames_aleatorios(rng: random.Random, cantidad: int) -> List[dict]:
+    frames = []
+    for _ in range(cantidad):
+        pesos = [rng.random() for _ in EMOCIONES]
+        total = sum(pesos)
+        frames.append({emo: peso / total for emo, peso in zip(EMOCIONES, pesos)})
+    return frames
+
+
+def generar_resultados(resultados_dir, entrevistas: int, preguntas: int = PREGUNTAS_POR_ENTREVISTA,
+                       frames: int = FRAMES_DETALLE, semilla: int = SEMILLA) -> List[str]:
+    """
+    Resultados de análisis (resumen + detalle) para `entrevistas` entrevistas
+    en el mismo formato que escribe AnalysisThread. Devuelve los ids.
+    """
+    rng = random.Random(semilla)
+    resultados_dir = Path(resultados_dir)
+    ids = []
+    for indice in range(entrevistas):
+        entrevista_id = id_entrevista(indice)
+        ids.append(entrevista_id)
+        carpeta = resultados_dir / entrevista_id
+        for pregunta_id in range(1, preguntas + 1):
+            nombre = f"fragmento_{entrevista_id}_{pregunta_id:03d}"
+            detalle = _frames_aleatorios(rng, frames)
+            promedios = {emo: sum(f[emo] for f in detalle) / len(detalle) for emo in EMOCIONES}
+            dominante = max(promedios.items(), key=lambda x: x[1])
+            guardar_resultado(carpeta / f"resultados_{nombre}.json", {
+                "fragmento": {
+                    "nombre": f"{nombre}.mp4",
+                    "ruta": f"data/fragmentos/{entrevista_id}/{nombre}.mp4",
+                    "entrevista_id": entrevista_id,
+                    "pregunta_id": f"{pregunta_id:03d}",
+                },
+                "analisis": {
+                    "modelo_utilizado": "sintetico.h5",
+                    "fecha_analisis": (datetime(2025, 1, 1) + timedelta(minutes=indice)).isoformat(),
+                    "total_frames_analizados": len(detalle),
+                    "resumen_emociones": {
+                        "dominant_emotion": dominante[0],
+                        "confidence": dominante[1],
+                        "avg_intensities": promedios,
+                    },
+                    "resultados_detallados": detalle,
+                },
+            })
+    return ids
+
+
+def generar_modelo_keras(ruta, entrada: int = 224) -> Path:
+    """Modelo Keras mínimo con la misma firma que el de emociones: (entrada, entrada, 3) -> 7 softmax."""
+    import tensorflow as tf
+
+    tf.random.set_seed(SEMILLA)
+    modelo = tf.keras.Sequential([
+        tf.keras.layers.InputLayer(input_shape=(entrada, entrada, 3)),
+        tf.keras.layers.Conv2D(8, 3, strides=4, activation="relu"),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(len(EMOCIONES), activation="softmax"),
+    ])
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    modelo.save(str(ruta))
+    return ruta
@@ -0,0 +1,35 @@
+"""
+Detector de rostros sustituto con la interfaz de MediaPipe FaceDetection.
+
+`Analisis.crop_face` solo usa `process(rgb)` y
+`detections[0].location_data.relative_bounding_box`; este stub devuelve
+siempre la misma caja, de modo que los benchmarks miden el recorte y el
+resto del pipeline sin depender de mediapipe ni de lo que "vea" el detector.
+"""
+
+from types import SimpleNamespace
+
+
+class DetectorRostroFijo:
+    """`process` devuelve una única detección con una caja relativa fija."""
+
+    def __init__(self, xmin: float = 0.35, ymin: float = 0.2, ancho: float = 0.3, alto: float = 0.55):
+        caja = SimpleNamespace(xmin=xmin, ymin=ymin, width=ancho, height=alto)
+        deteccion = SimpleNamespace(location_data=SimpleNamespace(relative_bounding_box=caja))
+        self._resultado = SimpleNamespace(detections=[deteccion])
+
+    def process(self, _imagen_rgb):
+        return self._resultado
+
+    def close(self):
+        pass
+
+
+def crear_detector(tipo: str = "stub"):
+    """'stub' (por defecto) o 'mediapipe' (el mismo detector que usa la app)."""
+    if tipo == "stub":
+        return DetectorRostroFijo()
+    if tipo == "mediapipe":
+        import mediapipe as mp
+        return mp.solutions.face_detection.FaceDetection(model_selection=1, min_detection_confidence=0.5)
+    raise ValueError(f"Detector {tipo} no soportado (use 'stub' o 'mediapipe')")
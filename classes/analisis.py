@@ -3,9 +3,14 @@ import numpy as np
 import logging
 from pathlib import Path
 from collections import defaultdict
+import gc
 import traceback
 
 from utils.dependencies import ensure_analysis_dependencies, DependencyError
+from utils.instrumentacion import (
+    INSTRUMENTACION_NULA, DECODIFICACION, CONVERSION_COLOR, DETECCION_ROSTRO,
+    RECORTE, PREPROCESADO, INFERENCIA,
+)
 
 
 
@@ -179,34 +184,39 @@ class Analisis:
         except Exception:
             pass
 
-    def preprocess_frame(self, frame, target_size=(224, 224)):
+    def preprocess_frame(self, frame, target_size=(224, 224), instr=INSTRUMENTACION_NULA):
         """Preprocesa un frame para el modelo (BGR → RGB + resize + normalización)."""
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = cv2.resize(frame_rgb, target_size)
-        img = img.astype("float32") / 255.0
-        img = np.expand_dims(img, axis=0)
+        with instr.etapa(CONVERSION_COLOR):
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        with instr.etapa(PREPROCESADO):
+            img = cv2.resize(frame_rgb, target_size)
+            img = img.astype("float32") / 255.0
+            img = np.expand_dims(img, axis=0)
         return img
 
-    def crop_face(self, frame, padding=0.2):
+    def crop_face(self, frame, padding=0.2, instr=INSTRUMENTACION_NULA):
         """Recorta el rostro usando MediaPipe. Devuelve None si no se detecta rostro.
         padding: Agrega % extra alrededor del bbox para contexto.
         """
         try:
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.face_detection.process(rgb_frame)
+            with instr.etapa(CONVERSION_COLOR):
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            with instr.etapa(DETECCION_ROSTRO):
+                results = self.face_detection.process(rgb_frame)
             if not results or not getattr(results, "detections", None):
                 return None
             
-            bbox = results.detections[0].location_data.relative_bounding_box  # Primera cara
-            h, w, _ = frame.shape
-            
-            # Calcular bounds con padding
-            x1 = max(int(bbox.xmin * w - padding * w), 0)
-            y1 = max(int(bbox.ymin * h - padding * h), 0)
-            x2 = min(int((bbox.xmin + bbox.width) * w + padding * w), w)
-            y2 = min(int((bbox.ymin + bbox.height) * h + padding * h), h)
-            
-            cropped = frame[y1:y2, x1:x2]
+            with instr.etapa(RECORTE):
+                bbox = results.detections[0].location_data.relative_bounding_box  # Primera cara
+                h, w, _ = frame.shape
+
+                # Calcular bounds con padding
+                x1 = max(int(bbox.xmin * w - padding * w), 0)
+                y1 = max(int(bbox.ymin * h - padding * h), 0)
+                x2 = min(int((bbox.xmin + bbox.width) * w + padding * w), w)
+                y2 = min(int((bbox.ymin + bbox.height) * h + padding * h), h)
+
+                cropped = frame[y1:y2, x1:x2]
             # Si cropped es muy pequeño (<50x50), ignora
             if cropped.shape[0] < 50 or cropped.shape[1] < 50:
                 return None
@@ -216,45 +226,99 @@ class Analisis:
             self.logger.warning(f"Error en crop_face: {e}")
             return None
 
-    def analizar_fragmento(self, fragmento_path, skip_frames=1):
-        """Analiza un fragmento de video y devuelve la intensidad de cada emoción por frame."""
+    def analizar_fragmento(self, fragmento_path, skip_frames=1, on_progreso=None, instr=INSTRUMENTACION_NULA):
+        """Analiza un fragmento de video y devuelve la intensidad de cada emoción por frame.
+
+        on_progreso: callback opcional llamado en cada frame leído con los segundos
+        de video procesados hasta el momento.
+        instr: Instrumentacion opcional (utils.instrumentacion) que recibe los
+        tiempos de cada etapa y los contadores de frames.
+        """
+        return self.analizar_fragmento_con_tiempos(fragmento_path, skip_frames, on_progreso, instr)[1]
+
+    def analizar_fragmento_con_tiempos(self, fragmento_path, skip_frames=1, on_progreso=None,
+                                       instr=INSTRUMENTACION_NULA):
+        """Como analizar_fragmento, pero devuelve (tiempos, resultados): el segundo
+        del fragmento de cada frame analizado (los frames sin rostro no aparecen).
+        """
+        tiempos, resultados = [], []
+
+        def acumular(tiempo, intensidades):
+            tiempos.append(tiempo)
+            resultados.append(intensidades)
+
+        self.analizar_fragmento_en_flujo(fragmento_path, acumular, skip_frames, on_progreso, instr)
+        return tiempos, resultados
+
+    def analizar_fragmento_en_flujo(self, fragmento_path, on_resultado, skip_frames=1, on_progreso=None,
+                                    instr=INSTRUMENTACION_NULA, monitor=None):
+        """Analiza el fragmento entregando cada frame a `on_resultado(tiempo, intensidades)`
+        en lugar de acumularlos (modo con presupuesto de memoria).
+
+        monitor: MonitorMemoria opcional (utils.memoria) que se revisa en cada frame;
+        lanza MemoriaExcedida si se supera el límite.
+        Devuelve (frames analizados, frames leídos).
+        """
         fragmento_path = Path(fragmento_path)
         if not fragmento_path.exists():
             self.logger.error(f"El fragmento no se encontró en la ruta: {fragmento_path}")
             raise FileNotFoundError(f"No se encontró el fragmento en la ruta: {fragmento_path}")
 
         cap = cv2.VideoCapture(str(fragmento_path))
-        resultados = []
+        analizados = 0
         frame_count = 0
 
         if not cap.isOpened():
             self.logger.error(f"No se pudo abrir el video: {fragmento_path}")
             raise RuntimeError(f"No se pudo abrir el video: {fragmento_path}")
 
+        fps_video = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
         try:
             while True:
-                ret, frame = cap.read()
+                with instr.etapa(DECODIFICACION):
+                    ret, frame = cap.read()
                 if not ret:
                     break
                 frame_count += 1
+                if monitor is not None:
+                    monitor.revisar()
+                if on_progreso is not None:
+                    on_progreso(frame_count / fps_video)
                 if frame_count % skip_frames != 0:
                     continue
 
                 # Recortar rostro
-                cropped = self.crop_face(frame)
+                cropped = self.crop_face(frame, instr=instr)
                 if cropped is None:
+                    instr.contar("frames_sin_rostro")
                     continue  # No se detectó rostro
 
                 # Preprocesar y predecir
-                processed = self.preprocess_frame(cropped)
-                prediction = self.model.predict(processed, verbose=0)[0]
+                processed = self.preprocess_frame(cropped, instr=instr)
+                with instr.etapa(INFERENCIA):
+                    prediction = self.model.predict(processed, verbose=0)[0]
                 intensidades = {self.emotion_map[i]: float(prediction[i]) for i in range(len(prediction))}
-                resultados.append(intensidades)
+                on_resultado((frame_count - 1) / fps_video, intensidades)
+                analizados += 1
         finally:
             cap.release()
+            instr.contar("frames", frame_count)
+            instr.contar("frames_analizados", analizados)
+            instr.terminar()
 
-        self.logger.info(f"Procesados {len(resultados)} frames de {frame_count} totales.")
-        return resultados
+        self.logger.info(f"Procesados {analizados} frames de {frame_count} totales.")
+        return analizados, frame_count
+
+    def liberar_recursos(self):
+        """Cierra MediaPipe (se recrea al pedirlo) para no arrastrar su estado entre fragmentos."""
+        if self._face_detection is not None:
+            try:
+                self._face_detection.close()
+            except Exception:
+                pass
+            self._face_detection = None
+        gc.collect()
 
     def get_emotion_summary(self, resultados):
         """Resumen simple: promedio de intensidades y emoción dominante."""
@@ -266,6 +330,11 @@ class Analisis:
             for emotion, intensity in frame_data.items():
                 avg_emotions[emotion] += intensity / len(resultados)
         
+        return self.resumen_desde_promedios(avg_emotions)
+
+    @staticmethod
+    def resumen_desde_promedios(avg_emotions):
+        """Mismo formato que get_emotion_summary a partir de los promedios ya calculados."""
         dominant = max(avg_emotions.items(), key=lambda x: x[1])
         return {
             'dominant_emotion': dominant[0],
@@ -0,0 +1,336 @@
+"""
+Analítica agregada sobre todas las entrevistas del estudio.
+
+`MotorAnalitica` carga los resúmenes del catálogo de resultados en columnas
+NumPy (una fila por fragmento analizado: entrevista, pregunta, categoría,
+intensidades, confianza, frames y emoción dominante) y calcula los
+agregados con `np.bincount` sobre códigos enteros, sin bucles de Python por
+fila. Las categorías salen del cuestionario (`EntrevistaPreguntas`: la
+pregunta N es la N-ésima en el orden de las categorías) y las cohortes de
+`data/cohortes.json` (`{"<entrevista_id>": "<cohorte>"}`).
+
+`sincronizar()` compara las versiones del catálogo y vuelve a leer solo las
+entrevistas cuyos resultados cambiaron; las filas viejas se marcan como
+inactivas y se compactan cuando son muchas.
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from classes.catalogo_resultados import EMOCIONES, CatalogoResultados
+from classes.diario_marcas import escribir_json_atomico
+from classes.entrevista_preguntas import EntrevistaPreguntas
+
+logger = logging.getLogger(__name__)
+
+RUTA_COHORTES = Path("data/cohortes.json")
+RUTA_PREGUNTAS = Path("data/preguntas.json")
+SIN_CATEGORIA = "Sin categoría"
+SIN_COHORTE = "Sin cohorte"
+
+_NUM_EMOCIONES = len(EMOCIONES)
+_CODIGO_EMOCION = {emo: i for i, emo in enumerate(EMOCIONES)}
+
+
+def categorias_por_pregunta(preguntas: Optional[EntrevistaPreguntas] = None) -> List[str]:
+    """Categoría de cada pregunta en orden: el elemento N-1 corresponde a la pregunta N."""
+    if preguntas is None:
+        preguntas = EntrevistaPreguntas()
+        if RUTA_PREGUNTAS.exists() and not preguntas.importar_json(str(RUTA_PREGUNTAS)):
+            logger.warning(f"{RUTA_PREGUNTAS} no es válido; se usa el cuestionario por defecto")
+    return [categoria for categoria, lista in preguntas.obtener_preguntas().items() for _ in lista]
+
+
+def cargar_cohortes(ruta=RUTA_COHORTES) -> Dict[str, str]:
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return {}
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"No se pudieron leer las cohortes de {ruta}: {e}")
+        return {}
+    return {str(k): str(v) for k, v in datos.items()}
+
+
+class _Codigos:
+    """Asigna un entero estable a cada valor (id de entrevista, cohorte...)."""
+
+    def __init__(self, valores: Iterable[str] = ()):
+        self.valores: List[str] = []
+        self._indice: Dict[str, int] = {}
+        for valor in valores:
+            self.codigo(valor)
+
+    def codigo(self, valor: str) -> int:
+        codigo = self._indice.get(valor)
+        if codigo is None:
+            codigo = self._indice[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+    def buscar(self, valor: str) -> Optional[int]:
+        return self._indice.get(valor)
+
+    def __len__(self):
+        return len(self.valores)
+
+
+class MotorAnalitica:
+    """
+    Almacén columnar de los resúmenes de análisis con consultas agregadas.
+
+    Las consultas (`por_pregunta`, `por_categoria`, `por_cohorte`,
+    `por_entrevista`, `resumen_global`) aceptan los filtros `entrevistas`,
+    `cohortes` y `categorias` y devuelven diccionarios listos para mostrar.
+    """
+
+    def __init__(self, catalogo: Optional[CatalogoResultados] = None,
+                 preguntas: Optional[EntrevistaPreguntas] = None,
+                 cohortes: Optional[Dict[str, str]] = None, ruta_cohortes=RUTA_COHORTES):
+        self.catalogo = catalogo or CatalogoResultados()
+        self.ruta_cohortes = Path(ruta_cohortes)
+        self._lock = threading.Lock()
+
+        self._categoria_de_pregunta = categorias_por_pregunta(preguntas)
+        self._categorias = _Codigos(dict.fromkeys(self._categoria_de_pregunta))
+        self._codigo_sin_categoria = self._categorias.codigo(SIN_CATEGORIA)
+        self._entrevistas = _Codigos()
+        self._cohortes = _Codigos([SIN_COHORTE])
+        self._mapa_cohortes = dict(cohortes) if cohortes is not None else cargar_cohortes(self.ruta_cohortes)
+        # Cohorte de cada código de entrevista (se indexa con la columna de entrevistas)
+        self._cohorte_de_entrevista = np.zeros(0, dtype=np.int32)
+        self._versiones: Dict[str, tuple] = {}
+
+        self._n = 0
+        self._inactivas = 0
+        self._reservar(0)
+
+    # ------------------------------------------------------------------
+    # Almacenamiento
+    # ------------------------------------------------------------------
+    def _reservar(self, capacidad: int):
+        """Columnas vacías (o ampliadas conservando las primeras `_n` filas)."""
+        nuevas = {
+            "entrevista": np.zeros(capacidad, dtype=np.int32),
+            "pregunta": np.zeros(capacidad, dtype=np.int32),
+            "categoria": np.zeros(capacidad, dtype=np.int32),
+            "confianza": np.zeros(capacidad, dtype=np.float64),
+            "frames": np.zeros(capacidad, dtype=np.float64),
+            "dominante": np.zeros(capacidad, dtype=np.int32),
+            "activo": np.zeros(capacidad, dtype=bool),
+            "intensidad": np.zeros((capacidad, _NUM_EMOCIONES), dtype=np.float64),
+        }
+        if self._n:
+            for nombre, columna in nuevas.items():
+                columna[:self._n] = self._col[nombre][:self._n]
+        self._col = nuevas
+
+    def _agregar_filas(self, filas: List[tuple]):
+        if not filas:
+            return
+        faltan = self._n + len(filas) - len(self._col["activo"])
+        if faltan > 0:
+            self._reservar(max(2 * len(self._col["activo"]), self._n + len(filas), 256))
+
+        fin = self._n + len(filas)
+        tramo = slice(self._n, fin)
+        columnas = list(zip(*filas))
+        entrevistas = [self._entrevistas.codigo(str(e)) for e in columnas[0]]
+        preguntas = [int(p) if str(p).isdigit() else 0 for p in columnas[1]]
+
+        c = self._col
+        c["entrevista"][tramo] = entrevistas
+        c["pregunta"][tramo] = preguntas
+        c["categoria"][tramo] = [
+            self._categorias.codigo(self._categoria_de_pregunta[p - 1])
+            if 0 < p <= len(self._categoria_de_pregunta) else self._codigo_sin_categoria
+            for p in preguntas
+        ]
+        c["confianza"][tramo] = np.asarray(columnas[2], dtype=np.float64)
+        c["frames"][tramo] = np.asarray([f or 0 for f in columnas[3]], dtype=np.float64)
+        c["dominante"][tramo] = [_CODIGO_EMOCION.get(d, -1) for d in columnas[4]]
+        c["intensidad"][tramo] = np.asarray([fila[5:] for fila in filas], dtype=np.float64)
+        c["activo"][tramo] = True
+        # Valores nulos del catálogo (NaN tras la conversión) cuentan como 0
+        np.nan_to_num(c["intensidad"][tramo], copy=False)
+        np.nan_to_num(c["confianza"][tramo], copy=False)
+        self._n = fin
+        self._actualizar_cohortes()
+
+    def _desactivar(self, entrevista_ids: Iterable[str]):
+        codigos = [c for c in map(self._entrevistas.buscar, entrevista_ids) if c is not None]
+        if not codigos or not self._n:
+            return
+        activo = self._col["activo"][:self._n]
+        quitar = activo & np.isin(self._col["entrevista"][:self._n], codigos)
+        self._inactivas += int(quitar.sum())
+        activo[quitar] = False
+        if self._inactivas > self._n // 2:
+            self._compactar()
+
+    def _compactar(self):
+        activo = self._col["activo"][:self._n].copy()
+        conservadas = int(activo.sum())
+        for nombre, columna in self._col.items():
+            columna[:conservadas] = columna[:self._n][activo]
+            columna[conservadas:self._n] = 0
+        self._n = conservadas
+        self._inactivas = 0
+
+    def _actualizar_cohortes(self):
+        self._cohorte_de_entrevista = np.array(
+            [self._cohortes.codigo(self._mapa_cohortes.get(e, SIN_COHORTE)) for e in self._entrevistas.valores],
+            dtype=np.int32
+        )
+
+    # ------------------------------------------------------------------
+    # Carga incremental
+    # ------------------------------------------------------------------
+    def sincronizar(self) -> List[str]:
+        """Relee del catálogo las entrevistas nuevas, modificadas o borradas. Devuelve sus ids."""
+        versiones = self.catalogo.versiones()
+        with self._lock:
+            cambiadas = [e for e, v in versiones.items() if self._versiones.get(e) != v]
+            borradas = [e for e in self._versiones if e not in versiones]
+            if not cambiadas and not borradas:
+                return []
+            filas = self.catalogo.filas_numericas(cambiadas) if cambiadas else []
+            self._desactivar(cambiadas + borradas)
+            self._agregar_filas(filas)
+            for entrevista_id in borradas:
+                del self._versiones[entrevista_id]
+            self._versiones.update({e: versiones[e] for e in cambiadas})
+        logger.info(f"Analítica: {len(cambiadas)} entrevistas actualizadas, {len(borradas)} eliminadas")
+        return cambiadas + borradas
+
+    def actualizar_entrevista(self, entrevista_id: str):
+        """Vuelve a leer una entrevista (p. ej. al terminar de analizarla)."""
+        filas = self.catalogo.filas_numericas([entrevista_id])
+        version = self.catalogo.versiones().get(entrevista_id)
+        with self._lock:
+            self._desactivar([entrevista_id])
+            self._agregar_filas(filas)
+            if version is None:
+                self._versiones.pop(entrevista_id, None)
+            else:
+                self._versiones[entrevista_id] = version
+
+    def asignar_cohortes(self, cohortes: Dict[str, str], guardar: bool = True):
+        """Asigna entrevistas a cohortes (solo cambia una tabla por entrevista, no las filas)."""
+        with self._lock:
+            self._mapa_cohortes.update({str(k): str(v) for k, v in cohortes.items()})
+            self._actualizar_cohortes()
+            mapa = dict(self._mapa_cohortes)
+        if guardar:
+            escribir_json_atomico(self.ruta_cohortes, mapa)
+
+    @property
+    def total_fragmentos(self) -> int:
+        return self._n - self._inactivas
+
+    def entrevistas(self) -> List[str]:
+        return sorted(self._versiones)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def _mascara(self, entrevistas=None, cohortes=None, categorias=None) -> np.ndarray:
+        c = self._col
+        mascara = c["activo"][:self._n].copy()
+        if entrevistas is not None:
+            codigos = [x for x in map(self._entrevistas.buscar, entrevistas) if x is not None]
+            mascara &= np.isin(c["entrevista"][:self._n], codigos)
+        if cohortes is not None:
+            codigos = [x for x in map(self._cohortes.buscar, cohortes) if x is not None]
+            mascara &= np.isin(self._cohorte_de_entrevista[c["entrevista"][:self._n]], codigos)
+        if categorias is not None:
+            codigos = [x for x in map(self._categorias.buscar, categorias) if x is not None]
+            mascara &= np.isin(c["categoria"][:self._n], codigos)
+        return mascara
+
+    def _claves(self, agrupacion: str):
+        """Código de grupo de cada fila y nombre de cada código."""
+        entrevistas = self._col["entrevista"][:self._n]
+        if agrupacion == "pregunta":
+            preguntas = self._col["pregunta"][:self._n]
+            if not self._n:
+                return preguntas, []
+            return preguntas, [str(p).zfill(3) for p in range(int(preguntas.max()) + 1)]
+        if agrupacion == "categoria":
+            return self._col["categoria"][:self._n], list(self._categorias.valores)
+        if agrupacion == "cohorte":
+            return self._cohorte_de_entrevista[entrevistas], list(self._cohortes.valores)
+        if agrupacion == "entrevista":
+            return entrevistas, list(self._entrevistas.valores)
+        return np.zeros(self._n, dtype=np.int64), ["global"]
+
+    def _agregar(self, agrupacion: str, filtros: dict) -> Dict[str, dict]:
+        """Media, desviación, confianza, frames y emociones dominantes por grupo."""
+        with self._lock:
+            claves, etiquetas = self._claves(agrupacion)
+            mascara = self._mascara(**filtros)
+            claves = claves[mascara]
+            intensidad = self._col["intensidad"][:self._n][mascara]
+            confianza = self._col["confianza"][:self._n][mascara]
+            frames = self._col["frames"][:self._n][mascara]
+            dominante = self._col["dominante"][:self._n][mascara]
+            entrevista = self._col["entrevista"][:self._n][mascara]
+            num_entrevistas = max(len(self._entrevistas), 1)
+
+        grupos = len(etiquetas)
+        # Sin grupos (catálogo vacío) o sin filas que pasen los filtros no hay nada que agregar
+        if grupos == 0 or not claves.size:
+            return {}
+        conteo = np.bincount(claves, minlength=grupos)
+        divisor = np.maximum(conteo, 1)
+        suma = np.column_stack([np.bincount(claves, weights=intensidad[:, k], minlength=grupos)
+                                for k in range(_NUM_EMOCIONES)])
+        suma_cuadrados = np.column_stack([np.bincount(claves, weights=intensidad[:, k] ** 2, minlength=grupos)
+                                          for k in range(_NUM_EMOCIONES)])
+        media = suma / divisor[:, None]
+        desviacion = np.sqrt(np.maximum(suma_cuadrados / divisor[:, None] - media ** 2, 0))
+        confianza_media = np.bincount(claves, weights=confianza, minlength=grupos) / divisor
+        frames_total = np.bincount(claves, weights=frames, minlength=grupos)
+        # Emoción dominante: conteo por (grupo, emoción); -1 (sin dato) va a la columna 0 y se descarta
+        dominantes = np.bincount(claves * (_NUM_EMOCIONES + 1) + dominante + 1,
+                                 minlength=grupos * (_NUM_EMOCIONES + 1)).reshape(grupos, -1)[:, 1:]
+        pares = np.unique(claves.astype(np.int64) * num_entrevistas + entrevista)
+        entrevistas_por_grupo = np.bincount(pares // num_entrevistas, minlength=grupos)
+
+        resultado = {}
+        for g in np.flatnonzero(conteo):
+            resultado[etiquetas[g]] = {
+                "fragmentos": int(conteo[g]),
+                "entrevistas": int(entrevistas_por_grupo[g]),
+                "intensidad": dict(zip(EMOCIONES, media[g].tolist())),
+                "desviacion": dict(zip(EMOCIONES, desviacion[g].tolist())),
+                "confidence": float(confianza_media[g]),
+                "total_frames": int(frames_total[g]),
+                "dominantes": {emo: int(n) for emo, n in zip(EMOCIONES, dominantes[g]) if n},
+            }
+        return resultado
+
+    def por_pregunta(self, **filtros) -> Dict[str, dict]:
+        """Agregados por pregunta, con clave '001', '002'... como en reportes."""
+        return self._agregar("pregunta", filtros)
+
+    def por_categoria(self, **filtros) -> Dict[str, dict]:
+        """Agregados por categoría del cuestionario, en el orden del cuestionario."""
+        return self._agregar("categoria", filtros)
+
+    def por_cohorte(self, **filtros) -> Dict[str, dict]:
+        return self._agregar("cohorte", filtros)
+
+    def por_entrevista(self, **filtros) -> Dict[str, dict]:
+        return self._agregar("entrevista", filtros)
+
+    def resumen_global(self, **filtros) -> dict:
+        """Agregado de todos los fragmentos que pasan los filtros (vacío si no hay ninguno)."""
+        return self._agregar("global", filtros).get("global", {})
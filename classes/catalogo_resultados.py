@@ -0,0 +1,361 @@
+"""
+Catálogo SQLite de resultados de análisis (`data/catalogo.sqlite3`).
+
+Guarda una fila de resumen por archivo `resultados_*.json` (emoción dominante,
+confianza, intensidades promedio, frames y fecha) para que las pantallas de
+reportes consulten por índice en lugar de abrir y parsear todos los JSON. El
+JSON sigue siendo la fuente de verdad: el catálogo se reconstruye con
+`reindexar()` (o `python main.py --reindexar`).
+"""
+
+import re
+import json
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from classes.resultados_analisis import convertir_resultado, leer_resumen
+
+logger = logging.getLogger(__name__)
+
+RUTA_CATALOGO = Path("data/catalogo.sqlite3")
+RESULTADOS_DIR = Path("data/resultados")
+EMOCIONES = ["angry", "contempt", "disgust", "fear", "happy", "sad", "surprise"]
+
+_COLUMNAS_INTENSIDAD = ", ".join(f"i_{emo} REAL" for emo in EMOCIONES)
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS fragmentos (
+    ruta_resultado   TEXT PRIMARY KEY,
+    entrevista_id    TEXT NOT NULL,
+    pregunta_id      TEXT NOT NULL,
+    nombre_fragmento TEXT,
+    video_fragmento  TEXT,
+    duracion         TEXT,
+    modelo           TEXT,
+    fecha_analisis   TEXT,
+    total_frames     INTEGER,
+    emocion_dominante TEXT,
+    confidence       REAL,
+    intensidades     TEXT,
+    {_COLUMNAS_INTENSIDAD},
+    tamaño           INTEGER,
+    mtime            REAL
+);
+CREATE INDEX IF NOT EXISTS idx_fragmentos_entrevista ON fragmentos (entrevista_id, pregunta_id);
+CREATE INDEX IF NOT EXISTS idx_fragmentos_fecha ON fragmentos (fecha_analisis);
+CREATE TABLE IF NOT EXISTS directorios (
+    ruta  TEXT PRIMARY KEY,
+    mtime REAL
+);
+"""
+
+# Una fila por pregunta: si una pregunta tiene varios resultados (se volvió a
+# analizar con otro modelo o nombre de archivo) cuenta solo el más reciente
+_ULTIMO_POR_PREGUNTA = """
+    ruta_resultado = (
+        SELECT g.ruta_resultado FROM fragmentos g
+        WHERE g.entrevista_id = fragmentos.entrevista_id AND g.pregunta_id = fragmentos.pregunta_id
+        ORDER BY g.fecha_analisis DESC, g.ruta_resultado DESC LIMIT 1
+    )
+"""
+
+
+def formatear_fecha(fecha_iso: str) -> str:
+    """ISO -> 'YYYY-MM-DD HH:MM' (devuelve el texto original si no es ISO)."""
+    try:
+        return datetime.fromisoformat(fecha_iso.replace('Z', '+00:00')).strftime("%Y-%m-%d %H:%M")
+    except (ValueError, AttributeError):
+        return fecha_iso
+
+
+def _pregunta_id_de(fragmento_info: dict, ruta_json: Path) -> Optional[str]:
+    """pregunta_id normalizado a 3 dígitos, como lo usan las pantallas de reportes."""
+    pregunta_id = fragmento_info.get("pregunta_id")
+    if not pregunta_id:
+        match = re.search(r'pregunta[_\s]*(\d+)', ruta_json.stem.lower())
+        if match:
+            pregunta_id = match.group(1)
+    if not pregunta_id:
+        return None
+    return str(pregunta_id).zfill(3)
+
+
+class CatalogoResultados:
+    """Acceso al catálogo. Cada operación abre su propia conexión, así se puede usar desde cualquier hilo."""
+
+    def __init__(self, ruta=RUTA_CATALOGO, resultados_dir=RESULTADOS_DIR):
+        self.ruta = Path(ruta)
+        self.resultados_dir = Path(resultados_dir)
+        self._lock = threading.Lock()
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        with self._conectar() as con:
+            con.executescript(_ESQUEMA)
+
+    @contextmanager
+    def _conectar(self):
+        con = sqlite3.connect(str(self.ruta), timeout=10)
+        con.row_factory = sqlite3.Row
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+    def registrar_resultado(self, ruta_json, datos: dict, con=None) -> bool:
+        """Inserta o actualiza la fila de un resultado a partir de su contenido JSON."""
+        ruta_json = Path(ruta_json)
+        fragmento_info = datos.get("fragmento", {})
+        analisis_info = datos.get("analisis", {})
+        resumen = analisis_info.get("resumen_emociones", {}) or {}
+        intensidades = resumen.get("avg_intensities", {}) or {}
+
+        pregunta_id = _pregunta_id_de(fragmento_info, ruta_json)
+        if pregunta_id is None:
+            logger.warning(f"No se pudo extraer pregunta_id de {ruta_json}")
+            return False
+
+        try:
+            stat = ruta_json.stat()
+            tamaño, mtime = stat.st_size, stat.st_mtime
+        except OSError:
+            tamaño, mtime = None, None
+
+        fila = {
+            "ruta_resultado": str(ruta_json),
+            "entrevista_id": ruta_json.parent.name,
+            "pregunta_id": pregunta_id,
+            "nombre_fragmento": fragmento_info.get("nombre", ""),
+            "video_fragmento": fragmento_info.get("ruta", ""),
+            "duracion": str(fragmento_info.get("duration", "N/A")),
+            "modelo": analisis_info.get("modelo_utilizado", "N/A"),
+            "fecha_analisis": analisis_info.get("fecha_analisis", ""),
+            "total_frames": analisis_info.get("total_frames_analizados", 0),
+            "emocion_dominante": resumen.get("dominant_emotion", ""),
+            "confidence": resumen.get("confidence", 0),
+            "intensidades": json.dumps(intensidades),
+            "tamaño": tamaño,
+            "mtime": mtime,
+        }
+        for emo in EMOCIONES:
+            fila[f"i_{emo}"] = intensidades.get(emo, 0)
+
+        columnas = ", ".join(fila)
+        marcadores = ", ".join(f":{c}" for c in fila)
+        sql = f"INSERT OR REPLACE INTO fragmentos ({columnas}) VALUES ({marcadores})"
+        if con is not None:
+            con.execute(sql, fila)
+        else:
+            with self._lock, self._conectar() as con:
+                con.execute(sql, fila)
+        return True
+
+    def registrar_archivo(self, ruta_json, con=None) -> bool:
+        ruta_json = Path(ruta_json)
+        # Solo el resumen: los datos por frame no hacen falta para el catálogo
+        return self.registrar_resultado(ruta_json, leer_resumen(ruta_json), con=con)
+
+    def registrar_cambios(self, rutas, eliminados=()) -> Dict[str, int]:
+        """
+        Registra solo los archivos indicados y borra los eliminados, en una transacción.
+
+        También actualiza la fecha de sus carpetas para que el próximo
+        `reindexar()` no vuelva a revisarlas.
+        """
+        conteo = {"leidos": 0, "eliminados": 0, "errores": 0}
+        carpetas = set()
+        with self._lock, self._conectar() as con:
+            for ruta in map(Path, rutas):
+                carpetas.add(ruta.parent)
+                try:
+                    self.registrar_archivo(ruta, con=con)
+                    conteo["leidos"] += 1
+                except Exception as e:
+                    conteo["errores"] += 1
+                    logger.warning(f"Error indexando {ruta}: {e}")
+            for ruta in map(Path, eliminados):
+                carpetas.add(ruta.parent)
+                cursor = con.execute("DELETE FROM fragmentos WHERE ruta_resultado = ?", (str(ruta),))
+                conteo["eliminados"] += cursor.rowcount
+            for carpeta in carpetas:
+                try:
+                    mtime = carpeta.stat().st_mtime
+                except OSError:
+                    con.execute("DELETE FROM directorios WHERE ruta = ?", (str(carpeta),))
+                    continue
+                con.execute("INSERT OR REPLACE INTO directorios (ruta, mtime) VALUES (?, ?)", (str(carpeta), mtime))
+        return conteo
+
+    def reindexar(self, completo: bool = False, convertir: bool = False) -> Dict[str, int]:
+        """
+        Sincroniza el catálogo con `data/resultados`.
+
+        Sin `completo` solo se revisan las carpetas cuya fecha de modificación
+        cambió (altas o bajas de archivos) y, dentro de ellas, los archivos con
+        tamaño o fecha distintos; los resultados que escribe el análisis ya se
+        registran al guardarse. Con `completo` se vuelve a leer todo. Con
+        `convertir` los resultados antiguos se reescriben como resumen + detalle.
+        """
+        conteo = {"leidos": 0, "sin_cambios": 0, "eliminados": 0, "errores": 0, "convertidos": 0}
+        if not self.resultados_dir.exists():
+            return conteo
+
+        with self._lock, self._conectar() as con:
+            if completo:
+                con.execute("DELETE FROM fragmentos")
+                con.execute("DELETE FROM directorios")
+            directorios = {r["ruta"]: r["mtime"] for r in con.execute("SELECT ruta, mtime FROM directorios")}
+            vistos = set()
+
+            for entrevista_dir in self.resultados_dir.iterdir():
+                if not entrevista_dir.is_dir():
+                    continue
+                clave = str(entrevista_dir)
+                vistos.add(clave)
+                mtime_dir = entrevista_dir.stat().st_mtime
+                if directorios.get(clave) == mtime_dir:
+                    continue
+
+                registrados = {
+                    r["ruta_resultado"]: (r["tamaño"], r["mtime"])
+                    for r in con.execute("SELECT ruta_resultado, tamaño, mtime FROM fragmentos WHERE entrevista_id = ?",
+                                         (entrevista_dir.name,))
+                }
+                presentes = set()
+                convertidos = 0
+                for json_file in entrevista_dir.glob("*.json"):
+                    presentes.add(str(json_file))
+                    stat = json_file.stat()
+                    if registrados.get(str(json_file)) == (stat.st_size, stat.st_mtime):
+                        conteo["sin_cambios"] += 1
+                        continue
+                    try:
+                        if convertir and convertir_resultado(json_file):
+                            convertidos += 1
+                        self.registrar_resultado(json_file, leer_resumen(json_file), con=con)
+                        conteo["leidos"] += 1
+                    except Exception as e:
+                        conteo["errores"] += 1
+                        logger.warning(f"Error indexando {json_file}: {e}")
+                for ruta in set(registrados) - presentes:
+                    con.execute("DELETE FROM fragmentos WHERE ruta_resultado = ?", (ruta,))
+                    conteo["eliminados"] += 1
+                if convertidos:
+                    # La conversión escribió en la carpeta: sin esto se volvería a revisar en cada arranque
+                    mtime_dir = entrevista_dir.stat().st_mtime
+                    conteo["convertidos"] += convertidos
+                con.execute("INSERT OR REPLACE INTO directorios (ruta, mtime) VALUES (?, ?)", (clave, mtime_dir))
+
+            # Carpetas de entrevistas borradas
+            for clave in set(directorios) - vistos:
+                cursor = con.execute("DELETE FROM fragmentos WHERE entrevista_id = ?", (Path(clave).name,))
+                conteo["eliminados"] += cursor.rowcount
+                con.execute("DELETE FROM directorios WHERE ruta = ?", (clave,))
+
+        logger.info(f"Catálogo de resultados sincronizado: {conteo}")
+        return conteo
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def entrevistas(self) -> List[dict]:
+        """Resumen por entrevista (de la más nueva a la más antigua)."""
+        promedios = ", ".join(f"AVG(i_{emo}) AS i_{emo}" for emo in EMOCIONES)
+        sql = f"""
+            SELECT entrevista_id, COUNT(*) AS num_preguntas, MIN(fecha_analisis) AS fecha, {promedios}
+            FROM fragmentos WHERE {_ULTIMO_POR_PREGUNTA} GROUP BY entrevista_id
+        """
+        with self._conectar() as con:
+            filas = con.execute(sql).fetchall()
+        entrevistas = []
+        for fila in filas:
+            entrevista_id = fila["entrevista_id"]
+            fecha = formatear_fecha(fila["fecha"]) if fila["fecha"] else self._fecha_directorio(entrevista_id)
+            entrevistas.append({
+                "id": entrevista_id,
+                "nombre": f"Entrevista {entrevista_id}",
+                "num_preguntas": fila["num_preguntas"],
+                "promedios_globales": {emo: fila[f"i_{emo}"] or 0 for emo in EMOCIONES},
+                "fecha": fecha,
+                "video_full": ""
+            })
+        entrevistas.sort(key=lambda x: x["fecha"], reverse=True)
+        return entrevistas
+
+    def fragmentos_de(self, entrevista_id: str, todos: bool = False) -> List[dict]:
+        """
+        Filas de resumen de los fragmentos de una entrevista, ordenadas por
+        pregunta: el último análisis de cada una, o todos los resultados con `todos`.
+        """
+        filtro = "" if todos else f"AND {_ULTIMO_POR_PREGUNTA}"
+        with self._conectar() as con:
+            filas = con.execute(
+                f"SELECT * FROM fragmentos WHERE entrevista_id = ? {filtro} ORDER BY pregunta_id, fecha_analisis",
+                (entrevista_id,)
+            ).fetchall()
+        resultado = []
+        for fila in filas:
+            datos = dict(fila)
+            datos["intensidades"] = json.loads(datos["intensidades"] or "{}")
+            resultado.append(datos)
+        return resultado
+
+    def preguntas_de(self, entrevista_id: str) -> Dict[str, dict]:
+        """Datos por pregunta con el formato de `data_context['por_entrevista'][id]` de reportes."""
+        return {
+            fila["pregunta_id"]: {
+                "intensidad": fila["intensidades"],
+                "emocion_dominante": fila["emocion_dominante"],
+                "confidence": fila["confidence"],
+                "total_frames": fila["total_frames"],
+                "fecha_analisis": fila["fecha_analisis"],
+                "nota": f"Fragmento {fila['pregunta_id']}",
+                "video_fragmento": fila["video_fragmento"],
+                "nombre_fragmento": fila["nombre_fragmento"],
+                "ruta_resultado": fila["ruta_resultado"]
+            }
+            for fila in self.fragmentos_de(entrevista_id)
+        }
+
+    def versiones(self) -> Dict[str, tuple]:
+        """(filas, mtime más reciente) por entrevista: cambia cuando se agrega, modifica o borra un resultado."""
+        with self._conectar() as con:
+            filas = con.execute(
+                "SELECT entrevista_id, COUNT(*) AS n, MAX(mtime) AS mtime FROM fragmentos GROUP BY entrevista_id"
+            ).fetchall()
+        return {fila["entrevista_id"]: (fila["n"], fila["mtime"]) for fila in filas}
+
+    def filas_numericas(self, entrevista_ids: Optional[List[str]] = None) -> List[tuple]:
+        """
+        (entrevista_id, pregunta_id, confidence, total_frames, emocion_dominante, i_<emo>...)
+        del último análisis de cada pregunta, de todas o de algunas entrevistas, sin decodificar JSON.
+        """
+        intensidades = ", ".join(f"i_{emo}" for emo in EMOCIONES)
+        sql = f"""
+            SELECT entrevista_id, pregunta_id, confidence, total_frames, emocion_dominante, {intensidades}
+            FROM fragmentos WHERE {_ULTIMO_POR_PREGUNTA}
+        """
+        with self._conectar() as con:
+            if entrevista_ids is None:
+                return con.execute(sql).fetchall()
+            filas = []
+            for i in range(0, len(entrevista_ids), 500):
+                lote = list(entrevista_ids[i:i + 500])
+                marcadores = ", ".join("?" * len(lote))
+                filas.extend(con.execute(f"{sql} AND entrevista_id IN ({marcadores})", lote).fetchall())
+            return filas
+
+    def _fecha_directorio(self, entrevista_id: str) -> str:
+        try:
+            mtime = (self.resultados_dir / entrevista_id).stat().st_mtime
+            return datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M")
+        except OSError:
+            return ""
@@ -0,0 +1,120 @@
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Estados de un trabajo de corte
+PENDIENTE = "pendiente"
+ESPERANDO = "esperando"   # la fuente todavía no cubre el final de la marca
+CORTANDO = "cortando"
+LISTO = "listo"
+ERROR = "error"
+
+
+@dataclass
+class EstadoCola:
+    pendientes: int = 0
+    esperando: int = 0
+    cortando: int = 0
+    listos: int = 0
+    errores: int = 0
+
+    @property
+    def en_curso(self) -> int:
+        return self.pendientes + self.esperando + self.cortando
+
+    def describir(self) -> str:
+        texto = f"✂️ fragmentos: {self.listos} listos"
+        if self.en_curso:
+            texto += f", {self.cortando} cortando, {self.pendientes + self.esperando} en cola"
+        if self.errores:
+            texto += f", {self.errores} con error"
+        return texto
+
+
+class ColaFragmentos:
+    """
+    Cola de cortes de fragmentos en segundo plano, un trabajo por pregunta.
+
+    Por defecto usa un solo hilo para no competir con el encoder de la
+    grabación en curso. Encolar dos veces la misma pregunta devuelve el
+    trabajo existente.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fragmentos")
+        self._lock = threading.Lock()
+        self._trabajos: Dict[int, Future] = {}
+        self._estados: Dict[int, str] = {}
+        self._cancelado = threading.Event()
+
+    def encolar(self, clave: int, funcion: Callable, *args) -> Future:
+        with self._lock:
+            if clave in self._trabajos:
+                return self._trabajos[clave]
+            self._estados[clave] = PENDIENTE
+            futuro = self._executor.submit(self._ejecutar, clave, funcion, *args)
+            self._trabajos[clave] = futuro
+            return futuro
+
+    def _ejecutar(self, clave, funcion, *args):
+        try:
+            resultado = funcion(*args)
+        except Exception as e:
+            self.marcar_estado(clave, ERROR)
+            logger.error(f"❌ Error en el corte del fragmento {clave}: {e}")
+            raise
+        self.marcar_estado(clave, LISTO)
+        return resultado
+
+    def marcar_estado(self, clave: int, estado: str):
+        with self._lock:
+            self._estados[clave] = estado
+
+    def contiene(self, clave: int) -> bool:
+        with self._lock:
+            return clave in self._trabajos
+
+    def estado(self) -> EstadoCola:
+        with self._lock:
+            estados = list(self._estados.values())
+        return EstadoCola(
+            pendientes=estados.count(PENDIENTE),
+            esperando=estados.count(ESPERANDO),
+            cortando=estados.count(CORTANDO),
+            listos=estados.count(LISTO),
+            errores=estados.count(ERROR),
+        )
+
+    def trabajos(self) -> List[Future]:
+        with self._lock:
+            return list(self._trabajos.values())
+
+    def esperar(self, timeout: Optional[float] = None,
+                on_estado: Optional[Callable[[EstadoCola], None]] = None) -> List[Future]:
+        """Espera a los trabajos aún en curso; `on_estado` recibe el estado tras cada trabajo terminado."""
+        futuros = self.trabajos()
+        pendientes = {f for f in futuros if not f.done()}
+        while pendientes:
+            hechos, pendientes = wait(pendientes, timeout=timeout, return_when="FIRST_COMPLETED")
+            if not hechos:
+                break  # timeout
+            if on_estado is not None:
+                on_estado(self.estado())
+        return futuros
+
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelado.is_set()
+
+    def cerrar(self, cancelar: bool = False):
+        """Cierra la cola; con `cancelar` se descartan los trabajos que aún no empezaron."""
+        if cancelar:
+            self._cancelado.set()
+            with self._lock:
+                for futuro in self._trabajos.values():
+                    futuro.cancel()
+        self._executor.shutdown(wait=not cancelar)
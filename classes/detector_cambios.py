@@ -0,0 +1,86 @@
+"""
+Detección de archivos nuevos, modificados o borrados por comparación de estado.
+
+`DetectorCambios` guarda (tamaño, mtime) de cada archivo que coincide con el
+patrón en una carpeta y sus subcarpetas directas (`data/resultados/<id>/`)
+y, en cada `escanear()`, devuelve solo las diferencias con el escaneo
+anterior. No depende de Qt: sirve como respaldo por sondeo cuando no hay
+notificaciones del sistema de archivos y se puede probar con carpetas
+temporales.
+"""
+
+import os
+import fnmatch
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+
+@dataclass
+class Cambios:
+    nuevos: List[Path] = field(default_factory=list)
+    modificados: List[Path] = field(default_factory=list)
+    eliminados: List[Path] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.nuevos or self.modificados or self.eliminados)
+
+    def entrevistas(self) -> Set[str]:
+        """Nombres de las subcarpetas afectadas (ids de entrevista)."""
+        return {ruta.parent.name for ruta in self.nuevos + self.modificados + self.eliminados}
+
+
+class DetectorCambios:
+    """Compara escaneos sucesivos de `directorio/*/<patron>` (y `directorio/<patron>`)."""
+
+    def __init__(self, directorio, patron: str = "*.json"):
+        self.directorio = Path(directorio)
+        self.patron = patron
+        self._estado: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def _archivos_en(self, carpeta: str, estado: Dict[str, Tuple[int, int]], subcarpetas: List[str]):
+        try:
+            entradas = os.scandir(carpeta)
+        except OSError:
+            return  # carpeta borrada durante el escaneo
+        with entradas:
+            for entrada in entradas:
+                try:
+                    if entrada.is_dir(follow_symlinks=False):
+                        subcarpetas.append(entrada.path)
+                    elif fnmatch.fnmatch(entrada.name, self.patron):
+                        stat = entrada.stat()
+                        estado[entrada.path] = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    continue
+
+    def _leer_estado(self) -> Dict[str, Tuple[int, int]]:
+        estado: Dict[str, Tuple[int, int]] = {}
+        subcarpetas: List[str] = []
+        self._archivos_en(str(self.directorio), estado, subcarpetas)
+        for carpeta in subcarpetas:
+            self._archivos_en(carpeta, estado, [])  # solo un nivel (se ignora p. ej. detalle/)
+        return estado
+
+    def inicializar(self):
+        """Toma el estado actual como referencia sin reportar cambios."""
+        estado = self._leer_estado()
+        with self._lock:
+            self._estado = estado
+
+    def escanear(self) -> Cambios:
+        """Diferencias con el escaneo anterior (o con `inicializar`)."""
+        actual = self._leer_estado()
+        with self._lock:
+            anterior, self._estado = self._estado, actual
+        cambios = Cambios()
+        for ruta, firma in actual.items():
+            previa = anterior.get(ruta)
+            if previa is None:
+                cambios.nuevos.append(Path(ruta))
+            elif previa != firma:
+                cambios.modificados.append(Path(ruta))
+        cambios.eliminados = [Path(ruta) for ruta in anterior if ruta not in actual]
+        return cambios
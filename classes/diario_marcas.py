@@ -0,0 +1,164 @@
+"""
+Persistencia de marcas con diario de escritura anticipada (write-ahead).
+
+Cada cambio se añade como una línea JSON a `marcas_<id>.journal.jsonl` en lugar
+de reescribir todo `marcas_<id>.json`. El JSON completo (snapshot) se regenera
+solo al compactar, con escritura atómica (archivo temporal + os.replace), y el
+estado se reconstruye como snapshot + eventos del diario posteriores a él.
+
+Los eventos son idempotentes (altas y cambios reemplazan la marca por
+pregunta_id), así que repetir el diario sobre un snapshot que ya los incluye
+no altera el resultado.
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SUFIJO_DIARIO = ".journal.jsonl"
+
+# Operaciones del diario
+AGREGAR = "agregar"
+ACTUALIZAR = "actualizar"
+ELIMINAR = "eliminar"
+
+
+def ruta_diario_para(ruta_snapshot) -> Path:
+    """marcas_X.json -> marcas_X.journal.jsonl"""
+    ruta_snapshot = Path(ruta_snapshot)
+    return ruta_snapshot.with_name(ruta_snapshot.stem + SUFIJO_DIARIO)
+
+
+def escribir_json_atomico(ruta, data, indent: Optional[int] = 2):
+    """Escribe JSON en un temporal del mismo directorio, hace fsync y lo renombra sobre `ruta`."""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(prefix=f".{ruta.name}.", suffix=".tmp", dir=str(ruta.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.unlink(temporal)
+        except OSError:
+            pass
+        raise
+
+
+def aplicar_evento(marcas: list, evento: dict) -> list:
+    """Aplica un evento del diario sobre la lista de marcas (dicts) y la devuelve."""
+    op = evento.get("op")
+    if op in (AGREGAR, ACTUALIZAR):
+        marca = evento["marca"]
+        marcas = [m for m in marcas if m.get("pregunta_id") != marca["pregunta_id"]]
+        marcas.append(marca)
+    elif op == ELIMINAR:
+        marcas = [m for m in marcas if m.get("pregunta_id") != evento["pregunta_id"]]
+    else:
+        logger.warning(f"Evento de marcas desconocido: {op}")
+    return marcas
+
+
+def cargar_marcas(ruta_snapshot) -> dict:
+    """
+    Estado actual de un archivo de marcas: snapshot más los eventos del diario.
+
+    Devuelve un dict con el formato de `marcas_<id>.json`. Una última línea
+    incompleta del diario (caída a mitad de escritura) se ignora.
+    """
+    ruta_snapshot = Path(ruta_snapshot)
+    data = {"marcas": []}
+    if ruta_snapshot.exists():
+        with open(ruta_snapshot, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+    ruta_diario = ruta_diario_para(ruta_snapshot)
+    if ruta_diario.exists():
+        marcas = list(data.get("marcas", []))
+        with open(ruta_diario, "r", encoding="utf-8") as f:
+            for numero, linea in enumerate(f, 1):
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    evento = json.loads(linea)
+                except json.JSONDecodeError:
+                    logger.warning(f"Línea {numero} del diario {ruta_diario.name} incompleta; se ignora")
+                    continue
+                marcas = aplicar_evento(marcas, evento)
+        data["marcas"] = sorted(marcas, key=lambda m: m.get("pregunta_id", 0))
+    return data
+
+
+class DiarioMarcas:
+    """
+    Diario de eventos de marcas con fsync por lotes.
+
+    Cada evento se escribe y se vuelca al sistema operativo de inmediato (no se
+    pierde si la aplicación se cierra); el fsync a disco se agrupa cada
+    `lote_fsync` eventos o `intervalo_fsync` segundos.
+    """
+
+    def __init__(self, ruta_snapshot, lote_fsync: int = 8, intervalo_fsync: float = 1.0,
+                 compactar_cada: int = 50):
+        self.ruta_snapshot = Path(ruta_snapshot)
+        self.ruta_diario = ruta_diario_para(self.ruta_snapshot)
+        self.lote_fsync = lote_fsync
+        self.intervalo_fsync = intervalo_fsync
+        self.compactar_cada = compactar_cada
+        self.eventos_sin_compactar = 0
+        self._sin_fsync = 0
+        self._ultimo_fsync = time.monotonic()
+        self._archivo = None
+
+    def _abrir(self):
+        if self._archivo is None or self._archivo.closed:
+            self.ruta_diario.parent.mkdir(parents=True, exist_ok=True)
+            self._archivo = open(self.ruta_diario, "a", encoding="utf-8")
+        return self._archivo
+
+    def registrar(self, op: str, **datos):
+        """Añade un evento al diario."""
+        archivo = self._abrir()
+        archivo.write(json.dumps({"op": op, "t": time.time(), **datos}, ensure_ascii=False) + "\n")
+        archivo.flush()
+        self.eventos_sin_compactar += 1
+        self._sin_fsync += 1
+        if (self._sin_fsync >= self.lote_fsync
+                or time.monotonic() - self._ultimo_fsync >= self.intervalo_fsync):
+            self.sincronizar()
+
+    def sincronizar(self):
+        """Fuerza el fsync de los eventos pendientes."""
+        if self._archivo is not None and not self._archivo.closed and self._sin_fsync:
+            os.fsync(self._archivo.fileno())
+        self._sin_fsync = 0
+        self._ultimo_fsync = time.monotonic()
+
+    def necesita_compactar(self) -> bool:
+        return self.eventos_sin_compactar >= self.compactar_cada
+
+    def compactar(self, data: dict):
+        """Escribe el snapshot completo de forma atómica y vacía el diario."""
+        escribir_json_atomico(self.ruta_snapshot, data)
+        # Si la aplicación cae aquí, el diario se vuelve a aplicar sobre un snapshot
+        # que ya lo contiene: los eventos son idempotentes.
+        self.cerrar()
+        if self.ruta_diario.exists():
+            self.ruta_diario.unlink()
+        self.eventos_sin_compactar = 0
+
+    def cerrar(self):
+        if self._archivo is not None and not self._archivo.closed:
+            self.sincronizar()
+            self._archivo.close()
+        self._archivo = None
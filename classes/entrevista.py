@@ -1,5 +1,9 @@
 import os
 import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 from pathlib import Path
 from classes.marcas import Marcas
@@ -7,9 +11,57 @@ from classes.marca import Marca
 from classes.fragmento import Fragmento 
 from classes.reporte_entrevista import ReporteEntrevista as Reporte
 from video_io.video import obtener_capturador, CapturadorVideo
+from video_io.indice_frames import EscritorIndiceFrames, IndiceFrames, ruta_indice_para
+from video_io.segmentos import IndiceSegmentos
+from classes.cola_fragmentos import ColaFragmentos, ESPERANDO, CORTANDO
+
+logger = logging.getLogger(__name__)
+
+# Duración de cada trozo en la grabación segmentada (segundos)
+DURACION_SEGMENTO = 30.0
+# Cada cuánto revisa un corte encolado si la grabación ya cubre su marca (segundos)
+INTERVALO_ESPERA_FUENTE = 1.0
+
+
+class TrabajoFinalizacion:
+    """
+    Handle de `Entrevista.finalizar_async`: envuelve el Future con el resumen y
+    expone el progreso (fracción 0-1 y mensaje) para consultarlo desde la UI.
+    """
+
+    def __init__(self, on_progreso=None):
+        self.futuro = None
+        self.fraccion = 0.0
+        self.mensaje = ""
+        self._on_progreso = on_progreso
+        self._lock = threading.Lock()
+
+    def actualizar(self, fraccion: float, mensaje: str):
+        with self._lock:
+            self.fraccion = fraccion
+            self.mensaje = mensaje
+        logger.info(f"Finalización {int(fraccion * 100)}%: {mensaje}")
+        if self._on_progreso is not None:
+            self._on_progreso(fraccion, mensaje)
+
+    def progreso(self):
+        """(fracción, mensaje) actuales."""
+        with self._lock:
+            return self.fraccion, self.mensaje
+
+    def done(self) -> bool:
+        return self.futuro is not None and self.futuro.done()
+
+    def result(self, timeout=None):
+        return self.futuro.result(timeout=timeout)
+
+    def exception(self, timeout=None):
+        return self.futuro.exception(timeout=timeout)
+
 
 class Entrevista:
-    def __init__(self, salida_dir="data", entrevista_num=1, entrevista_id=None):
+    def __init__(self, salida_dir="data", entrevista_num=1, entrevista_id=None, nombre_video=None,
+                 segmentado=False):
         if entrevista_id:
             self.id = entrevista_id
         else:
@@ -18,15 +70,30 @@ class Entrevista:
         self.inicio_wall = datetime.now().isoformat()
         self.esta_grabando = False
         self.tiempo_inicio = None
+        # Reloj monotónico común a marcas y frames grabados (no salta con cambios de hora)
+        self.reloj_inicio = None
+        self.captura = None
+        self.capturador_activo = False
+        self.indice_frames = None
+        self.deriva = None
+        self.estadisticas_captura = None
         self.capturador = obtener_capturador()
 
+        # Grabación por trozos: solo la soporta el capturador ffmpeg por stdin
+        self.segmentado = segmentado and hasattr(self.capturador, "duracion_segmento")
+        if segmentado and not self.segmentado:
+            logger.warning(f"{type(self.capturador).__name__} no soporta grabación segmentada; se grabará un único archivo")
+        if self.segmentado:
+            self.capturador.duracion_segmento = DURACION_SEGMENTO
+
         # Rutas
         salida_path = Path(salida_dir)
         if not salida_path.is_dir():
             raise ValueError(f"El directorio {salida_dir} no existe o no es válido")
         
-        self.video_original = salida_path / "videos_originales" / f"entrevista_{self.id}.mp4"
-        self.fragmentos_dir = salida_path / "fragmentos"
+        self.video_original = salida_path / "videos_originales" / (nombre_video or f"entrevista_{self.id}.mp4")
+        # Misma estructura que las pantallas de fragmentos y análisis: fragmentos/<id>/
+        self.fragmentos_dir = salida_path / "fragmentos" / self.id
         self.marcas_json = salida_path / "marcas" / f"marcas_{self.id}.json"
 
         # Crear carpetas
@@ -35,20 +102,30 @@ class Entrevista:
         self.marcas_json.parent.mkdir(parents=True, exist_ok=True)
 
         # Atributos POO
-        self.marcas = Marcas(self.id, self.video_original)  # Instancia de Marcas
+        self.marcas = Marcas(self.id, self.video_original, ruta_json=self.marcas_json)  # Instancia de Marcas
         self.fragmentos = []  # Lista de objetos Fragmento
+        # Cortes en segundo plano: cada pregunta cerrada se encola al instante
+        self.cola = ColaFragmentos()
+        self._trabajo_final = None
         self.reporte = Reporte(self.id)
         self.pregunta_actual_id = 0
 
         # Crear JSON inicial
         self.marcas.exportar_json(self.marcas_json)
 
-    def iniciar(self):
-        """Inicia la grabación de la entrevista y registra el tiempo de inicio."""
+    def iniciar(self, captura=None):
+        """Inicia la grabación de la entrevista y registra el tiempo de inicio.
+
+        captura: SistemaCaptura opcional que alimenta al capturador; en ese caso se
+            escribe junto al video un índice con el instante de captura de cada frame.
+        """
         if self.esta_grabando:
             raise RuntimeError("La entrevista ya está en curso")
         self.tiempo_inicio = datetime.now()
         self.esta_grabando = True
+        self.deriva = None
+        # Un índice de una grabación anterior con el mismo nombre ya no sería válido
+        ruta_indice_para(self.video_original).unlink(missing_ok=True)
         try:
             self.capturador.iniciar_grabacion(
                 ruta_archivo=str(self.video_original),
@@ -56,26 +133,167 @@ class Entrevista:
                 codec='H.264',
                 audio='AAC'
             )
+            self.capturador_activo = True
+            self.reloj_inicio = time.monotonic()
+            if captura is not None:
+                if self.capturador.recibe_frames:
+                    self.indice_frames = EscritorIndiceFrames(ruta_indice_para(self.video_original), captura.fps)
+                captura.iniciar_grabacion(self.capturador, indice=self.indice_frames, inicio=self.reloj_inicio)
+                self.captura = captura
         except Exception as e:
             self.esta_grabando = False
+            self._cerrar_indice()
+            if self.capturador_activo:
+                self.capturador.detener_grabacion()
+                self.capturador_activo = False
             raise RuntimeError(f"Error al iniciar grabación: {str(e)}")
         self.marcas.exportar_json(self.marcas_json)
 
+    def tiempo_relativo(self) -> float:
+        """Segundos transcurridos desde el inicio de la grabación (reloj monotónico)."""
+        if self.reloj_inicio is None:
+            raise RuntimeError("La entrevista no está en curso")
+        return time.monotonic() - self.reloj_inicio
+
+    def detener_grabacion(self):
+        """Detiene captura y capturador, cierra el índice de frames y calcula la deriva.
+
+        Puede llamarse antes de finalizar(); las llamadas repetidas no tienen efecto.
+        """
+        if self.captura is not None:
+            if self.captura.grabando:
+                self.estadisticas_captura = self.captura.detener_grabacion()
+            self.captura = None
+        if self.capturador_activo:
+            self.capturador.detener_grabacion()
+            # El índice se cierra antes de liberar los cortes que esperan el final de la grabación
+            self._cerrar_indice()
+            self.capturador_activo = False
+            indice = IndiceFrames.cargar_para_video(self.video_original)
+            if indice is not None:
+                self.deriva = indice.estadisticas_deriva()
+                logger.info(f"Deriva de grabación {self.id}: {self.deriva}")
+        return self.deriva
+
+    def _cerrar_indice(self):
+        if self.indice_frames is not None:
+            self.indice_frames.cerrar()
+            self.indice_frames = None
+
+    def segmentos(self):
+        """IndiceSegmentos de la grabación en curso o terminada (None si no es segmentada)."""
+        if not self.segmentado:
+            return None
+        return IndiceSegmentos.para_video(self.video_original)
+
+    def generar_fragmentos_disponibles(self):
+        """Encola el corte de todas las preguntas cerradas que aún no lo tienen."""
+        return [self.encolar_fragmento(m) for m in self.marcas.marcas if m.fin is not None]
+
+    def encolar_fragmento(self, marca: Marca):
+        """Encola el corte de una pregunta cerrada; devuelve un Future con el Fragmento."""
+        return self.cola.encolar(marca.pregunta_id, self._trabajo_fragmento, marca)
+
+    def generar_video_completo(self, on_progreso=None):
+        """Une los segmentos en el .mp4 clásico de la entrevista (bajo demanda)."""
+        segmentos = self.segmentos()
+        if segmentos is None:
+            raise RuntimeError("La entrevista no se grabó en modo segmentado")
+        return segmentos.concatenar(self.video_original, on_progreso=on_progreso)
+
+    def _fuente_disponible(self, marca: Marca):
+        """(indice, segmentos) si ya se puede cortar la marca; None si hay que esperar."""
+        grabando = self.capturador_activo
+        indice = IndiceFrames.cargar_para_video(self.video_original)
+        segmentos = self.segmentos()
+        if not grabando:
+            return indice, segmentos
+        if segmentos is None:
+            return None  # el .mp4 monolítico no es legible hasta cerrarlo
+        if indice is not None and (len(indice) == 0 or indice.capturas[-1] < marca.fin):
+            return None  # el índice aún no llega al final de la marca
+        inicio, fin = indice.rango_pts(marca.inicio, marca.fin) if indice is not None else (marca.inicio, marca.fin)
+        return (indice, segmentos) if segmentos.cubre(inicio, fin) else None
+
+    def _trabajo_fragmento(self, marca: Marca):
+        self.cola.marcar_estado(marca.pregunta_id, ESPERANDO)
+        fuente = self._fuente_disponible(marca)
+        while fuente is None:
+            if self.cola.cancelado:
+                raise RuntimeError(f"Corte de la pregunta {marca.pregunta_id} cancelado")
+            time.sleep(INTERVALO_ESPERA_FUENTE)
+            fuente = self._fuente_disponible(marca)
+        indice, segmentos = fuente
+
+        self.cola.marcar_estado(marca.pregunta_id, CORTANDO)
+        fragmento = Fragmento(marca, self.fragmentos_dir)
+        fragmento.generar_fragmento(self.video_original, indice=indice, segmentos=segmentos)
+        self.agregar_fragmento(fragmento)
+        return fragmento
+
     def finalizar(self):
+        """Versión bloqueante de finalizar_async; devuelve el resumen del reporte."""
+        return self.finalizar_async().result()
+
+    def finalizar_async(self, on_progreso=None) -> TrabajoFinalizacion:
+        """
+        Finaliza la entrevista en un pool de hilos y devuelve de inmediato un
+        TrabajoFinalizacion. Tras detener la grabación, los cortes pendientes, la
+        exportación del reporte y (en modo segmentado) la unión del video corren
+        en paralelo.
+
+        on_progreso: callback opcional (fraccion, mensaje); se llama desde hilos de trabajo.
+        """
+        if self._trabajo_final is not None:
+            return self._trabajo_final
         if not self.esta_grabando:
             raise RuntimeError("No hay una entrevista en curso")
+        pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="finalizar")
+        trabajo = TrabajoFinalizacion(on_progreso)
+        trabajo.futuro = pool.submit(self._finalizar, pool, trabajo)
+        self._trabajo_final = trabajo
+        return trabajo
+
+    def _finalizar(self, pool, trabajo: TrabajoFinalizacion):
         try:
-            self.capturador.detener_grabacion()
-            for marca in self.marcas.marcas:
-                if marca.fin is not None:
-                    fragmento = Fragmento(marca, self.fragmentos_dir)
-                    fragmento.generar_fragmento(self.video_original)
-                    self.agregar_fragmento(fragmento)
-                    # Agregar datos al reporte
-                    self.reporte.agregar_pregunta(marca.pregunta_id, marca.inicio, marca.fin, marca.nota)
+            trabajo.actualizar(0.0, "Deteniendo grabación")
+            self.detener_grabacion()
+            # Preguntas cerradas fuera de marcar_fin_pregunta (p. ej. importadas)
+            self.generar_fragmentos_disponibles()
+
+            tareas = {pool.submit(self._exportar_reporte): "reporte"}
+            if self.segmentos() is not None:
+                tareas[pool.submit(self.generar_video_completo)] = "video completo"
+            for futuro in self.cola.trabajos():
+                tareas[futuro] = "fragmento"
+
+            total = len(tareas)
+            pendientes = {f for f in tareas if not f.done()}
+            hechos = total - len(pendientes)
+            trabajo.actualizar(hechos / total, self.cola.estado().describir())
+            while pendientes:
+                terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                hechos += len(terminados)
+                trabajo.actualizar(hechos / total, self.cola.estado().describir())
+
+            # exception() lanza CancelledError en un futuro cancelado: se revisa antes
+            errores = [f"{tareas[f]}: cancelado" if f.cancelled() else f"{tareas[f]}: {f.exception()}"
+                       for f in tareas if f.cancelled() or f.exception() is not None]
+            if errores:
+                raise RuntimeError(f"Error al finalizar la entrevista: {'; '.join(errores)}")
+            resumen = next(f.result() for f in tareas if tareas[f] == "reporte")
+            trabajo.actualizar(1.0, "Entrevista finalizada")
+            return resumen
         finally:
             self.esta_grabando = False
             self.marcas.exportar_json(self.marcas_json)
+            pool.shutdown(wait=False)
+
+    def _exportar_reporte(self):
+        for marca in self.marcas.marcas:
+            if marca.fin is not None:
+                # Agregar datos al reporte
+                self.reporte.agregar_pregunta(marca.pregunta_id, marca.inicio, marca.fin, marca.nota)
         resumen = self.reporte.generar_resumen()
         self.reporte.exportar_json(self.marcas_json.with_name(f"reporte_{self.id}.json"))
         return resumen
@@ -86,7 +304,7 @@ class Entrevista:
         if not self.esta_grabando:
             raise RuntimeError("La entrevista no está en curso")
         self.pregunta_actual_id += 1
-        tiempo_actual = (datetime.now() - self.tiempo_inicio).total_seconds()
+        tiempo_actual = self.tiempo_relativo()
         marca = Marca(entrevista_id=self.id, pregunta_id=self.pregunta_actual_id, inicio=tiempo_actual)
         self.marcas.agregar_marca(marca)
         return self.pregunta_actual_id
@@ -100,9 +318,9 @@ class Entrevista:
             raise ValueError(f"No se encontró una marca con pregunta_id {pregunta_id}")
         if marca.fin is not None:
             raise ValueError(f"La marca con pregunta_id {pregunta_id} ya está cerrada")
-        marca.fin = (datetime.now() - self.tiempo_inicio).total_seconds()
-        marca.nota = nota
-        self.marcas.exportar_json(self.marcas_json)
+        # Se anota en el diario de marcas; el JSON completo se reescribe al compactar
+        self.marcas.cerrar_marca(pregunta_id, self.tiempo_relativo(), nota)
+        self.encolar_fragmento(marca)
 
     def agregar_fragmento(self, fragmento: Fragmento):
         """Añade un fragmento a la entrevista."""
@@ -130,5 +348,6 @@ class Entrevista:
             "numero_preguntas": len([m for m in self.marcas.marcas if m.fin is not None]),
             "video_original": str(self.video_original),
             "marcas_json": str(self.marcas_json),
-            "entrevista_id": self.id
+            "entrevista_id": self.id,
+            "deriva": self.deriva
         }
\ No newline at end of file
@@ -1,8 +1,19 @@
 import subprocess
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 from classes.marca import Marca
+from video_io.ffmpeg import ejecutar_ffmpeg
+
+
+# Perfiles de proxy: (altura en píxeles, fps). El ancho se ajusta a la relación de aspecto.
+PERFILES_PROXY = {
+    '480p': (480, 15),
+    '360p': (360, 15),
+}
+
+# Subcarpeta (junto a los masters) donde se guardan las versiones proxy
+CARPETA_PROXY = "proxy"
 
 
 class Fragmento:
@@ -18,25 +29,86 @@ class Fragmento:
         self.marca = marca
         self.entrevista_id = marca.entrevista_id  # Heredado de la marca
         self.ruta_fragmento = fragmentos_dir / f"fragmento_{marca.entrevista_id}_{marca.pregunta_id:03d}.mp4"
+        self.ruta_proxy = self.ruta_proxy_de(self.ruta_fragmento)
         self.duracion = self.marca.fin - self.marca.inicio
         self.generado = False
 
-    def generar_fragmento(self, video_original: Path):
-        """Corta un fragmento del video original usando FFmpeg con precisión de fotogramas."""
-        if not video_original.exists():
+    @staticmethod
+    def ruta_proxy_de(ruta_fragmento) -> Path:
+        """Ruta del proxy asociado a un fragmento master (exista o no)."""
+        ruta_fragmento = Path(ruta_fragmento)
+        return ruta_fragmento.parent / CARPETA_PROXY / ruta_fragmento.name
+
+    @staticmethod
+    def ruta_lectura(ruta_fragmento) -> Path:
+        """Ruta a decodificar para previsualización/análisis: el proxy si existe, si no el master."""
+        proxy = Fragmento.ruta_proxy_de(ruta_fragmento)
+        return proxy if proxy.exists() else Path(ruta_fragmento)
+
+    def generar_fragmento(self, video_original: Path, on_progreso: Optional[Callable[[float], None]] = None,
+                          proxy: Optional[str] = None, indice=None, segmentos=None):
+        """Corta un fragmento del video original usando FFmpeg con precisión de fotogramas.
+
+        on_progreso: callback opcional que recibe los segundos del fragmento ya escritos.
+        proxy: clave de PERFILES_PROXY ('480p', '360p') para producir además una versión
+            reducida en la misma pasada de ffmpeg (se decodifica una sola vez).
+        indice: IndiceFrames del video original; si se da, los tiempos de la marca se
+            traducen a los PTS de los frames capturados en esos instantes.
+        segmentos: IndiceSegmentos de una grabación segmentada; se corta directamente
+            de los segmentos que cubren la marca, sin necesitar el .mp4 completo.
+        """
+        if segmentos is None and not video_original.exists():
             raise FileNotFoundError(f"Video original no encontrado: {video_original}")
         if self.generado:
             raise RuntimeError(f"El fragmento {self.ruta_fragmento} ya fue generado")
         if self.marca.inicio >= self.marca.fin:
             raise ValueError("El tiempo de inicio debe ser menor que el tiempo de fin")
+        if proxy is not None and proxy not in PERFILES_PROXY:
+            raise ValueError(f"Perfil de proxy {proxy} no soportado")
 
         self.ruta_fragmento.parent.mkdir(parents=True, exist_ok=True)
 
-        comando = [
-            'ffmpeg',
-            '-ss', str(self.marca.inicio),   # búsqueda antes de -i (más preciso)
-            '-i', str(video_original),
-            '-t', str(self.duracion),
+        inicio, duracion = self.marca.inicio, self.duracion
+        if indice is not None and len(indice) > 0:
+            pts_inicio, pts_fin = indice.rango_pts(self.marca.inicio, self.marca.fin)
+            if pts_fin > pts_inicio:
+                inicio, duracion = pts_inicio, pts_fin - pts_inicio
+                self.logger.debug(f"Marca {self.marca.inicio:.3f}-{self.marca.fin:.3f}s -> "
+                                  f"PTS {pts_inicio:.3f}-{pts_fin:.3f}s")
+
+        if segmentos is not None:
+            lista, desplazamiento = segmentos.preparar_corte(
+                inicio, inicio + duracion,
+                destino_lista=segmentos.directorio / f"corte_{self.ruta_fragmento.stem}.txt",
+            )
+            comando = [
+                'ffmpeg',
+                '-f', 'concat', '-safe', '0',
+                '-ss', f"{desplazamiento:.6f}",
+                '-i', str(lista),
+            ]
+        else:
+            comando = [
+                'ffmpeg',
+                '-ss', f"{inicio:.6f}",   # búsqueda antes de -i (más preciso)
+                '-i', str(video_original),
+            ]
+
+        if proxy is None:
+            comando += ['-t', f"{duracion:.6f}"]
+            # Un proxy de una generación anterior ya no correspondería al nuevo master
+            if self.ruta_proxy.exists():
+                self.ruta_proxy.unlink()
+        else:
+            # Un solo decode: el video se divide en master y proxy escalado/decimado
+            altura, fps = PERFILES_PROXY[proxy]
+            comando += [
+                '-filter_complex', f"[0:v]split=2[master][p];[p]scale=-2:{altura},fps={fps}[proxy]",
+                '-map', '[master]', '-map', '0:a?',
+                '-t', f"{duracion:.6f}",
+            ]
+
+        comando += [
             '-c:v', 'libx264',              # reencodear video para evitar frames negros
             '-preset', 'ultrafast',         # reencode rápido
             '-c:a', 'aac',                  # reencode audio
@@ -46,13 +118,28 @@ class Fragmento:
             str(self.ruta_fragmento)
         ]
 
+        if proxy is not None:
+            self.ruta_proxy.parent.mkdir(parents=True, exist_ok=True)
+            comando += [
+                '-map', '[proxy]', '-map', '0:a?',
+                '-t', f"{duracion:.6f}",
+                '-c:v', 'libx264',
+                '-preset', 'ultrafast',
+                '-crf', '28',
+                '-c:a', 'aac',
+                '-b:a', '64k',
+                '-movflags', '+faststart',
+                '-y',
+                str(self.ruta_proxy)
+            ]
+
         try:
             self.logger.info(f"Iniciando generación de fragmento: {self.ruta_fragmento.name}")
-            result = subprocess.run(
-                comando, check=True, capture_output=True, text=True
-            )
+            ejecutar_ffmpeg(comando, on_progreso=on_progreso)
             self.generado = True
             self.logger.info(f"✅ Fragmento generado correctamente: {self.ruta_fragmento}")
+            if proxy is not None:
+                self.logger.info(f"✅ Proxy {proxy} generado: {self.ruta_proxy}")
         except subprocess.CalledProcessError as e:
             error_output = e.stderr or e.stdout
             self.logger.error(f"❌ Error al generar fragmento ({self.ruta_fragmento.name}): {error_output}")
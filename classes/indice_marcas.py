@@ -0,0 +1,72 @@
+from bisect import bisect_left, bisect_right
+from typing import Hashable, List, Optional
+
+import numpy as np
+
+
+class IndiceIntervalos:
+    """
+    Intervalos semiabiertos [inicio, fin) sin solapamiento, ordenados por inicio.
+
+    Como no se solapan, los fines quedan también ordenados: basta una búsqueda
+    binaria para comprobar solapamientos o saber qué intervalo contiene un
+    instante, y `np.searchsorted` para etiquetar muchos instantes a la vez.
+    """
+
+    def __init__(self):
+        self._inicios: List[float] = []
+        self._fines: List[float] = []
+        self._claves: List[Hashable] = []
+        self._arrays = None  # (inicios, fines, claves) como arrays, se invalida al modificar
+
+    def __len__(self):
+        return len(self._inicios)
+
+    def insertar(self, inicio: float, fin: float, clave: Hashable):
+        if fin <= inicio:
+            raise ValueError("El fin del intervalo debe ser mayor que el inicio")
+        existente = self.solapa(inicio, fin)
+        if existente is not None:
+            raise ValueError(f"El intervalo {inicio}-{fin} se solapa con {existente}")
+        posicion = bisect_left(self._inicios, inicio)
+        self._inicios.insert(posicion, inicio)
+        self._fines.insert(posicion, fin)
+        self._claves.insert(posicion, clave)
+        self._arrays = None
+
+    def eliminar(self, clave: Hashable) -> bool:
+        try:
+            posicion = self._claves.index(clave)
+        except ValueError:
+            return False
+        del self._inicios[posicion], self._fines[posicion], self._claves[posicion]
+        self._arrays = None
+        return True
+
+    def solapa(self, inicio: float, fin: float) -> Optional[Hashable]:
+        """Clave de un intervalo que se solapa con [inicio, fin), o None. O(log n)."""
+        # Último intervalo que empieza antes de `fin`: es el único candidato posible
+        posicion = bisect_left(self._inicios, fin) - 1
+        if posicion >= 0 and self._fines[posicion] > inicio:
+            return self._claves[posicion]
+        return None
+
+    def buscar(self, t: float) -> Optional[Hashable]:
+        """Clave del intervalo que contiene el instante `t`, o None. O(log n)."""
+        posicion = bisect_right(self._inicios, t) - 1
+        if posicion >= 0 and t < self._fines[posicion]:
+            return self._claves[posicion]
+        return None
+
+    def etiquetar(self, tiempos, sin_etiqueta=0) -> np.ndarray:
+        """Para cada instante del array devuelve la clave de su intervalo (o `sin_etiqueta`)."""
+        tiempos = np.asarray(tiempos, dtype=np.float64)
+        if not self._inicios:
+            return np.full(tiempos.shape, sin_etiqueta)
+        if self._arrays is None:
+            self._arrays = (np.asarray(self._inicios), np.asarray(self._fines), np.asarray(self._claves))
+        inicios, fines, claves = self._arrays
+        posiciones = np.searchsorted(inicios, tiempos, side="right") - 1
+        seguras = np.clip(posiciones, 0, None)
+        dentro = (posiciones >= 0) & (tiempos < fines[seguras])
+        return np.where(dentro, claves[seguras], sin_etiqueta)
@@ -0,0 +1,262 @@
+"""
+Líneas de tiempo de emociones por frame con pirámide de resoluciones.
+
+El nivel 0 son los datos originales (tiempo de cada frame analizado e
+intensidad de cada emoción). Cada nivel siguiente agrupa `FACTOR` cubetas
+del anterior y guarda mínimo, máximo y media por emoción, así los picos no
+desaparecen al alejar el zoom. Se construyen niveles hasta que el más
+grueso tiene como mucho `PUNTOS_MINIMOS` cubetas.
+
+La pirámide se guarda junto al detalle del resultado
+(`detalle/resultados_<fragmento>.timeline.npz`). `LineaTiempo.ventana`
+elige el nivel más fino que cabe en los píxeles disponibles, de modo que
+dibujar cualquier tramo cuesta lo mismo sin importar su duración.
+"""
+
+import os
+import logging
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from classes.catalogo_resultados import EMOCIONES
+from classes.resultados_analisis import leer_detalle, leer_resumen, ruta_detalle_para
+
+logger = logging.getLogger(__name__)
+
+# Súbase al cambiar el formato del archivo: las pirámides viejas se reconstruyen
+VERSION_LINEA_TIEMPO = 1
+SUFIJO_LINEA_TIEMPO = ".timeline.npz"
+FACTOR = 4
+PUNTOS_MINIMOS = 256
+# Para resultados antiguos sin tiempos ni duración conocida
+FPS_SUPUESTO = 30.0
+
+
+def ruta_linea_tiempo_para(ruta_resumen) -> Path:
+    """data/resultados/X/resultados_Y.json -> data/resultados/X/detalle/resultados_Y.timeline.npz"""
+    detalle = ruta_detalle_para(ruta_resumen)
+    return detalle.with_name(detalle.stem + SUFIJO_LINEA_TIEMPO)
+
+
+@dataclass
+class Nivel:
+    tiempos: np.ndarray   # inicio de cada cubeta (s)
+    minimo: np.ndarray    # (cubetas, emociones)
+    maximo: np.ndarray
+    media: np.ndarray
+    conteo: np.ndarray    # frames originales por cubeta
+
+
+def matriz_intensidades(detalle: Sequence[dict], emociones: Sequence[str] = EMOCIONES) -> np.ndarray:
+    """Lista de dicts por frame -> matriz (frames, emociones) float32."""
+    return np.array([[frame.get(emo, 0.0) for emo in emociones] for frame in detalle],
+                    dtype=np.float32).reshape(len(detalle), len(emociones))
+
+
+def construir_piramide(tiempos, valores, factor: int = FACTOR,
+                       puntos_minimos: int = PUNTOS_MINIMOS) -> List[Nivel]:
+    """Niveles de la pirámide, del original (0) al más grueso."""
+    tiempos = np.asarray(tiempos, dtype=np.float64)
+    valores = np.asarray(valores, dtype=np.float32)
+    if len(tiempos) != len(valores):
+        raise ValueError("tiempos y valores deben tener la misma cantidad de frames")
+
+    niveles = [Nivel(tiempos, valores, valores, valores, np.ones(len(tiempos), dtype=np.int32))]
+    while len(niveles[-1].tiempos) > puntos_minimos:
+        previo = niveles[-1]
+        inicios = np.arange(0, len(previo.tiempos), factor)
+        conteo = np.add.reduceat(previo.conteo, inicios)
+        suma = np.add.reduceat(previo.media * previo.conteo[:, None], inicios, axis=0)
+        niveles.append(Nivel(
+            tiempos=previo.tiempos[inicios],
+            minimo=np.minimum.reduceat(previo.minimo, inicios, axis=0),
+            maximo=np.maximum.reduceat(previo.maximo, inicios, axis=0),
+            media=(suma / conteo[:, None]).astype(np.float32),
+            conteo=conteo,
+        ))
+    return niveles
+
+
+class LineaTiempo:
+    """Pirámide de un fragmento, opcionalmente desplazada (segundos en el video original)."""
+
+    def __init__(self, niveles: List[Nivel], emociones: Sequence[str] = EMOCIONES, desplazamiento: float = 0.0):
+        self.niveles = niveles
+        self.emociones = list(emociones)
+        self.desplazamiento = desplazamiento
+
+    @property
+    def vacia(self) -> bool:
+        return len(self.niveles[0].tiempos) == 0
+
+    @property
+    def inicio(self) -> float:
+        return self.desplazamiento + (float(self.niveles[0].tiempos[0]) if not self.vacia else 0.0)
+
+    @property
+    def fin(self) -> float:
+        return self.desplazamiento + (float(self.niveles[0].tiempos[-1]) if not self.vacia else 0.0)
+
+    def ventana(self, t0: float, t1: float, max_puntos: int) -> Tuple[np.ndarray, ...]:
+        """
+        (tiempos, mínimo, máximo, media) del tramo [t0, t1] con como mucho
+        `max_puntos` cubetas (más una a cada lado para que la línea llegue al borde).
+        """
+        t0, t1 = t0 - self.desplazamiento, t1 - self.desplazamiento
+        for nivel in self.niveles:
+            desde = max(int(np.searchsorted(nivel.tiempos, t0, side="right")) - 1, 0)
+            hasta = min(int(np.searchsorted(nivel.tiempos, t1, side="left")) + 1, len(nivel.tiempos))
+            if hasta - desde <= max_puntos or nivel is self.niveles[-1]:
+                tramo = slice(desde, hasta)
+                return (nivel.tiempos[tramo] + self.desplazamiento, nivel.minimo[tramo],
+                        nivel.maximo[tramo], nivel.media[tramo])
+        raise AssertionError("sin niveles")  # construir_piramide siempre devuelve el nivel 0
+
+
+class LineaTiempoEntrevista:
+    """Varias líneas de tiempo (una por fragmento) consultadas como una sola."""
+
+    def __init__(self, partes: List[LineaTiempo]):
+        self.partes = sorted((p for p in partes if not p.vacia), key=lambda p: p.inicio)
+        self.emociones = self.partes[0].emociones if self.partes else list(EMOCIONES)
+
+    @property
+    def vacia(self) -> bool:
+        return not self.partes
+
+    @property
+    def inicio(self) -> float:
+        return self.partes[0].inicio if self.partes else 0.0
+
+    @property
+    def fin(self) -> float:
+        return max(p.fin for p in self.partes) if self.partes else 0.0
+
+    def ventana(self, t0: float, t1: float, max_puntos: int) -> Tuple[np.ndarray, ...]:
+        """Como `LineaTiempo.ventana`; un NaN entre fragmentos corta la línea en los huecos."""
+        duracion = max(t1 - t0, 1e-9)
+        trozos = []
+        for parte in self.partes:
+            solape = min(t1, parte.fin) - max(t0, parte.inicio)
+            if solape < 0:
+                continue
+            puntos = max(int(max_puntos * solape / duracion), 2)
+            tramo = parte.ventana(t0, t1, puntos)
+            if trozos:
+                separador = np.full((1, len(self.emociones)), np.nan, dtype=np.float32)
+                trozos.append((np.array([tramo[0][0]]), separador, separador, separador))
+            trozos.append(tramo)
+        if not trozos:
+            vacio = np.zeros((0, len(self.emociones)), dtype=np.float32)
+            return np.zeros(0), vacio, vacio, vacio
+        return tuple(np.concatenate([t[i] for t in trozos]) for i in range(4))
+
+
+# ----------------------------------------------------------------------
+# Persistencia
+# ----------------------------------------------------------------------
+def _escribir_piramide(ruta: Path, niveles: List[Nivel]):
+    arrays = {
+        "version": np.array(VERSION_LINEA_TIEMPO),
+        "emociones": np.array(EMOCIONES),
+        "niveles": np.array(len(niveles)),
+    }
+    for k, nivel in enumerate(niveles):
+        arrays[f"tiempos_{k}"] = nivel.tiempos
+        arrays[f"media_{k}"] = nivel.media
+        if k:  # en el nivel 0 mínimo, máximo y media son el mismo dato
+            arrays[f"minimo_{k}"] = nivel.minimo
+            arrays[f"maximo_{k}"] = nivel.maximo
+            arrays[f"conteo_{k}"] = nivel.conteo
+
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(prefix=f".{ruta.name}.", suffix=".tmp", dir=str(ruta.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.unlink(temporal)
+        except OSError:
+            pass
+        raise
+
+
+def guardar_linea_tiempo(ruta_resumen, tiempos, detalle: Sequence[dict]) -> Path:
+    """
+    Construye la pirámide de un resultado y la escribe (atómicamente) junto a
+    su detalle. Llamar después de `guardar_resultado`: una pirámide más
+    vieja que el detalle se considera desactualizada.
+    """
+    return guardar_linea_tiempo_matriz(ruta_resumen, tiempos, matriz_intensidades(detalle))
+
+
+def guardar_linea_tiempo_matriz(ruta_resumen, tiempos, valores) -> Path:
+    """Como `guardar_linea_tiempo` con las intensidades ya en una matriz (frames, EMOCIONES)."""
+    ruta = ruta_linea_tiempo_para(ruta_resumen)
+    _escribir_piramide(ruta, construir_piramide(tiempos, valores))
+    return ruta
+
+
+def cargar_linea_tiempo(ruta_npz, desplazamiento: float = 0.0) -> Optional[LineaTiempo]:
+    """Pirámide guardada, o None si no existe o es de otra versión."""
+    try:
+        with np.load(str(ruta_npz), allow_pickle=False) as datos:
+            if int(datos["version"]) != VERSION_LINEA_TIEMPO:
+                return None
+            niveles = []
+            for k in range(int(datos["niveles"])):
+                media = datos[f"media_{k}"]
+                if k == 0:
+                    niveles.append(Nivel(datos["tiempos_0"], media, media, media,
+                                         np.ones(len(media), dtype=np.int32)))
+                else:
+                    niveles.append(Nivel(datos[f"tiempos_{k}"], datos[f"minimo_{k}"], datos[f"maximo_{k}"],
+                                         media, datos[f"conteo_{k}"]))
+            return LineaTiempo(niveles, [str(e) for e in datos["emociones"]], desplazamiento)
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning(f"Línea de tiempo ilegible {ruta_npz}: {e}")
+        return None
+
+
+def _tiempos_estimados(resumen: dict, frames: int) -> np.ndarray:
+    """Resultados sin tiempos: frames repartidos en la duración del fragmento."""
+    duracion = None
+    ruta_video = resumen.get("fragmento", {}).get("ruta")
+    if ruta_video and Path(ruta_video).exists():
+        from video_io.metadatos import servicio_metadatos
+        duracion = servicio_metadatos().duracion(ruta_video)
+    if not duracion:
+        duracion = frames / FPS_SUPUESTO
+    return np.linspace(0.0, duracion, frames, endpoint=False)
+
+
+def obtener_linea_tiempo(ruta_resumen, desplazamiento: float = 0.0) -> LineaTiempo:
+    """
+    Línea de tiempo de un resultado: la pirámide guardada si está al día, si
+    no se construye desde el detalle (y se guarda para la próxima vez).
+    """
+    ruta_resumen = Path(ruta_resumen)
+    ruta_npz = ruta_linea_tiempo_para(ruta_resumen)
+    try:
+        al_dia = ruta_npz.stat().st_mtime >= ruta_detalle_para(ruta_resumen).stat().st_mtime
+    except OSError:
+        al_dia = ruta_npz.exists()  # formato antiguo sin archivo de detalle
+    if al_dia:
+        linea = cargar_linea_tiempo(ruta_npz, desplazamiento)
+        if linea is not None:
+            return linea
+
+    resumen = leer_resumen(ruta_resumen)
+    detalle = leer_detalle(ruta_resumen, resumen)
+    niveles = construir_piramide(_tiempos_estimados(resumen, len(detalle)), matriz_intensidades(detalle))
+    try:
+        _escribir_piramide(ruta_npz, niveles)
+    except OSError as e:
+        logger.warning(f"No se pudo guardar la línea de tiempo de {ruta_resumen.name}: {e}")
+    return LineaTiempo(niveles, EMOCIONES, desplazamiento)
@@ -1,13 +1,36 @@
-import json
+import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 from classes.marca import Marca
+from classes.indice_marcas import IndiceIntervalos
+from classes.diario_marcas import (
+    DiarioMarcas, cargar_marcas, escribir_json_atomico, AGREGAR, ACTUALIZAR, ELIMINAR
+)
+
+logger = logging.getLogger(__name__)
 
 class Marcas:
-    def __init__(self, entrevista_id: str, archivo_video: Path):
+    def __init__(self, entrevista_id: str, archivo_video: Path, ruta_json: Optional[Path] = None):
         self.entrevista_id = entrevista_id
         self.archivo_video = archivo_video
-        self.marcas: List[Marca] = []
+        self._marcas: List[Marca] = []
+        # Snapshot JSON de las marcas; los cambios se anotan en su diario (ver DiarioMarcas)
+        self.ruta_json = Path(ruta_json) if ruta_json else Path(f"data/marcas/marcas_{entrevista_id}.json")
+        self._diario = None
+        # Índices: por pregunta_id y por intervalo de tiempo (solo marcas cerradas)
+        self._por_id: Dict[int, Marca] = {}
+        self._intervalos = IndiceIntervalos()
+        # Se apaga al reemplazar la lista `marcas`; `_indexar` reconstruye los índices
+        self._indices_vigentes = True
+
+    @property
+    def marcas(self) -> List[Marca]:
+        return self._marcas
+
+    @marcas.setter
+    def marcas(self, marcas: List[Marca]):
+        self._marcas = marcas
+        self._indices_vigentes = False
 
     def agregar_marca(self, marca: Marca):
         """Añade una marca, validando que no se solape y que pertenezca a la entrevista."""
@@ -15,49 +38,87 @@ class Marcas:
             raise TypeError("El parámetro 'marca' debe ser una instancia de Marca")
         if marca.entrevista_id != self.entrevista_id:
             raise ValueError(f"La marca tiene entrevista_id {marca.entrevista_id}, pero se esperaba {self.entrevista_id}")
+        if self.buscar_marcas_por_pregunta_id(marca.pregunta_id) is not None:
+            raise ValueError(f"Ya existe una marca con pregunta_id {marca.pregunta_id}")
         if self._existe_solapamiento(marca):
             raise ValueError(f"La marca con pregunta_id {marca.pregunta_id} se solapa con otra existente")
         self.marcas.append(marca)
-        self._guardar_marcas_json()
+        self._agregar_a_indices(marca)
+        self._registrar(AGREGAR, marca=self._marca_a_dict(marca))
 
     def eliminar_marca(self, pregunta_id: int):
         """Elimina una marca por su pregunta_id."""
         self.marcas = [m for m in self.marcas if m.pregunta_id != pregunta_id]
-        self._guardar_marcas_json()
+        self._reindexar()
+        self._registrar(ELIMINAR, pregunta_id=pregunta_id)
+
+    def cerrar_marca(self, pregunta_id: int, fin: float, nota: Optional[str] = None) -> Marca:
+        """Fija el fin (y opcionalmente la nota) de una marca abierta."""
+        marca = self.buscar_marcas_por_pregunta_id(pregunta_id)
+        if marca is None:
+            raise ValueError(f"No se encontró una marca con pregunta_id {pregunta_id}")
+        if fin <= marca.inicio:
+            raise ValueError("El tiempo de fin debe ser mayor que el inicio")
+        if marca.fin is not None:
+            self._intervalos.eliminar(pregunta_id)
+        try:
+            self._intervalos.insertar(marca.inicio, fin, pregunta_id)
+        except ValueError:
+            if marca.fin is not None:
+                self._intervalos.insertar(marca.inicio, marca.fin, pregunta_id)
+            raise ValueError(f"La marca con pregunta_id {pregunta_id} se solaparía con otra existente")
+        marca.fin = fin
+        if nota is not None:
+            marca.nota = nota
+        self._registrar(ACTUALIZAR, marca=self._marca_a_dict(marca))
+        return marca
 
     def buscar_marcas_por_pregunta_id(self, pregunta_id: int) -> Optional[Marca]:
         """Busca una marca por su pregunta_id."""
-        for marca in self.marcas:
-            if marca.pregunta_id == pregunta_id:
-                return marca
-        return None
+        self._indexar()
+        return self._por_id.get(pregunta_id)
 
-    def exportar_json(self, ruta_json: Path):
-        """Exporta las marcas a un archivo JSON."""
-        data = {
+    def pregunta_en(self, t: float) -> Optional[Marca]:
+        """Marca activa en el instante `t` (segundos); una marca abierta cubre desde su inicio."""
+        self._indexar()
+        pregunta_id = self._intervalos.buscar(t)
+        if pregunta_id is not None:
+            return self._por_id[pregunta_id]
+        abiertas = [m for m in self.marcas if m.fin is None and m.inicio <= t]
+        return max(abiertas, key=lambda m: m.inicio) if abiertas else None
+
+    def etiquetar_tiempos(self, tiempos, sin_pregunta: int = 0):
+        """
+        Etiqueta un array NumPy de instantes con el pregunta_id de la marca
+        cerrada que los contiene (`sin_pregunta` fuera de toda marca).
+        """
+        self._indexar()
+        return self._intervalos.etiquetar(tiempos, sin_etiqueta=sin_pregunta)
+
+    def to_dict(self) -> dict:
+        return {
             "entrevista_id": self.entrevista_id,
             "archivo_video": str(self.archivo_video),
-            "marcas": [
-                {
-                    "entrevista_id": marca.entrevista_id,
-                    "pregunta_id": marca.pregunta_id,
-                    "inicio": marca.inicio,
-                    "fin": marca.fin,
-                    "nota": marca.nota
-                } for marca in self.marcas
-            ]
+            "marcas": [self._marca_a_dict(marca) for marca in self.marcas]
         }
-        ruta_json.parent.mkdir(parents=True, exist_ok=True)
-        with open(ruta_json, 'w') as f:
-            json.dump(data, f, indent=2)
-            f.flush()
+
+    def exportar_json(self, ruta_json: Path):
+        """Exporta las marcas a un archivo JSON (escritura atómica).
+
+        Si `ruta_json` es el snapshot propio, además se compacta el diario.
+        """
+        ruta_json = Path(ruta_json)
+        if ruta_json.resolve() == self.ruta_json.resolve():
+            self.diario.compactar(self.to_dict())
+        else:
+            escribir_json_atomico(ruta_json, self.to_dict())
 
     def importar_json(self, ruta_json: Path):
-        """Importa marcas desde un archivo JSON."""
+        """Importa marcas desde un archivo JSON más los cambios pendientes de su diario."""
+        ruta_json = Path(ruta_json)
         if not ruta_json.exists():
             raise FileNotFoundError(f"El archivo {ruta_json} no existe")
-        with open(ruta_json, 'r') as f:
-            data = json.load(f)
+        data = cargar_marcas(ruta_json)
         if data["entrevista_id"] != self.entrevista_id:
             raise ValueError("El entrevista_id del JSON no coincide")
         self.archivo_video = Path(data["archivo_video"])
@@ -70,18 +131,60 @@ class Marcas:
                 nota=m.get("nota", "")
             ) for m in data["marcas"]
         ]
+        self._reindexar()
+
+    @property
+    def diario(self) -> DiarioMarcas:
+        if self._diario is None:
+            self._diario = DiarioMarcas(self.ruta_json)
+        return self._diario
+
+    def _registrar(self, op: str, **datos):
+        self.diario.registrar(op, **datos)
+        if self.diario.necesita_compactar():
+            self._guardar_marcas_json()
+
+    @staticmethod
+    def _marca_a_dict(marca: Marca) -> dict:
+        return {
+            "entrevista_id": marca.entrevista_id,
+            "pregunta_id": marca.pregunta_id,
+            "inicio": marca.inicio,
+            "fin": marca.fin,
+            "nota": marca.nota
+        }
 
     def _existe_solapamiento(self, nueva_marca: Marca) -> bool:
         """Valida si una nueva marca se solapa con las existentes."""
         if nueva_marca.fin is None:
             return False  # No se puede validar solapamiento sin fin
+        self._indexar()
+        return self._intervalos.solapa(nueva_marca.inicio, nueva_marca.fin) is not None
+
+    def _indexar(self):
+        # Si se reemplazó la lista `marcas` por fuera, los índices se reconstruyen una vez
+        if not self._indices_vigentes:
+            self._reindexar()
+
+    def _reindexar(self):
+        self._por_id = {}
+        self._intervalos = IndiceIntervalos()
         for marca in self.marcas:
-            if marca.fin is None:
-                continue
-            if nueva_marca.inicio < marca.fin and nueva_marca.fin > marca.inicio:
-                return True
-        return False
+            self._agregar_a_indices(marca)
+        self._indices_vigentes = True
+
+    def _agregar_a_indices(self, marca: Marca):
+        if marca.pregunta_id in self._por_id:
+            # Archivos antiguos pueden repetir pregunta_id: se busca por la última
+            logger.warning(f"pregunta_id {marca.pregunta_id} repetido en las marcas de {self.entrevista_id}")
+        self._por_id[marca.pregunta_id] = marca
+        if marca.fin is not None:
+            try:
+                self._intervalos.insertar(marca.inicio, marca.fin, marca.pregunta_id)
+            except ValueError as e:
+                # Archivos antiguos pueden traer marcas solapadas: se conservan, sin indexar
+                logger.warning(f"Marca {marca.pregunta_id} fuera del índice de intervalos: {e}")
 
     def _guardar_marcas_json(self):
-        """Guarda las marcas en el archivo JSON especificado."""
-        self.exportar_json(Path(f"data/marcas/marcas_{self.entrevista_id}.json"))
\ No newline at end of file
+        """Compacta: reescribe el snapshot JSON completo y vacía el diario."""
+        self.exportar_json(self.ruta_json)
@@ -0,0 +1,586 @@
+"""
+Planificador local de trabajos por entrevista.
+
+Cada entrevista se modela como un grafo de dependencias:
+
+    grabación → corte de cada pregunta → análisis → índice → gráficos
+
+`ColaTrabajos` guarda los trabajos en SQLite (`data/planificador.sqlite3`),
+así la cola sobrevive a un reinicio: lo que estaba ejecutándose vuelve a
+pendiente al arrancar. `Planificador` corre un bucle asyncio en su propio
+hilo y despacha los trabajos cuyas dependencias ya terminaron, de mayor a
+menor prioridad (la entrevista que se está revisando va primero). El trabajo
+pesado se ejecuta en pools de procesos ('spawn'): uno de un solo proceso
+para el análisis, que así carga el modelo una vez, y otro para cortes y
+gráficos. Cualquier ventana puede consultar `estado()` o `suscribirse`; ver
+`ui.utils.planificador_qt` para recibir los cambios como señales Qt.
+"""
+
+import sys
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RUTA_PLANIFICADOR = Path("data/planificador.sqlite3")
+
+# Tipos de trabajo
+GRABACION = "grabacion"
+CORTE = "corte"
+ANALISIS = "analisis"
+INDICE = "indice"
+GRAFICOS = "graficos"
+
+# Estados
+PENDIENTE = "pendiente"
+EJECUTANDO = "ejecutando"
+COMPLETADO = "completado"
+ERROR = "error"
+CANCELADO = "cancelado"
+ESTADOS = (PENDIENTE, EJECUTANDO, COMPLETADO, ERROR, CANCELADO)
+
+PRIORIDAD_NORMAL = 0
+PRIORIDAD_REVISION = 100
+
+# Trabajos simultáneos por tipo (el análisis usa un proceso con el modelo cargado)
+LIMITES_POR_TIPO = {CORTE: 2, ANALISIS: 1, GRAFICOS: 1, INDICE: 1, GRABACION: 1}
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabajos (
+    id            TEXT PRIMARY KEY,
+    tipo          TEXT NOT NULL,
+    entrevista_id TEXT NOT NULL,
+    parametros    TEXT NOT NULL,
+    dependencias  TEXT NOT NULL,
+    prioridad     INTEGER NOT NULL DEFAULT 0,
+    estado        TEXT NOT NULL,
+    intentos      INTEGER NOT NULL DEFAULT 0,
+    error         TEXT NOT NULL DEFAULT '',
+    resultado     TEXT NOT NULL DEFAULT '{}',
+    creado        REAL NOT NULL,
+    actualizado   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trabajos_estado ON trabajos (estado);
+CREATE INDEX IF NOT EXISTS idx_trabajos_entrevista ON trabajos (entrevista_id);
+"""
+
+
+@dataclass
+class Trabajo:
+    id: str
+    tipo: str
+    entrevista_id: str
+    parametros: dict = field(default_factory=dict)
+    dependencias: List[str] = field(default_factory=list)
+    prioridad: int = PRIORIDAD_NORMAL
+    estado: str = PENDIENTE
+    intentos: int = 0
+    error: str = ""
+    resultado: dict = field(default_factory=dict)
+    creado: float = field(default_factory=time.time)
+    actualizado: float = field(default_factory=time.time)
+
+    def a_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def desde_fila(cls, fila) -> "Trabajo":
+        return cls(
+            id=fila["id"], tipo=fila["tipo"], entrevista_id=fila["entrevista_id"],
+            parametros=json.loads(fila["parametros"]), dependencias=json.loads(fila["dependencias"]),
+            prioridad=fila["prioridad"], estado=fila["estado"], intentos=fila["intentos"],
+            error=fila["error"], resultado=json.loads(fila["resultado"]),
+            creado=fila["creado"], actualizado=fila["actualizado"],
+        )
+
+
+def id_trabajo(entrevista_id: str, tipo: str, pregunta_id: Optional[int] = None) -> str:
+    return f"{entrevista_id}/{tipo}" + (f"/{pregunta_id:03d}" if pregunta_id is not None else "")
+
+
+# ----------------------------------------------------------------------
+# Persistencia
+# ----------------------------------------------------------------------
+class ColaTrabajos:
+    """Trabajos y su estado en SQLite. Cada operación abre su propia conexión (como CatalogoResultados)."""
+
+    def __init__(self, ruta=RUTA_PLANIFICADOR):
+        self.ruta = Path(ruta)
+        self._lock = threading.Lock()
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        with self._conectar() as con:
+            con.executescript(_ESQUEMA)
+
+    @contextmanager
+    def _conectar(self):
+        con = sqlite3.connect(str(self.ruta), timeout=10)
+        con.row_factory = sqlite3.Row
+        try:
+            con.execute("PRAGMA journal_mode=WAL")
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def agregar(self, trabajos: List[Trabajo], rehacer: bool = False) -> int:
+        """
+        Inserta los trabajos. Los que ya existen se conservan salvo que hayan
+        fallado o se hayan cancelado (vuelven a pendiente), o con `rehacer=True`.
+        Devuelve cuántos quedaron pendientes.
+        """
+        ahora = time.time()
+        pendientes = 0
+        with self._lock, self._conectar() as con:
+            for t in trabajos:
+                fila = con.execute("SELECT estado FROM trabajos WHERE id = ?", (t.id,)).fetchone()
+                if fila is None:
+                    pendientes += con.execute(
+                        "INSERT INTO trabajos (id, tipo, entrevista_id, parametros, dependencias, prioridad, "
+                        "estado, creado, actualizado) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (t.id, t.tipo, t.entrevista_id, json.dumps(t.parametros), json.dumps(t.dependencias),
+                         t.prioridad, PENDIENTE, ahora, ahora),
+                    ).rowcount
+                elif rehacer or fila["estado"] in (ERROR, CANCELADO):
+                    # Un trabajo en ejecución no se toca (rowcount 0): no cuenta como pendiente
+                    pendientes += con.execute(
+                        "UPDATE trabajos SET parametros = ?, dependencias = ?, estado = ?, error = '', "
+                        "actualizado = ? WHERE id = ? AND estado != ?",
+                        (json.dumps(t.parametros), json.dumps(t.dependencias), PENDIENTE, ahora, t.id, EJECUTANDO),
+                    ).rowcount
+        return pendientes
+
+    def trabajos(self, entrevista_id: Optional[str] = None) -> List[Trabajo]:
+        consulta, parametros = "SELECT * FROM trabajos", ()
+        if entrevista_id is not None:
+            consulta, parametros = consulta + " WHERE entrevista_id = ?", (entrevista_id,)
+        with self._conectar() as con:
+            return [Trabajo.desde_fila(f) for f in con.execute(consulta + " ORDER BY creado, id", parametros)]
+
+    def obtener(self, id_: str) -> Optional[Trabajo]:
+        with self._conectar() as con:
+            fila = con.execute("SELECT * FROM trabajos WHERE id = ?", (id_,)).fetchone()
+        return Trabajo.desde_fila(fila) if fila else None
+
+    def listos(self, excluir=()) -> List[Trabajo]:
+        """Pendientes con todas sus dependencias completadas, de mayor a menor prioridad."""
+        with self._conectar() as con:
+            completados = {f["id"] for f in con.execute("SELECT id FROM trabajos WHERE estado = ?", (COMPLETADO,))}
+            pendientes = [Trabajo.desde_fila(f) for f in con.execute(
+                "SELECT * FROM trabajos WHERE estado = ? ORDER BY prioridad DESC, creado, id", (PENDIENTE,))]
+        return [t for t in pendientes
+                if t.id not in excluir and all(d in completados for d in t.dependencias)]
+
+    def actualizar(self, id_: str, estado: str, error: str = "", resultado: Optional[dict] = None):
+        with self._lock, self._conectar() as con:
+            con.execute(
+                "UPDATE trabajos SET estado = ?, error = ?, resultado = COALESCE(?, resultado), actualizado = ?, "
+                "intentos = intentos + ? WHERE id = ?",
+                (estado, error, json.dumps(resultado) if resultado is not None else None, time.time(),
+                 1 if estado == EJECUTANDO else 0, id_),
+            )
+
+    def dependientes(self, id_: str) -> List[Trabajo]:
+        """Trabajos no terminados que dependen (directa o indirectamente) de `id_`."""
+        por_dependencia: Dict[str, List[Trabajo]] = {}
+        for t in self.trabajos():
+            if t.estado in (PENDIENTE, EJECUTANDO):
+                for d in t.dependencias:
+                    por_dependencia.setdefault(d, []).append(t)
+        resultado, pila, vistos = [], [id_], set()
+        while pila:
+            for t in por_dependencia.get(pila.pop(), []):
+                if t.id not in vistos:
+                    vistos.add(t.id)
+                    resultado.append(t)
+                    pila.append(t.id)
+        return resultado
+
+    def recuperar(self) -> int:
+        """Al arrancar: lo que quedó ejecutándose (cierre o caída) vuelve a pendiente."""
+        with self._lock, self._conectar() as con:
+            return con.execute("UPDATE trabajos SET estado = ?, actualizado = ? WHERE estado = ?",
+                               (PENDIENTE, time.time(), EJECUTANDO)).rowcount
+
+    def priorizar(self, entrevista_id: str, prioridad: int = PRIORIDAD_REVISION):
+        """Fija la prioridad de los trabajos de una entrevista; las demás vuelven a la normal."""
+        with self._lock, self._conectar() as con:
+            con.execute("UPDATE trabajos SET prioridad = ? WHERE entrevista_id != ? AND prioridad = ?",
+                        (PRIORIDAD_NORMAL, entrevista_id, prioridad))
+            con.execute("UPDATE trabajos SET prioridad = ? WHERE entrevista_id = ?", (prioridad, entrevista_id))
+
+    def cancelar(self, entrevista_id: str) -> int:
+        """Cancela los pendientes de una entrevista (lo que ya corre termina)."""
+        with self._lock, self._conectar() as con:
+            return con.execute("UPDATE trabajos SET estado = ?, actualizado = ? WHERE entrevista_id = ? AND estado = ?",
+                               (CANCELADO, time.time(), entrevista_id, PENDIENTE)).rowcount
+
+    def limpiar_completados(self, antiguedad_s: float = 7 * 24 * 3600) -> int:
+        with self._lock, self._conectar() as con:
+            return con.execute("DELETE FROM trabajos WHERE estado = ? AND actualizado < ?",
+                               (COMPLETADO, time.time() - antiguedad_s)).rowcount
+
+    def conteos(self, entrevista_id: Optional[str] = None) -> Dict[str, int]:
+        consulta, parametros = "SELECT estado, COUNT(*) AS n FROM trabajos", ()
+        if entrevista_id is not None:
+            consulta, parametros = consulta + " WHERE entrevista_id = ?", (entrevista_id,)
+        with self._conectar() as con:
+            filas = con.execute(consulta + " GROUP BY estado", parametros).fetchall()
+        conteos = dict.fromkeys(ESTADOS, 0)
+        conteos.update({f["estado"]: f["n"] for f in filas})
+        return conteos
+
+
+# ----------------------------------------------------------------------
+# Grafo de una entrevista
+# ----------------------------------------------------------------------
+def plan_entrevista(entrevista_id: str, video, marcas_json, modelo,
+                    fragmentos_dir=None, resultados_dir=None, proxy: Optional[str] = None,
+                    preguntas: Optional[List[int]] = None) -> List[Trabajo]:
+    """
+    Trabajos de una entrevista: grabación → (corte → análisis → índice) por
+    pregunta → gráficos. `preguntas` limita las preguntas (por defecto todas
+    las marcas cerradas del JSON).
+    """
+    from classes.diario_marcas import cargar_marcas
+    from classes.resultados_analisis import ruta_resultado_para
+
+    fragmentos_dir = Path(fragmentos_dir or f"data/fragmentos/{entrevista_id}")
+    resultados_dir = Path(resultados_dir or f"data/resultados/{entrevista_id}")
+    marcas = [m for m in cargar_marcas(Path(marcas_json)).get("marcas", [])
+              if m.get("fin") is not None and (preguntas is None or m["pregunta_id"] in preguntas)]
+    if not marcas:
+        raise ValueError(f"La entrevista {entrevista_id} no tiene marcas cerradas para procesar")
+
+    grabacion = Trabajo(id_trabajo(entrevista_id, GRABACION), GRABACION, entrevista_id, {"video": str(video)})
+    trabajos, indices = [grabacion], []
+    for marca in sorted(marcas, key=lambda m: m["pregunta_id"]):
+        pregunta_id = int(marca["pregunta_id"])
+        nombre = f"fragmento_{entrevista_id}_{pregunta_id:03d}.mp4"
+        fragmento = fragmentos_dir / nombre
+        resultado = ruta_resultado_para(resultados_dir, nombre)
+        corte = Trabajo(id_trabajo(entrevista_id, CORTE, pregunta_id), CORTE, entrevista_id, {
+            "video": str(video), "marcas_json": str(marcas_json), "pregunta_id": pregunta_id,
+            "fragmentos_dir": str(fragmentos_dir), "proxy": proxy,
+        }, [grabacion.id])
+        analisis = Trabajo(id_trabajo(entrevista_id, ANALISIS, pregunta_id), ANALISIS, entrevista_id, {
+            "fragmento": str(fragmento), "modelo": str(modelo), "resultado": str(resultado),
+            "entrevista_id": entrevista_id, "pregunta_id": f"{pregunta_id:03d}",
+        }, [corte.id])
+        indice = Trabajo(id_trabajo(entrevista_id, INDICE, pregunta_id), INDICE, entrevista_id,
+                         {"resultado": str(resultado)}, [analisis.id])
+        trabajos += [corte, analisis, indice]
+        indices.append(indice.id)
+    trabajos.append(Trabajo(id_trabajo(entrevista_id, GRAFICOS), GRAFICOS, entrevista_id,
+                            {"entrevista_id": entrevista_id}, indices))
+    return trabajos
+
+
+# ----------------------------------------------------------------------
+# Tareas (se ejecutan en los procesos del pool: solo funciones de módulo)
+# ----------------------------------------------------------------------
+_analizador = None
+
+
+def _tarea_grabacion(p: dict) -> dict:
+    """La grabación ya existe (completa o segmentada); no se graba nada aquí."""
+    from video_io.segmentos import IndiceSegmentos
+    video = Path(p["video"])
+    if video.exists():
+        return {"video": str(video), "tamaño": video.stat().st_size}
+    if IndiceSegmentos.para_video(video) is not None:
+        return {"video": str(video), "segmentada": True}
+    raise FileNotFoundError(f"Video original no encontrado: {video}")
+
+
+def _tarea_corte(p: dict) -> dict:
+    from classes.marcas import Marcas
+    from classes.fragmento import Fragmento
+    from classes.diario_marcas import cargar_marcas
+    from video_io.indice_frames import IndiceFrames
+    from video_io.segmentos import IndiceSegmentos
+
+    video, ruta_marcas = Path(p["video"]), Path(p["marcas_json"])
+    marcas = Marcas(cargar_marcas(ruta_marcas)["entrevista_id"], video, ruta_marcas)
+    marcas.importar_json(ruta_marcas)
+    marca = marcas.buscar_marcas_por_pregunta_id(p["pregunta_id"])
+    if marca is None:
+        raise ValueError(f"No existe la marca de la pregunta {p['pregunta_id']}")
+
+    segmentos = None if video.exists() else IndiceSegmentos.para_video(video)
+    fragmento = Fragmento(marca, Path(p["fragmentos_dir"]))
+    fragmento.generar_fragmento(video, proxy=p.get("proxy"), indice=IndiceFrames.cargar_para_video(video),
+                                segmentos=segmentos)
+    return {"fragmento": str(fragmento.ruta_fragmento)}
+
+
+def _tarea_analisis(p: dict) -> dict:
+    global _analizador
+    from classes.analisis import Analisis
+    from classes.fragmento import Fragmento
+    from classes.linea_tiempo import guardar_linea_tiempo
+    from classes.resultados_analisis import armar_resultado, guardar_resultado
+    from utils.instrumentacion import Instrumentacion
+
+    modelo = Path(p["modelo"])
+    # El proceso de análisis es siempre el mismo: el modelo se carga una vez
+    if _analizador is None or _analizador.modelo_path != modelo:
+        _analizador = Analisis(modelo)
+
+    fragmento = Path(p["fragmento"])
+    instr = Instrumentacion(fragmento.stem)
+    tiempos, resultados = _analizador.analizar_fragmento_con_tiempos(Fragmento.ruta_lectura(fragmento), instr=instr)
+    if not resultados:
+        return {"sin_rostros": True}
+
+    info = {"name": fragmento.name, "path": fragmento,
+            "entrevista_id": p["entrevista_id"], "pregunta_id": p["pregunta_id"]}
+    datos = armar_resultado(info, modelo.name, _analizador.get_emotion_summary(resultados), resultados,
+                            rendimiento=instr.resumen())
+    ruta = Path(p["resultado"])
+    guardar_resultado(ruta, datos)
+    try:
+        guardar_linea_tiempo(ruta, tiempos, resultados)
+    except Exception as e:
+        logger.warning(f"No se pudo guardar la línea de tiempo de {ruta.name}: {e}")
+    return {"resultado": str(ruta), "frames": len(resultados)}
+
+
+def _tarea_indice(p: dict) -> dict:
+    from classes.catalogo_resultados import CatalogoResultados
+    ruta = Path(p["resultado"])
+    if not ruta.exists():
+        return {"omitido": "sin resultado (no se detectaron rostros)"}
+    return {"registrado": CatalogoResultados().registrar_archivo(ruta)}
+
+
+def _tarea_graficos(p: dict) -> dict:
+    """Deja en el caché de disco los PNG que mostrarán las pantallas de reportes."""
+    import os
+    import tempfile
+    from classes.analitica import MotorAnalitica
+    from classes.catalogo_resultados import CatalogoResultados
+    from ui.utils.graficos import DIRECTORIO_CACHE, clave_grafico, graficos_de_entrevista, renderizar_grafico
+
+    catalogo = CatalogoResultados()
+    preguntas = catalogo.preguntas_de(p["entrevista_id"])
+    # Los promedios globales salen del mismo motor que usa ResumenScreen
+    motor = MotorAnalitica(catalogo)
+    motor.actualizar_entrevista(p["entrevista_id"])
+    promedios = motor.por_entrevista(entrevistas=[p["entrevista_id"]]).get(p["entrevista_id"], {}).get("intensidad")
+    DIRECTORIO_CACHE.mkdir(parents=True, exist_ok=True)
+    nuevos = 0
+    for tipo, datos, tamaño in graficos_de_entrevista(p["entrevista_id"], preguntas, promedios):
+        ruta = DIRECTORIO_CACHE / f"{clave_grafico(tipo, datos, tamaño)}.png"
+        if ruta.exists():
+            continue
+        fd, temporal = tempfile.mkstemp(suffix=".tmp", dir=str(DIRECTORIO_CACHE))
+        with os.fdopen(fd, "wb") as f:
+            f.write(renderizar_grafico(tipo, datos, tamaño))
+        os.replace(temporal, ruta)
+        nuevos += 1
+    return {"graficos": nuevos}
+
+
+_TAREAS: Dict[str, Callable[[dict], dict]] = {
+    GRABACION: _tarea_grabacion,
+    CORTE: _tarea_corte,
+    ANALISIS: _tarea_analisis,
+    INDICE: _tarea_indice,
+    GRAFICOS: _tarea_graficos,
+}
+# Tareas livianas que corren en un hilo del planificador, sin proceso aparte
+_EN_HILO = {GRABACION, INDICE}
+
+
+def ejecutar_tarea(tipo: str, parametros: dict) -> dict:
+    """Punto de entrada en el proceso trabajador."""
+    if tipo not in _TAREAS:
+        raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+    return _TAREAS[tipo](parametros) or {}
+
+
+# ----------------------------------------------------------------------
+# Planificador
+# ----------------------------------------------------------------------
+class Planificador:
+    """
+    Ejecuta la cola en un bucle asyncio propio. Los métodos públicos se
+    pueden llamar desde cualquier hilo; los suscriptores reciben el dict del
+    trabajo que cambió desde el hilo del planificador.
+    """
+
+    def __init__(self, cola: Optional[ColaTrabajos] = None, procesos: int = 2):
+        self.cola = cola or ColaTrabajos()
+        self.procesos = max(int(procesos), 1)
+        self._suscriptores: List[Callable[[dict], None]] = []
+        self._en_curso: Dict[str, str] = {}  # id -> tipo
+        # estado() lee _en_curso desde otros hilos mientras el bucle lo modifica
+        self._en_curso_lock = threading.Lock()
+        self._tareas = set()
+        self._hilo: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._despertar: Optional[asyncio.Event] = None
+        self._activo = False
+        self._pools: Dict[str, ProcessPoolExecutor] = {}
+
+    # --- ciclo de vida -------------------------------------------------
+    def iniciar(self):
+        if self._hilo is not None:
+            return
+        recuperados = self.cola.recuperar()
+        if recuperados:
+            logger.info(f"🔁 {recuperados} trabajos interrumpidos vuelven a la cola")
+        self._activo = True
+        listo = threading.Event()
+        self._hilo = threading.Thread(target=self._correr_loop, args=(listo,), name="planificador", daemon=True)
+        self._hilo.start()
+        listo.wait()
+
+    def detener(self, esperar: bool = True):
+        """Deja de despachar; lo que está en curso vuelve a pendiente en el próximo arranque."""
+        if self._hilo is None:
+            return
+        self._activo = False
+        self._avisar()
+        if esperar:
+            self._hilo.join(timeout=10)
+        for pool in self._pools.values():
+            if sys.version_info >= (3, 9):
+                pool.shutdown(wait=False, cancel_futures=True)
+            else:
+                pool.shutdown(wait=False)
+        self._pools.clear()
+        self._hilo = None
+
+    def _correr_loop(self, listo: threading.Event):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._despertar = asyncio.Event()
+        listo.set()
+        try:
+            self._loop.run_until_complete(self._principal())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    def _avisar(self):
+        """Despierta al bucle (seguro desde cualquier hilo)."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._despertar.set)
+
+    def _pool(self, tipo: str) -> ProcessPoolExecutor:
+        clave = ANALISIS if tipo == ANALISIS else "general"
+        if clave not in self._pools:
+            # 'spawn' evita heredar con fork el estado de Qt y de TensorFlow
+            self._pools[clave] = ProcessPoolExecutor(
+                max_workers=1 if clave == ANALISIS else self.procesos,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pools[clave]
+
+    # --- API pública -----------------------------------------------------
+    def encolar(self, trabajos: List[Trabajo], rehacer: bool = False) -> int:
+        pendientes = self.cola.agregar(trabajos, rehacer=rehacer)
+        for t in trabajos:
+            self._notificar(t.id)
+        self._avisar()
+        return pendientes
+
+    def priorizar_entrevista(self, entrevista_id: str):
+        self.cola.priorizar(entrevista_id)
+        self._avisar()
+
+    def cancelar_entrevista(self, entrevista_id: str) -> int:
+        cancelados = self.cola.cancelar(entrevista_id)
+        if cancelados:
+            for t in self.cola.trabajos(entrevista_id):
+                self._notificar(t.id, t)
+        return cancelados
+
+    def estado(self, entrevista_id: Optional[str] = None) -> dict:
+        """Conteos por estado y trabajos en curso (global o de una entrevista)."""
+        with self._en_curso_lock:
+            ids = list(self._en_curso)
+        en_curso = sorted(i for i in ids if entrevista_id is None or i.startswith(entrevista_id + "/"))
+        return {"conteos": self.cola.conteos(entrevista_id), "en_curso": en_curso}
+
+    def trabajos(self, entrevista_id: Optional[str] = None) -> List[dict]:
+        return [t.a_dict() for t in self.cola.trabajos(entrevista_id)]
+
+    def suscribir(self, callback: Callable[[dict], None]):
+        self._suscriptores.append(callback)
+
+    def _notificar(self, id_: str, trabajo: Optional[Trabajo] = None):
+        trabajo = trabajo or self.cola.obtener(id_)
+        if trabajo is None:
+            return
+        datos = trabajo.a_dict()
+        for callback in list(self._suscriptores):
+            try:
+                callback(datos)
+            except Exception as e:
+                logger.warning(f"Suscriptor del planificador falló: {e}")
+
+    # --- bucle -----------------------------------------------------------
+    async def _principal(self):
+        while self._activo:
+            self._despertar.clear()
+            ocupados: Dict[str, int] = {}
+            with self._en_curso_lock:
+                en_curso = dict(self._en_curso)
+            for tipo in en_curso.values():
+                ocupados[tipo] = ocupados.get(tipo, 0) + 1
+            for trabajo in self.cola.listos(excluir=en_curso):
+                if ocupados.get(trabajo.tipo, 0) >= LIMITES_POR_TIPO.get(trabajo.tipo, 1):
+                    continue
+                ocupados[trabajo.tipo] = ocupados.get(trabajo.tipo, 0) + 1
+                with self._en_curso_lock:
+                    self._en_curso[trabajo.id] = trabajo.tipo
+                tarea = asyncio.ensure_future(self._ejecutar(trabajo))
+                self._tareas.add(tarea)
+                tarea.add_done_callback(self._tareas.discard)
+            await self._despertar.wait()
+        # Al detener no se espera a los procesos: quedan en 'ejecutando' y se recuperan al arrancar
+        for tarea in list(self._tareas):
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+
+    async def _ejecutar(self, trabajo: Trabajo):
+        loop = asyncio.get_event_loop()
+        self.cola.actualizar(trabajo.id, EJECUTANDO)
+        self._notificar(trabajo.id)
+        logger.info(f"▶️ {trabajo.id}")
+        try:
+            ejecutor = None if trabajo.tipo in _EN_HILO else self._pool(trabajo.tipo)
+            resultado = await loop.run_in_executor(ejecutor, ejecutar_tarea, trabajo.tipo, trabajo.parametros)
+        except Exception as e:
+            if not self._activo:
+                return  # cierre: el trabajo se recupera al próximo arranque
+            mensaje = str(e) or type(e).__name__
+            logger.error(f"❌ {trabajo.id}: {mensaje}")
+            self.cola.actualizar(trabajo.id, ERROR, error=mensaje)
+            self._notificar(trabajo.id)
+            for dependiente in self.cola.dependientes(trabajo.id):
+                self.cola.actualizar(dependiente.id, ERROR, error=f"Falló la dependencia {trabajo.id}")
+                self._notificar(dependiente.id)
+        else:
+            self.cola.actualizar(trabajo.id, COMPLETADO, resultado=resultado)
+            logger.info(f"✅ {trabajo.id}")
+            self._notificar(trabajo.id)
+        finally:
+            with self._en_curso_lock:
+                self._en_curso.pop(trabajo.id, None)
+            if self._despertar is not None:
+                self._despertar.set()
+
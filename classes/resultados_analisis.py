@@ -0,0 +1,215 @@
+"""
+Formato en disco de los resultados de análisis (`data/resultados/<id>/`).
+
+Cada fragmento analizado se guarda en dos archivos:
+
+- `resultados_<fragmento>.json`: resumen pequeño (fragmento, modelo, fecha,
+  `resumen_emociones`, total de frames) más la ruta relativa del detalle.
+- `detalle/resultados_<fragmento>.json`: la lista `resultados_detallados`
+  con los datos por frame, que solo se lee cuando se pide explícitamente.
+
+`EscritorDetalle` escribe el detalle frame a frame mientras se analiza
+(modo con presupuesto de memoria); luego `guardar_resultado(...,
+detalle_escrito=True)` escribe solo el resumen.
+
+Los archivos antiguos (con `resultados_detallados` dentro del resumen) se
+siguen leyendo: `leer_resumen` recorre la lista sin armar los frames y
+devuelve el resumen con la lista vacía. `convertir_resultado` (o
+`python main.py --reindexar`) los reescribe con el formato resumen + detalle.
+"""
+
+import os
+import re
+import json
+import logging
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from classes.diario_marcas import escribir_json_atomico
+
+logger = logging.getLogger(__name__)
+
+DETALLE_DIR = "detalle"
+CLAVE_DETALLE = "resultados_detallados"
+
+_RE_CLAVE_DETALLE = re.compile(r'"' + CLAVE_DETALLE + r'"\s*:\s*(?=\[)')
+# Recorre la lista con el decodificador en C pero descarta cada objeto apenas se arma
+_DESCARTAR_OBJETOS = json.JSONDecoder(object_pairs_hook=lambda _pares: None)
+
+
+def ruta_detalle_para(ruta_resumen) -> Path:
+    """data/resultados/X/resultados_Y.json -> data/resultados/X/detalle/resultados_Y.json"""
+    ruta_resumen = Path(ruta_resumen)
+    return ruta_resumen.parent / DETALLE_DIR / ruta_resumen.name
+
+
+class EscritorDetalle:
+    """
+    Escribe la lista del detalle de un resultado frame a frame, sin tenerla
+    en memoria. Se escribe en un temporal que `cerrar()` publica con
+    `os.replace`; `descartar()` (o una excepción dentro del `with`) lo borra.
+    """
+
+    def __init__(self, ruta_resumen):
+        self.ruta = ruta_detalle_para(ruta_resumen)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._temporal = tempfile.mkstemp(prefix=f".{self.ruta.name}.", suffix=".tmp", dir=str(self.ruta.parent))
+        self._archivo = os.fdopen(fd, "w", encoding="utf-8")
+        self._archivo.write("[")
+        self.total = 0
+
+    def agregar(self, frame: dict):
+        self._archivo.write(("," if self.total else "") + json.dumps(frame, ensure_ascii=False))
+        self.total += 1
+
+    def cerrar(self) -> Path:
+        self._archivo.write("]")
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+        self._archivo.close()
+        os.replace(self._temporal, self.ruta)
+        return self.ruta
+
+    def descartar(self):
+        if not self._archivo.closed:
+            self._archivo.close()
+        try:
+            os.unlink(self._temporal)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, _valor, _traza):
+        if tipo is not None:
+            self.descartar()
+        return False
+
+
+def ruta_resultado_para(resultados_dir, nombre_fragmento: str) -> Path:
+    """data/resultados/X + fragmento_X_001.mp4 -> data/resultados/X/resultados_fragmento_X_001.json"""
+    return Path(resultados_dir) / f"resultados_{nombre_fragmento.replace('.mp4', '.json')}"
+
+
+def armar_resultado(fragmento: dict, modelo: str, resumen: dict, detallados: List[dict],
+                    total_frames: int = None, **extra) -> dict:
+    """
+    Contenido de un resultado tal como lo guarda el análisis. `fragmento` usa
+    las claves del listado de fragmentos (name, path, entrevista_id,
+    pregunta_id); `extra` se agrega a la sección `analisis` (rendimiento, memoria).
+    """
+    analisis = {
+        'modelo_utilizado': modelo,
+        'fecha_analisis': datetime.now().isoformat(),
+        'total_frames_analizados': len(detallados) if total_frames is None else total_frames,
+        'resumen_emociones': resumen,
+        CLAVE_DETALLE: detallados,
+    }
+    analisis.update({clave: valor for clave, valor in extra.items() if valor is not None})
+    return {
+        'fragmento': {
+            'nombre': fragmento['name'],
+            'ruta': str(fragmento['path']),
+            'entrevista_id': fragmento.get('entrevista_id', 'N/A'),
+            'pregunta_id': fragmento.get('pregunta_id', 'N/A')
+        },
+        'analisis': analisis,
+    }
+
+
+def guardar_resultado(ruta_resumen, datos: dict, detalle_escrito: bool = False) -> dict:
+    """
+    Guarda un resultado separando `analisis.resultados_detallados` en su propio archivo.
+
+    El detalle se escribe antes que el resumen: un resumen visible siempre
+    apunta a un detalle completo. Con `detalle_escrito=True` el detalle ya
+    está en disco (EscritorDetalle) y solo se escribe el resumen. Devuelve el
+    resumen tal como quedó escrito.
+    """
+    ruta_resumen = Path(ruta_resumen)
+    analisis = dict(datos.get("analisis", {}))
+    detallados = analisis.pop(CLAVE_DETALLE, [])
+
+    ruta_detalle = ruta_detalle_para(ruta_resumen)
+    if not detalle_escrito:
+        escribir_json_atomico(ruta_detalle, detallados, indent=None)
+
+    analisis.setdefault("total_frames_analizados", len(detallados))
+    analisis["detalle"] = f"{DETALLE_DIR}/{ruta_detalle.name}"
+    resumen = dict(datos, analisis=analisis)
+    escribir_json_atomico(ruta_resumen, resumen)
+    return resumen
+
+
+def _resumen_sin_detalle(texto: str):
+    """Resumen de un JSON antiguo saltando la lista de frames; None si no se pudo."""
+    m = _RE_CLAVE_DETALLE.search(texto)
+    if m is None:
+        return None
+    try:
+        _, fin = _DESCARTAR_OBJETOS.raw_decode(texto, m.end())
+        datos = json.loads(texto[:m.end()] + "[]" + texto[fin:])
+    except ValueError:
+        return None
+    # La clave podría estar en otro lugar (p. ej. dentro de un texto): solo vale la de `analisis`
+    analisis = datos.get("analisis") if isinstance(datos, dict) else None
+    if not isinstance(analisis, dict) or analisis.get(CLAVE_DETALLE) != []:
+        return None
+    return datos
+
+
+def leer_resumen(ruta_resumen) -> dict:
+    """
+    Resumen de un resultado sin los datos por frame.
+
+    En un archivo antiguo (`resultados_detallados` dentro) la lista se
+    recorre sin armarla y se devuelve vacía.
+    """
+    with open(ruta_resumen, "r", encoding="utf-8") as f:
+        texto = f.read()
+
+    if CLAVE_DETALLE in texto:
+        datos = _resumen_sin_detalle(texto)
+        if datos is not None:
+            return datos
+    datos = json.loads(texto)
+    analisis = datos.get("analisis")
+    if isinstance(analisis, dict) and CLAVE_DETALLE in analisis:
+        analisis[CLAVE_DETALLE] = []
+    return datos
+
+
+def convertir_resultado(ruta_resumen) -> bool:
+    """Reescribe un resultado antiguo como resumen + detalle; False si ya tenía el formato nuevo."""
+    ruta_resumen = Path(ruta_resumen)
+    with open(ruta_resumen, "r", encoding="utf-8") as f:
+        datos = json.load(f)
+    analisis = datos.get("analisis")
+    if not isinstance(analisis, dict) or CLAVE_DETALLE not in analisis or "detalle" in analisis:
+        return False
+    guardar_resultado(ruta_resumen, datos)
+    logger.info(f"{ruta_resumen.name} convertido a resumen + detalle")
+    return True
+
+
+def leer_detalle(ruta_resumen, resumen: dict = None) -> List[dict]:
+    """Datos por frame de un resultado (archivo de detalle o, en formato antiguo, el propio JSON)."""
+    ruta_resumen = Path(ruta_resumen)
+    if resumen is None:
+        # Un solo parseo: en formato antiguo el propio archivo trae el detalle
+        with open(ruta_resumen, "r", encoding="utf-8") as f:
+            resumen = json.load(f)
+        analisis = resumen.get("analisis", {})
+        if CLAVE_DETALLE in analisis and "detalle" not in analisis:
+            return analisis[CLAVE_DETALLE]
+
+    relativa = resumen.get("analisis", {}).get("detalle")
+    if relativa:
+        with open(ruta_resumen.parent / relativa, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    with open(ruta_resumen, "r", encoding="utf-8") as f:
+        return json.load(f).get("analisis", {}).get(CLAVE_DETALLE, [])
@@ -2,8 +2,9 @@ import sys
 import logging
 from pathlib import Path
 from datetime import datetime
-from PySide6.QtWidgets import QApplication  # Añadido para manejar la GUI
-from ui.app import App
+from classes.catalogo_resultados import CatalogoResultados
+from utils.instrumentacion import activar_trazas
+from utils.memoria import configurar as configurar_memoria
 
 def setup_logging(debug: bool = False) -> None:
     """Configura logging con archivo y consola."""
@@ -36,17 +37,60 @@ def ensure_directories(salida_dir) -> None:
         directory.mkdir(parents=True, exist_ok=True)
         logging.debug(f"Directorio asegurado: {directory}")
 
+def reindexar_catalogo() -> None:
+    """
+    Reconstruye el catálogo SQLite de resultados leyendo todos los JSON de data/resultados.
+    Los resultados antiguos (detalle por frame dentro del resumen) se pasan a resumen + detalle.
+    """
+    conteo = CatalogoResultados().reindexar(completo=True, convertir=True)
+    logging.info(f"Catálogo reconstruido: {conteo['leidos']} resultados indexados, "
+                 f"{conteo['convertidos']} convertidos, {conteo['errores']} con error")
+
 def main() -> None:
     # Detectar si se pasó --debug como argumento
     debug_mode = "--debug" in sys.argv
     setup_logging(debug=debug_mode)
 
+    # --trazar: exportar trazas Chrome (logs/trazas/) de cada fragmento analizado
+    if "--trazar" in sys.argv:
+        activar_trazas()
+        logging.info("Trazas de rendimiento activadas (logs/trazas/)")
+
+    # --memoria-max MB: análisis con presupuesto de memoria (frames a disco, aborta si se supera)
+    # --perfil-memoria: además snapshots de tracemalloc por fragmento
+    if "--memoria-max" in sys.argv or "--perfil-memoria" in sys.argv:
+        limite = None
+        if "--memoria-max" in sys.argv:
+            try:
+                limite = float(sys.argv[sys.argv.index("--memoria-max") + 1])
+            except (IndexError, ValueError):
+                logging.error("--memoria-max requiere un número de MB (p. ej. --memoria-max 4096)")
+                sys.exit(2)
+        configurar_memoria(limite, perfil_tracemalloc="--perfil-memoria" in sys.argv)
+        logging.info(f"Memoria del análisis: límite={limite or 'sin límite'} MB, "
+                     f"tracemalloc={'sí' if '--perfil-memoria' in sys.argv else 'no'}")
+
+    # --reindexar: reconstruir el catálogo (y convertir resultados antiguos) sin abrir la interfaz
+    if "--reindexar" in sys.argv:
+        ensure_directories("data")
+        reindexar_catalogo()
+        return
+
     logging.info("  ndo el programa...")
     logging.info(f"Fecha y hora de inicio: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     ensure_directories("data")
 
+    # Qt y la interfaz se importan aquí: los procesos del planificador (spawn)
+    # vuelven a importar este módulo y no deben cargar PySide6
+    from PySide6.QtWidgets import QApplication
+    from ui.app import App
+    from ui.utils.planificador_qt import servicio_planificador
+
     # Inicializar la aplicación Qt
     app = QApplication(sys.argv)
+
+    # Planificador de trabajos en segundo plano: retoma la cola que quedó pendiente
+    servicio_planificador()
     
     try:
         # Lanzar la GUI
@@ -1,8 +1,8 @@
 import logging
 import os
-import json
+from array import array
 from pathlib import Path
-from datetime import datetime
+import numpy as np
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget,
     QTableWidgetItem, QHeaderView, QPushButton, QFrame,
@@ -11,12 +11,58 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, QThread, Signal
 from PySide6.QtGui import QFont, QColor
-import cv2
 import traceback
 
 # Importar clase de análisis
 from classes.analisis import Analisis
+from classes.fragmento import Fragmento
 from utils.dependencies import DependencyError
+from utils.progreso import MedidorProgreso
+from utils.instrumentacion import Instrumentacion, SERIALIZACION
+from utils.memoria import MonitorMemoria, MemoriaExcedida, modo_presupuesto, describir as describir_memoria
+from classes.catalogo_resultados import CatalogoResultados, EMOCIONES
+from classes.resultados_analisis import guardar_resultado, armar_resultado, ruta_resultado_para, EscritorDetalle
+from classes.linea_tiempo import guardar_linea_tiempo, guardar_linea_tiempo_matriz
+from ui.utils.listado_fragmentos import ListadoFragmentos
+from video_io.metadatos import servicio_metadatos
+
+
+class ResultadoEnFlujo:
+    """
+    Frames de un fragmento escritos a disco según se analizan. En memoria solo
+    quedan las sumas por emoción y, para la línea de tiempo, tiempos e
+    intensidades en arrays compactos (36 bytes por frame en lugar de un dict).
+    """
+
+    def __init__(self, ruta_resumen):
+        self.escritor = EscritorDetalle(ruta_resumen)
+        self.tiempos = array('d')
+        self.intensidades = array('f')
+        self.sumas = dict.fromkeys(EMOCIONES, 0.0)
+
+    @property
+    def total(self):
+        return self.escritor.total
+
+    def agregar(self, tiempo, intensidades):
+        self.escritor.agregar(intensidades)
+        self.tiempos.append(tiempo)
+        for emocion in EMOCIONES:
+            valor = intensidades.get(emocion, 0.0)
+            self.intensidades.append(valor)
+            self.sumas[emocion] += valor
+
+    def resumen(self):
+        return Analisis.resumen_desde_promedios({e: s / self.total for e, s in self.sumas.items()})
+
+    def matriz(self):
+        return np.frombuffer(self.intensidades, dtype=np.float32).reshape(-1, len(EMOCIONES))
+
+    def cerrar(self):
+        self.escritor.cerrar()
+
+    def descartar(self):
+        self.escritor.descartar()
 
 
 class AnalysisThread(QThread):
@@ -31,6 +77,7 @@ class AnalysisThread(QThread):
         self.fragmentos_data = fragmentos_data
         self.modelo_path = modelo_path
         self.resultados_dir = resultados_dir
+        self.catalogo = CatalogoResultados()
         self.logger = logging.getLogger(__name__)
 
     def run(self):
@@ -57,6 +104,11 @@ class AnalysisThread(QThread):
                 self.error_occurred.emit(f"❌ Error al cargar el modelo: {str(e)}")
                 return
 
+            # Progreso por frame: se mide en segundos de video sobre la duración total
+            duraciones = [self._duracion_segundos(Fragmento.ruta_lectura(f['path'])) for f in self.fragmentos_data]
+            medidor = MedidorProgreso(sum(duraciones))
+            offset = 0.0
+
             for idx, fragmento in enumerate(self.fragmentos_data, 1):
                 try:
                     fragmento_path = fragmento['path']
@@ -64,33 +116,83 @@ class AnalysisThread(QThread):
                     
                     self.log_message.emit(f"🔍 Analizando: {fragmento_name}")
                     
-                    # Realizar análisis del fragmento
-                    resultados = analizador.analizar_fragmento(fragmento_path)
+                    # Analizar el proxy si existe (menos píxeles que decodificar)
+                    ruta_analisis = Fragmento.ruta_lectura(fragmento_path)
+                    if ruta_analisis != Path(fragmento_path):
+                        self.log_message.emit(f"🪶 Usando proxy: {ruta_analisis.parent.name}/{ruta_analisis.name}")
+
+                    # Realizar análisis del fragmento (con tiempos por etapa y memoria)
+                    instr = Instrumentacion(Path(fragmento_name).stem)
+                    monitor = MonitorMemoria.desde_configuracion(fragmento_name)
+                    monitor.comenzar()
+                    on_progreso = lambda t, base=offset: self._reportar_progreso(medidor, base + t)
+                    flujo = None
+                    if modo_presupuesto():
+                        # Con límite de memoria los frames van a disco a medida que se analizan
+                        flujo = ResultadoEnFlujo(self.ruta_resultado(fragmento))
+                        try:
+                            analizador.analizar_fragmento_en_flujo(ruta_analisis, flujo.agregar, on_progreso=on_progreso,
+                                                                   instr=instr, monitor=monitor)
+                        except BaseException:
+                            flujo.descartar()
+                            raise
+                        finally:
+                            analizador.liberar_recursos()
+                        tiempos, resultados, analizados = flujo.tiempos, [], flujo.total
+                    else:
+                        tiempos, resultados = analizador.analizar_fragmento_con_tiempos(
+                            ruta_analisis, on_progreso=on_progreso, instr=instr,
+                        )
+                        analizados = len(resultados)
+
+                    memoria = monitor.terminar()
+                    self.log_message.emit(f"🧠 {fragmento_name}: {describir_memoria(memoria)}")
+                    for linea in memoria.get("principales", []):
+                        self.logger.info(f"tracemalloc {fragmento_name}: {linea}")
+                    rendimiento = instr.resumen()
+                    if rendimiento["fps"]:
+                        self.log_message.emit(f"⏱️ {fragmento_name}: {rendimiento['fps']:.1f} fps de análisis")
                     
-                    if resultados:
+                    if analizados:
                         # Generar resumen
-                        resumen = analizador.get_emotion_summary(resultados)
+                        resumen = flujo.resumen() if flujo else analizador.get_emotion_summary(resultados)
                         
-                        # Guardar resultados
-                        self.guardar_resultados(fragmento, resumen, resultados)
+                        # Guardar resultados (la serialización se mide pero no entra en el JSON que se escribe)
+                        with instr.etapa(SERIALIZACION):
+                            self.guardar_resultados(fragmento, resumen, resultados, tiempos, rendimiento,
+                                                    memoria=memoria, flujo=flujo)
                         
                         msg = f"✅ Análisis completado: {fragmento_name}"
                         self.log_message.emit(msg)
                         self.logger.info(msg)
                         exitos += 1
                     else:
+                        if flujo:
+                            flujo.descartar()
                         msg = f"⚠️ No se detectaron rostros en: {fragmento_name}"
                         self.log_message.emit(msg)
                         self.logger.warning(msg)
 
+                except MemoriaExcedida as e:
+                    # Abortar la tanda: seguir solo agravaría el problema
+                    monitor.terminar()
+                    self.logger.error(str(e))
+                    self.error_occurred.emit(f"❌ {e}")
+                    return
                 except Exception as e:
                     error_msg = f"❌ Error analizando {fragmento.get('name', 'fragmento')}: {str(e)}"
                     self.log_message.emit(error_msg)
                     self.logger.error(error_msg)
                     self.logger.debug(traceback.format_exc())
+                else:
+                    self.logger.info(f"Rendimiento por etapa\n{instr.describir()}")
+                    ruta_traza = instr.exportar_traza()
+                    if ruta_traza is not None:
+                        self.log_message.emit(f"🧭 Traza guardada: {ruta_traza}")
 
-                # Emitir progreso
-                self.progress_updated.emit(int((idx / total) * 100))
+                # Avanzar al final del fragmento (también si falló o no tenía rostros)
+                offset += duraciones[idx - 1]
+                self._reportar_progreso(medidor, offset)
 
             self.progress_updated.emit(100)
             self.finished_with_success.emit(exitos, total)
@@ -102,32 +204,64 @@ class AnalysisThread(QThread):
             self.logger.debug(traceback.format_exc())
             self.error_occurred.emit(error_msg)
 
-    def guardar_resultados(self, fragmento, resumen, resultados_detallados):
-        """Guardar resultados del análisis en archivo JSON"""
+    def _reportar_progreso(self, medidor, posicion):
+        """Emite porcentaje, throughput y ETA a partir de los segundos ya analizados."""
+        estado = medidor.avanzar(posicion)
+        if medidor.cambio_porcentaje():
+            self.progress_updated.emit(estado.porcentaje)
+        if medidor.debe_informar():
+            self.log_message.emit(f"⏳ {estado.describir()}")
+
+    def _duracion_segundos(self, video_path):
+        """Duración del fragmento según la cabecera del contenedor (0 si no se puede leer)."""
+        try:
+            return servicio_metadatos().duracion(video_path) or 0.0
+        except Exception:
+            return 0.0
+
+    def ruta_resultado(self, fragmento):
+        return ruta_resultado_para(self.resultados_dir, fragmento['name'])
+
+    def guardar_resultados(self, fragmento, resumen, resultados_detallados, tiempos=None, rendimiento=None,
+                           memoria=None, flujo=None):
+        """Guardar resultados del análisis en archivo JSON
+
+        flujo: ResultadoEnFlujo con el detalle ya escrito frame a frame (modo con
+        presupuesto de memoria); en ese caso `resultados_detallados` se ignora.
+        """
         try:
             # Crear nombre de archivo para resultados
-            resultado_file = self.resultados_dir / f"resultados_{fragmento['name'].replace('.mp4', '.json')}"
+            resultado_file = self.ruta_resultado(fragmento)
             
-            datos_resultado = {
-                'fragmento': {
-                    'nombre': fragmento['name'],
-                    'ruta': str(fragmento['path']),
-                    'entrevista_id': fragmento.get('entrevista_id', 'N/A'),
-                    'pregunta_id': fragmento.get('pregunta_id', 'N/A')
-                },
-                'analisis': {
-                    'modelo_utilizado': self.modelo_path.name,
-                    'fecha_analisis': datetime.now().isoformat(),
-                    'total_frames_analizados': len(resultados_detallados),
-                    'resumen_emociones': resumen,
-                    'resultados_detallados': resultados_detallados
-                }
-            }
+            datos_resultado = armar_resultado(
+                fragmento, self.modelo_path.name, resumen,
+                [] if flujo else resultados_detallados,
+                total_frames=flujo.total if flujo else None,
+                rendimiento=rendimiento, memoria=memoria,
+            )
             
-            with open(resultado_file, 'w', encoding='utf-8') as f:
-                json.dump(datos_resultado, f, ensure_ascii=False, indent=2)
+            # Resumen en resultado_file y datos por frame en detalle/
+            if flujo:
+                flujo.cerrar()
+            resumen_guardado = guardar_resultado(resultado_file, datos_resultado, detalle_escrito=flujo is not None)
                 
             self.logger.info(f"Resultados guardados: {resultado_file.name}")
+
+            # Pirámide de la línea de tiempo para la vista de detalle (después del detalle)
+            if tiempos is not None:
+                try:
+                    if flujo:
+                        guardar_linea_tiempo_matriz(resultado_file, tiempos, flujo.matriz())
+                    else:
+                        guardar_linea_tiempo(resultado_file, tiempos, resultados_detallados)
+                except Exception as e:
+                    self.logger.warning(f"No se pudo guardar la línea de tiempo de {resultado_file.name}: {e}")
+
+            # Fila de resumen en el catálogo para las pantallas de reportes
+            try:
+                self.catalogo.registrar_resultado(resultado_file, resumen_guardado)
+            except Exception as e:
+                self.logger.warning(f"No se pudo registrar {resultado_file.name} en el catálogo: {e}")
             
         except Exception as e:
             self.logger.error(f"Error guardando resultados: {str(e)}")
@@ -141,6 +275,11 @@ class AnalisisGenerarScreen(QWidget):
         self.logger = logger or logging.getLogger(__name__)
         self.parent_window = parent
         self.fragmentos_data = []
+        self.listado = ListadoFragmentos(self.formatear_duracion, logger=self.logger, parent=self)
+        self.listado.lote_listo.connect(self.on_fragmentos_listados)
+        self.listado.fragmento_actualizado.connect(self.on_fragmento_actualizado)
+        self.listado.fragmento_eliminado.connect(self.on_fragmento_eliminado)
+        self.listado.error_occurred.connect(lambda msg: self.mostrar_error(f"Error al cargar fragmentos: {msg}"))
         self.data_context = data_context or {"entrevistas": [], "fragmentos": []}
         self.current_entrevista = None
         self.modelos_disponibles = []
@@ -567,6 +706,7 @@ class AnalisisGenerarScreen(QWidget):
         """Manejar selección de entrevista"""
         if texto == "-- Seleccione una entrevista --" or not texto:
             self.current_entrevista = None
+            self.listado.detener()
             self.fragmentos_data = []
             self.actualizar_tabla_fragmentos()
             self.btn_analizar.setEnabled(False)
@@ -579,81 +719,52 @@ class AnalisisGenerarScreen(QWidget):
         self.cargar_fragmentos_entrevista(entrevista_id)
 
     def cargar_fragmentos_entrevista(self, entrevista_id):
-        """Cargar fragmentos de una entrevista específica"""
-        try:
-            entrevista_dir = Path("data/fragmentos") / entrevista_id
-            if not entrevista_dir.exists():
-                self.mostrar_error(f"No se encuentra la carpeta de la entrevista {entrevista_id}")
-                return
-
-            fragmentos_files = list(entrevista_dir.glob("*.mp4"))
-            self.fragmentos_data = []
-
-            for frag_path in fragmentos_files:
-                try:
-                    stat = frag_path.stat()
-                    duration = self.obtener_duracion_video(frag_path)
-                    
-                    fragmento_info = {
-                        'path': frag_path,
-                        'name': frag_path.name,
-                        'duration': duration,
-                        'size': stat.st_size,
-                        'creation_time': datetime.fromtimestamp(stat.st_ctime)
-                    }
-                    
-                    # Extraer información adicional del nombre del archivo
-                    self.extraer_info_fragmento(fragmento_info, frag_path.name)
-                    
-                    self.fragmentos_data.append(fragmento_info)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error procesando {frag_path}: {str(e)}")
-                    continue
-
-            self.actualizar_tabla_fragmentos()
-            self.actualizar_estadisticas()
-            self.actualizar_boton_analizar()
-
-        except Exception as e:
-            self.mostrar_error(f"Error al cargar fragmentos: {str(e)}")
+        """Cargar fragmentos de una entrevista específica (en segundo plano, por lotes)"""
+        entrevista_dir = Path("data/fragmentos") / entrevista_id
+        if not entrevista_dir.exists():
+            self.listado.detener()
+            self.mostrar_error(f"No se encuentra la carpeta de la entrevista {entrevista_id}")
+            return
 
-    def extraer_info_fragmento(self, fragmento_info, filename):
-        """Extraer información de la entrevista y pregunta desde el nombre del archivo"""
-        try:
-            name = filename.replace(".mp4", "")
-            parts = name.split("_")
-            
-            if len(parts) >= 3:
-                fragmento_info["entrevista_id"] = "_".join(parts[1:-1])
-                fragmento_info["pregunta_id"] = parts[-1]
-            else:
-                fragmento_info["entrevista_id"] = "N/A"
-                fragmento_info["pregunta_id"] = "N/A"
-                
-        except Exception as e:
-            self.logger.warning(f"Error extrayendo info de {filename}: {e}")
-            fragmento_info["entrevista_id"] = "N/A"
-            fragmento_info["pregunta_id"] = "N/A"
+        self.fragmentos_data = []
+        self.actualizar_tabla_fragmentos()
+        self.actualizar_estadisticas()
+        self.actualizar_boton_analizar()
+        # La tabla se llena con on_fragmentos_listados y luego se mantiene al día
+        # con los cambios en la carpeta (on_fragmento_actualizado / on_fragmento_eliminado)
+        self.listado.cargar(entrevista_dir)
+
+    def on_fragmentos_listados(self, lote):
+        """Agregar a la tabla un lote de fragmentos listado en segundo plano"""
+        desde = len(self.fragmentos_data)
+        self.fragmentos_data.extend(lote)
+        self.actualizar_tabla_fragmentos(desde)
+        self.actualizar_estadisticas()
+        self.actualizar_boton_analizar()
+
+    def on_fragmento_actualizado(self, info):
+        """Actualizar solo la fila de un fragmento que cambió en disco"""
+        for row, frag in enumerate(self.fragmentos_data):
+            if frag['path'] == info['path']:
+                self.fragmentos_data[row] = info
+                self.actualizar_tabla_fragmentos(row, row + 1)
+                self.actualizar_estadisticas()
+                self.actualizar_boton_analizar()
+                return
 
-    def obtener_duracion_video(self, video_path):
-        """Obtener duración del video usando OpenCV"""
-        try:
-            cap = cv2.VideoCapture(str(video_path))
-            if cap.isOpened():
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-                cap.release()
-                
-                if fps > 0 and frame_count > 0:
-                    duration_seconds = frame_count / fps
-                    return self.formatear_duracion(duration_seconds)
-            return "N/A"
-        except:
-            return "N/A"
+    def on_fragmento_eliminado(self, ruta):
+        """Quitar de la tabla un fragmento borrado"""
+        for row, frag in enumerate(self.fragmentos_data):
+            if str(frag['path']) == ruta:
+                del self.fragmentos_data[row]
+                self.fragmentos_table.removeRow(row)
+                self.actualizar_tabla_fragmentos(row)  # reindexar las filas siguientes
+                self.actualizar_estadisticas()
+                self.actualizar_boton_analizar()
+                return
 
-    def actualizar_tabla_fragmentos(self):
-        """Actualizar la tabla con los fragmentos cargados y agregar checkboxes"""
+    def actualizar_tabla_fragmentos(self, desde=0, hasta=None):
+        """Actualizar la tabla con los fragmentos cargados y agregar checkboxes (filas desde..hasta)"""
         # Configurar columnas para incluir checkbox
         self.fragmentos_table.setColumnCount(5)
         self.fragmentos_table.setHorizontalHeaderLabels([
@@ -669,12 +780,14 @@ class AnalisisGenerarScreen(QWidget):
         
         self.fragmentos_table.setRowCount(len(self.fragmentos_data))
         
-        for row, frag in enumerate(self.fragmentos_data):
-            # Checkbox (columna 0)
-            checkbox_item = QTableWidgetItem()
-            checkbox_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsUserCheckable)
-            checkbox_item.setCheckState(Qt.Checked)  # Por defecto seleccionado
-            self.fragmentos_table.setItem(row, 0, checkbox_item)
+        for row in range(desde, len(self.fragmentos_data) if hasta is None else hasta):
+            frag = self.fragmentos_data[row]
+            # Checkbox (columna 0): se conserva la elección del usuario al refrescar una fila
+            if self.fragmentos_table.item(row, 0) is None:
+                checkbox_item = QTableWidgetItem()
+                checkbox_item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsUserCheckable)
+                checkbox_item.setCheckState(Qt.Checked)  # Por defecto seleccionado
+                self.fragmentos_table.setItem(row, 0, checkbox_item)
             
             # Nombre del fragmento (columna 1)
             name_item = QTableWidgetItem(frag['name'])
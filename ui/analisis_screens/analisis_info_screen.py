@@ -1,8 +1,6 @@
 import os
-import json
 import logging
 from pathlib import Path
-from datetime import datetime
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget,
     QTableWidgetItem, QHeaderView, QPushButton, QFrame,
@@ -10,11 +8,14 @@ from PySide6.QtWidgets import (
     QComboBox, QListWidget, QListWidgetItem, QGroupBox,
     QFileDialog, QDialog, QDialogButtonBox
 )
-from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QFont, QPixmap, QPainter
-import cv2
+from PySide6.QtCore import Qt, QTimer, QSize
+from PySide6.QtGui import QFont, QPixmap, QPainter, QIcon
 import subprocess
 
+from classes.diario_marcas import cargar_marcas
+from ui.utils.listado_fragmentos import ListadoFragmentos
+from ui.utils.miniaturas_cache import POSTER, cache_miniaturas, mostrar_miniatura
+
 
 class AnalisisInfoScreen(QWidget):
     """Pantalla para mostrar información de fragmentos antes del análisis"""
@@ -25,6 +26,11 @@ class AnalisisInfoScreen(QWidget):
         self.data_context = data_context or {}
         self.current_entrevista = None
         self.fragmentos_data = []
+        self.listado = ListadoFragmentos(self.formatear_duracion, logger=self.logger, parent=self)
+        self.listado.lote_listo.connect(self.on_fragmentos_listados)
+        self.listado.fragmento_actualizado.connect(self.on_fragmento_actualizado)
+        self.listado.fragmento_eliminado.connect(self.on_fragmento_eliminado)
+        self.listado.error_occurred.connect(lambda msg: self.mostrar_error(f"Error al cargar fragmentos: {msg}"))
         self.setup_ui()
         self.cargar_entrevistas()
 
@@ -212,6 +218,7 @@ class AnalisisInfoScreen(QWidget):
         
         self.fragmentos_table.setSelectionBehavior(QTableWidget.SelectRows)
         self.fragmentos_table.setAlternatingRowColors(True)
+        self.fragmentos_table.setIconSize(QSize(64, 36))
         self.fragmentos_table.clicked.connect(self.on_fragmento_selected)
         
         self.fragmentos_table.setStyleSheet("""
@@ -290,7 +297,13 @@ class AnalisisInfoScreen(QWidget):
         self.details_info.setStyleSheet("line-height: 1.4;")
         self.details_info.setWordWrap(True)
         
+        # Tira de cuadros del fragmento (miniaturas en caché)
+        self.details_preview = QLabel("")
+        self.details_preview.setAlignment(Qt.AlignCenter)
+        self.details_preview.setMinimumHeight(60)
+        
         info_layout.addWidget(self.details_name)
+        info_layout.addWidget(self.details_preview)
         info_layout.addWidget(self.details_info)
         layout.addWidget(info_frame)
 
@@ -432,6 +445,7 @@ class AnalisisInfoScreen(QWidget):
         """Manejar selección de entrevista"""
         if texto == "-- Seleccione una entrevista --" or not texto:
             self.current_entrevista = None
+            self.listado.detener()
             self.fragmentos_data = []
             self.actualizar_tabla_fragmentos()
             self.btn_analizar.setEnabled(False)
@@ -445,102 +459,53 @@ class AnalisisInfoScreen(QWidget):
         self.btn_analizar.setEnabled(True)
 
     def cargar_fragmentos_entrevista(self, entrevista_id):
-        """Cargar fragmentos de una entrevista específica"""
-        try:
-            entrevista_dir = Path("data/fragmentos") / entrevista_id
-            if not entrevista_dir.exists():
-                self.mostrar_error(f"No se encuentra la carpeta de la entrevista {entrevista_id}")
-                return
-
-            fragmentos_files = list(entrevista_dir.glob("*.mp4"))
-            self.fragmentos_data = []
-
-            for frag_path in fragmentos_files:
-                try:
-                    stat = frag_path.stat()
-                    duration = self.obtener_duracion_video(frag_path)
-                    
-                    fragmento_info = {
-                        'path': frag_path,
-                        'name': frag_path.name,
-                        'duration': duration,
-                        'size': stat.st_size,
-                        'creation_time': datetime.fromtimestamp(stat.st_ctime),
-                        'modification_time': datetime.fromtimestamp(stat.st_mtime)
-                    }
-                    
-                    # Extraer información de la marca del nombre del archivo
-                    self.extraer_info_marca(fragmento_info, frag_path.name)
-                    
-                    self.fragmentos_data.append(fragmento_info)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error procesando {frag_path}: {str(e)}")
-                    continue
-
-            self.actualizar_tabla_fragmentos()
-            self.actualizar_estadisticas()
-
-        except Exception as e:
-            self.mostrar_error(f"Error al cargar fragmentos: {str(e)}")
-
-    def extraer_info_marca(self, fragmento_info, filename):
-        """Extraer información de la marca original desde el nombre del archivo y JSON."""
-        try:
-            name = filename.replace(".mp4", "")
-            parts = name.split("_")
-
-            # Buscar el último elemento (pregunta_id)
-            pregunta_id = parts[-1]
-            entrevista_id = "_".join(parts[1:-1])  # todo lo que esté entre "fragmento" y el último valor
-
-            fragmento_info["entrevista_id"] = entrevista_id
-            fragmento_info["pregunta_id"] = pregunta_id
+        """Cargar fragmentos de una entrevista específica (en segundo plano, por lotes)"""
+        entrevista_dir = Path("data/fragmentos") / entrevista_id
+        if not entrevista_dir.exists():
+            self.listado.detener()
+            self.mostrar_error(f"No se encuentra la carpeta de la entrevista {entrevista_id}")
+            return
 
-            # Buscar archivo de marcas
-            marcas_path = Path(f"data/marcas/marcas_{entrevista_id}.json")
-            if not marcas_path.exists():
-                self.logger.warning(f"No se encontró archivo de marcas para {entrevista_id}")
+        cache_miniaturas().cancelar_pendientes(self)
+        self.fragmentos_data = []
+        self.actualizar_tabla_fragmentos()
+        self.actualizar_estadisticas()
+        # La tabla se llena con on_fragmentos_listados y luego se mantiene al día
+        # con los cambios en la carpeta (on_fragmento_actualizado / on_fragmento_eliminado)
+        self.listado.cargar(entrevista_dir)
+
+    def on_fragmentos_listados(self, lote):
+        """Agregar a la tabla un lote de fragmentos listado en segundo plano"""
+        desde = len(self.fragmentos_data)
+        self.fragmentos_data.extend(lote)
+        self.actualizar_tabla_fragmentos(desde)
+        self.actualizar_estadisticas()
+
+    def on_fragmento_actualizado(self, info):
+        """Actualizar solo la fila de un fragmento que cambió en disco"""
+        for row, frag in enumerate(self.fragmentos_data):
+            if frag['path'] == info['path']:
+                self.fragmentos_data[row] = info
+                self.actualizar_tabla_fragmentos(row, row + 1)
+                self.actualizar_estadisticas()
                 return
 
-            with open(marcas_path, "r", encoding="utf-8") as f:
-                marcas_data = json.load(f)
-
-            # Buscar la marca con el mismo pregunta_id
-            for marca in marcas_data.get("marcas", []):
-                if str(marca.get("pregunta_id")) == str(pregunta_id):
-                    fragmento_info["marca_inicio"] = marca.get("inicio", "N/A")
-                    fragmento_info["marca_fin"] = marca.get("fin", "N/A")
-                    fragmento_info["marca_nota"] = marca.get("nota", "")
-                    break
-            else:
-                # Si no se encontró la marca
-                self.logger.warning(f"No se encontró marca para pregunta_id {pregunta_id} en {entrevista_id}")
-
-        except Exception as e:
-            self.logger.error(f"Error al extraer información de marca para {filename}: {e}")
-
-    def obtener_duracion_video(self, video_path):
-        """Obtener duración del video usando OpenCV"""
-        try:
-            cap = cv2.VideoCapture(str(video_path))
-            if cap.isOpened():
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-                cap.release()
-                
-                if fps > 0 and frame_count > 0:
-                    duration_seconds = frame_count / fps
-                    return self.formatear_duracion(duration_seconds)
-            return "N/A"
-        except:
-            return "N/A"
+    def on_fragmento_eliminado(self, ruta):
+        """Quitar de la tabla un fragmento borrado"""
+        for row, frag in enumerate(self.fragmentos_data):
+            if str(frag['path']) == ruta:
+                del self.fragmentos_data[row]
+                self.fragmentos_table.removeRow(row)
+                self.actualizar_tabla_fragmentos(row)  # reindexar las filas siguientes
+                self.actualizar_estadisticas()
+                return
 
-    def actualizar_tabla_fragmentos(self):
-        """Actualizar la tabla con los fragmentos cargados"""
+    def actualizar_tabla_fragmentos(self, desde=0, hasta=None):
+        """Actualizar la tabla con los fragmentos cargados (filas desde..hasta)"""
         self.fragmentos_table.setRowCount(len(self.fragmentos_data))
         
-        for row, frag in enumerate(self.fragmentos_data):
+        for row in range(desde, len(self.fragmentos_data) if hasta is None else hasta):
+            frag = self.fragmentos_data[row]
             # Nombre del fragmento
             name_item = QTableWidgetItem(frag['name'])
             name_item.setData(Qt.UserRole, row)
@@ -558,11 +523,26 @@ class AnalisisInfoScreen(QWidget):
             pregunta_item = QTableWidgetItem(frag.get('pregunta_id', 'N/A'))
             
             self.fragmentos_table.setItem(row, 0, name_item)
+            self.pedir_miniatura(frag)
             self.fragmentos_table.setItem(row, 1, duration_item)
             self.fragmentos_table.setItem(row, 2, size_item)
             self.fragmentos_table.setItem(row, 3, date_item)
             self.fragmentos_table.setItem(row, 4, pregunta_item)
 
+    def pedir_miniatura(self, frag):
+        """Poner el póster del fragmento como icono de su fila en cuanto esté disponible"""
+        ruta = frag['path']
+
+        def asignar(pixmap):
+            for row, actual in enumerate(self.fragmentos_data):
+                if actual['path'] == ruta:
+                    item = self.fragmentos_table.item(row, 0)
+                    if item is not None:
+                        item.setIcon(QIcon(pixmap))
+                    return
+
+        cache_miniaturas().solicitar(ruta, POSTER, asignar, solicitante=self)
+
     def actualizar_estadisticas(self):
         """Actualizar las estadísticas de la entrevista seleccionada"""
         if not self.current_entrevista or not self.fragmentos_data:
@@ -642,6 +622,7 @@ class AnalisisInfoScreen(QWidget):
         """Mostrar detalles del fragmento seleccionado"""
         # Información básica
         self.details_name.setText(f"🎬 {fragmento['name']}")
+        mostrar_miniatura(self.details_preview, fragmento['path'])
         
         basic_info = f"""
         📅 <b>Fecha de creación:</b> {fragmento['creation_time'].strftime("%Y-%m-%d %H:%M:%S")}<br>
@@ -661,17 +642,16 @@ class AnalisisInfoScreen(QWidget):
             marcas_path = Path(f"data/marcas/marcas_{entrevista_id}.json")
 
             if marcas_path.exists():
-                with open(marcas_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    for m in data.get("marcas", []):
-                        try:
-                            if int(m.get("pregunta_id")) == int(pregunta_id):
-                                marca_inicio = m.get("inicio", "N/A")
-                                marca_fin = m.get("fin", "N/A")
-                                marca_nota = m.get("nota", "No disponible")
-                                break
-                        except ValueError:
-                            continue
+                data = cargar_marcas(marcas_path)
+                for m in data.get("marcas", []):
+                    try:
+                        if int(m.get("pregunta_id")) == int(pregunta_id):
+                            marca_inicio = m.get("inicio", "N/A")
+                            marca_fin = m.get("fin", "N/A")
+                            marca_nota = m.get("nota", "No disponible")
+                            break
+                    except ValueError:
+                        continue
 
             else:
                 self.logger.warning(f"No se encontró archivo de marcas para {entrevista_id}")
@@ -13,6 +13,8 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QFont, QPixmap, QPainter
 
+from classes.catalogo_resultados import CatalogoResultados
+
 
 class AnalisisReporteScreen(QWidget):
     """Pantalla para mostrar reportes básicos de análisis de emociones"""
@@ -22,6 +24,7 @@ class AnalisisReporteScreen(QWidget):
         self.parent_window = parent
         self.data_context = data_context or {}
         self.resultados_dir = Path("data/resultados")
+        self.catalogo = CatalogoResultados(resultados_dir=self.resultados_dir)
         self.entrevistas_disponibles = []
         self.fragmentos_data = []
         self.setup_ui()
@@ -408,18 +411,17 @@ class AnalisisReporteScreen(QWidget):
                 self.summary_label.setText("❌ No existe el directorio de resultados")
                 return
 
-            # Buscar carpetas de entrevistas
-            self.entrevistas_disponibles = [d for d in self.resultados_dir.iterdir() if d.is_dir()]
+            # Entrevistas y número de análisis desde el catálogo
+            self.catalogo.reindexar()
+            self.entrevistas_disponibles = self.catalogo.entrevistas()
             
             self.entrevista_combo.clear()
             self.entrevista_combo.addItem("-- Seleccione una entrevista --")
             
             for entrevista in self.entrevistas_disponibles:
-                resultados = list(entrevista.glob("*.json"))
-                if resultados:
-                    self.entrevista_combo.addItem(
-                        f"{entrevista.name} ({len(resultados)} análisis)"
-                    )
+                self.entrevista_combo.addItem(
+                    f"{entrevista['id']} ({entrevista['num_preguntas']} análisis)"
+                )
 
             if len(self.entrevistas_disponibles) == 0:
                 self.summary_label.setText("ℹ️ No hay entrevistas con análisis disponibles")
@@ -451,38 +453,21 @@ class AnalisisReporteScreen(QWidget):
                 self.mostrar_error(f"No se encuentra la carpeta de resultados para {entrevista_id}")
                 return
 
-            resultados_files = list(entrevista_dir.glob("*.json"))
             self.fragmentos_data = []
-
-            for json_file in resultados_files:
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    fragmento_info = data['fragmento']
-                    analisis_info = data['analisis']
-                    resumen = analisis_info.get('resumen_emociones', {})
-                    
-                    # Crear información del fragmento
-                    fragmento_data = {
-                        'file_path': json_file,
-                        'name': fragmento_info.get('nombre', 'N/A'),
-                        'entrevista_id': fragmento_info.get('entrevista_id', 'N/A'),
-                        'pregunta_id': fragmento_info.get('pregunta_id', 'N/A'),
-                        'dominant_emotion': resumen.get('dominant_emotion', 'N/A'),
-                        'confidence': resumen.get('confidence', 0),
-                        'total_frames': analisis_info.get('total_frames_analizados', 0),
-                        'duration': fragmento_info.get('duration', 'N/A'),
-                        'fecha_analisis': analisis_info.get('fecha_analisis', 'N/A'),
-                        'avg_intensities': resumen.get('avg_intensities', {}),
-                        'modelo_utilizado': analisis_info.get('modelo_utilizado', 'N/A')
-                    }
-                    
-                    self.fragmentos_data.append(fragmento_data)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error procesando {json_file}: {str(e)}")
-                    continue
+            for fila in self.catalogo.fragmentos_de(entrevista_id, todos=True):
+                self.fragmentos_data.append({
+                    'file_path': Path(fila['ruta_resultado']),
+                    'name': fila['nombre_fragmento'] or 'N/A',
+                    'entrevista_id': entrevista_id,
+                    'pregunta_id': fila['pregunta_id'],
+                    'dominant_emotion': fila['emocion_dominante'] or 'N/A',
+                    'confidence': fila['confidence'] or 0,
+                    'total_frames': fila['total_frames'] or 0,
+                    'duration': fila['duracion'] or 'N/A',
+                    'fecha_analisis': fila['fecha_analisis'] or 'N/A',
+                    'avg_intensities': fila['intensidades'],
+                    'modelo_utilizado': fila['modelo'] or 'N/A'
+                })
 
             self.actualizar_tabla_resultados()
             self.actualizar_resumen()
@@ -17,6 +17,7 @@ from .utils.styles import (
 from .fragmento_screens.fragmento_info_screen import FragmentoInfoScreen
 from .fragmento_screens.fragmento_generar_screen import FragmentoGenerarScreen
 from .fragmento_screens.fragmento_fragmentos_screen import FragmentoFragmentosScreen
+from classes.diario_marcas import cargar_marcas
 
 # 🔹 Definir paleta de colores verde agrícola completa
 AGRICULTURAL_GREEN_PALETTE = {
@@ -74,7 +75,7 @@ class FragmentoMainWindow(QMainWindow):
             try:
                 from classes.marcas import Marcas  
                 from classes.fragmento import Fragmento 
-                import json, os
+                import os
                 from datetime import datetime
                 import cv2
 
@@ -106,8 +107,7 @@ class FragmentoMainWindow(QMainWindow):
                     video_id = video_file.stem.replace("entrevista_", "")
                     marcas_file = marcas_path / f"marcas_{video_id}.json"
                     if marcas_file.exists():
-                        with open(marcas_file, "r", encoding="utf-8") as f:
-                            data["marcas"][video_id] = json.load(f).get("marcas", [])
+                        data["marcas"][video_id] = cargar_marcas(marcas_file).get("marcas", [])
                     else:
                         data["marcas"][video_id] = []
 
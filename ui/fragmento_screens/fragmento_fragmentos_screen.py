@@ -1,8 +1,6 @@
 import os
-import json
 import logging
 from pathlib import Path
-from datetime import datetime
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget,
     QTableWidgetItem, QHeaderView, QPushButton, QFrame,
@@ -10,11 +8,15 @@ from PySide6.QtWidgets import (
     QComboBox, QListWidget, QListWidgetItem, QGroupBox,
     QFileDialog, QDialog, QDialogButtonBox
 )
-from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QFont, QPixmap, QPainter
-import cv2
+from PySide6.QtCore import Qt, QTimer, QSize
+from PySide6.QtGui import QFont, QPixmap, QPainter, QIcon
 import subprocess
 
+from classes.diario_marcas import cargar_marcas
+from classes.fragmento import Fragmento
+from ui.utils.listado_fragmentos import ListadoFragmentos
+from ui.utils.miniaturas_cache import POSTER, cache_miniaturas, mostrar_miniatura
+
 
 class DeleteConfirmationDialog(QDialog):
     """Diálogo de confirmación para eliminar fragmentos"""
@@ -56,6 +58,11 @@ class FragmentoFragmentosScreen(QWidget):
         self.parent_window = parent
         self.current_entrevista = None
         self.fragmentos_data = []
+        self.listado = ListadoFragmentos(self.formatear_duracion, logger=self.logger, parent=self)
+        self.listado.lote_listo.connect(self.on_fragmentos_listados)
+        self.listado.fragmento_actualizado.connect(self.on_fragmento_actualizado)
+        self.listado.fragmento_eliminado.connect(self.on_fragmento_eliminado)
+        self.listado.error_occurred.connect(lambda msg: self.mostrar_error(f"Error al cargar fragmentos: {msg}"))
         self.setup_ui()
         self.cargar_entrevistas()
 
@@ -236,6 +243,7 @@ class FragmentoFragmentosScreen(QWidget):
         
         self.fragmentos_table.setSelectionBehavior(QTableWidget.SelectRows)
         self.fragmentos_table.setAlternatingRowColors(True)
+        self.fragmentos_table.setIconSize(QSize(64, 36))
         self.fragmentos_table.clicked.connect(self.on_fragmento_selected)
         
         self.fragmentos_table.setStyleSheet("""
@@ -532,6 +540,7 @@ class FragmentoFragmentosScreen(QWidget):
         """Manejar selección de entrevista"""
         if texto == "-- Seleccione una entrevista --" or not texto:
             self.current_entrevista = None
+            self.listado.detener()
             self.fragmentos_data = []
             self.actualizar_tabla_fragmentos()
             self.btn_delete_all.setEnabled(False)
@@ -543,102 +552,53 @@ class FragmentoFragmentosScreen(QWidget):
         self.cargar_fragmentos_entrevista(entrevista_id)
 
     def cargar_fragmentos_entrevista(self, entrevista_id):
-        """Cargar fragmentos de una entrevista específica"""
-        try:
-            entrevista_dir = Path("data/fragmentos") / entrevista_id
-            if not entrevista_dir.exists():
-                self.mostrar_error(f"No se encuentra la carpeta de la entrevista {entrevista_id}")
-                return
-
-            fragmentos_files = list(entrevista_dir.glob("*.mp4"))
-            self.fragmentos_data = []
-
-            for frag_path in fragmentos_files:
-                try:
-                    stat = frag_path.stat()
-                    duration = self.obtener_duracion_video(frag_path)
-                    
-                    fragmento_info = {
-                        'path': frag_path,
-                        'name': frag_path.name,
-                        'duration': duration,
-                        'size': stat.st_size,
-                        'creation_time': datetime.fromtimestamp(stat.st_ctime),
-                        'modification_time': datetime.fromtimestamp(stat.st_mtime)
-                    }
-                    
-                    # Extraer información de la marca del nombre del archivo
-                    self.extraer_info_marca(fragmento_info, frag_path.name)
-                    
-                    self.fragmentos_data.append(fragmento_info)
-                    
-                except Exception as e:
-                    print(f"Error procesando {frag_path}: {str(e)}")
-                    continue
-
-            self.actualizar_tabla_fragmentos()
-            self.btn_delete_all.setEnabled(len(self.fragmentos_data) > 0)
-
-        except Exception as e:
-            self.mostrar_error(f"Error al cargar fragmentos: {str(e)}")
-
-    def extraer_info_marca(self, fragmento_info, filename):
-        """Extraer información de la marca original desde el nombre del archivo y JSON."""
-        try:
-            name = filename.replace(".mp4", "")
-            parts = name.split("_")
-
-            # Buscar el último elemento (pregunta_id)
-            pregunta_id = parts[-1]
-            entrevista_id = "_".join(parts[1:-1])  # todo lo que esté entre "fragmento" y el último valor
-
-            fragmento_info["entrevista_id"] = entrevista_id
-            fragmento_info["pregunta_id"] = pregunta_id
+        """Cargar fragmentos de una entrevista específica (en segundo plano, por lotes)"""
+        entrevista_dir = Path("data/fragmentos") / entrevista_id
+        if not entrevista_dir.exists():
+            self.listado.detener()
+            self.mostrar_error(f"No se encuentra la carpeta de la entrevista {entrevista_id}")
+            return
 
-            # Buscar archivo de marcas
-            marcas_path = Path(f"data/marcas/marcas_{entrevista_id}.json")
-            if not marcas_path.exists():
-                self.logger.warning(f"No se encontró archivo de marcas para {entrevista_id}")
+        cache_miniaturas().cancelar_pendientes(self)
+        self.fragmentos_data = []
+        self.actualizar_tabla_fragmentos()
+        self.btn_delete_all.setEnabled(len(self.fragmentos_data) > 0)
+        # La tabla se llena con on_fragmentos_listados y luego se mantiene al día
+        # con los cambios en la carpeta (on_fragmento_actualizado / on_fragmento_eliminado)
+        self.listado.cargar(entrevista_dir)
+
+    def on_fragmentos_listados(self, lote):
+        """Agregar a la tabla un lote de fragmentos listado en segundo plano"""
+        desde = len(self.fragmentos_data)
+        self.fragmentos_data.extend(lote)
+        self.actualizar_tabla_fragmentos(desde)
+        self.btn_delete_all.setEnabled(len(self.fragmentos_data) > 0)
+
+    def on_fragmento_actualizado(self, info):
+        """Actualizar solo la fila de un fragmento que cambió en disco"""
+        for row, frag in enumerate(self.fragmentos_data):
+            if frag['path'] == info['path']:
+                self.fragmentos_data[row] = info
+                self.actualizar_tabla_fragmentos(row, row + 1)
+                self.btn_delete_all.setEnabled(len(self.fragmentos_data) > 0)
                 return
 
-            with open(marcas_path, "r", encoding="utf-8") as f:
-                marcas_data = json.load(f)
-
-            # Buscar la marca con el mismo pregunta_id
-            for marca in marcas_data.get("marcas", []):
-                if str(marca.get("pregunta_id")) == str(pregunta_id):
-                    fragmento_info["marca_inicio"] = marca.get("inicio", "N/A")
-                    fragmento_info["marca_fin"] = marca.get("fin", "N/A")
-                    fragmento_info["marca_nota"] = marca.get("nota", "")
-                    break
-            else:
-                # Si no se encontró la marca
-                self.logger.warning(f"No se encontró marca para pregunta_id {pregunta_id} en {entrevista_id}")
-
-        except Exception as e:
-            self.logger.error(f"Error al extraer información de marca para {filename}: {e}")
-
-    def obtener_duracion_video(self, video_path):
-        """Obtener duración del video usando OpenCV"""
-        try:
-            cap = cv2.VideoCapture(str(video_path))
-            if cap.isOpened():
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-                cap.release()
-                
-                if fps > 0 and frame_count > 0:
-                    duration_seconds = frame_count / fps
-                    return self.formatear_duracion(duration_seconds)
-            return "N/A"
-        except:
-            return "N/A"
+    def on_fragmento_eliminado(self, ruta):
+        """Quitar de la tabla un fragmento borrado"""
+        for row, frag in enumerate(self.fragmentos_data):
+            if str(frag['path']) == ruta:
+                del self.fragmentos_data[row]
+                self.fragmentos_table.removeRow(row)
+                self.actualizar_tabla_fragmentos(row)  # reindexar las filas siguientes
+                self.btn_delete_all.setEnabled(len(self.fragmentos_data) > 0)
+                return
 
-    def actualizar_tabla_fragmentos(self):
-        """Actualizar la tabla con los fragmentos cargados"""
+    def actualizar_tabla_fragmentos(self, desde=0, hasta=None):
+        """Actualizar la tabla con los fragmentos cargados (filas desde..hasta)"""
         self.fragmentos_table.setRowCount(len(self.fragmentos_data))
         
-        for row, frag in enumerate(self.fragmentos_data):
+        for row in range(desde, len(self.fragmentos_data) if hasta is None else hasta):
+            frag = self.fragmentos_data[row]
             # Nombre del fragmento
             name_item = QTableWidgetItem(frag['name'])
             name_item.setData(Qt.UserRole, row)
@@ -653,6 +613,7 @@ class FragmentoFragmentosScreen(QWidget):
             date_item = QTableWidgetItem(frag['creation_time'].strftime("%Y-%m-%d %H:%M"))
             
             self.fragmentos_table.setItem(row, 0, name_item)
+            self.pedir_miniatura(frag)
             self.fragmentos_table.setItem(row, 1, duration_item)
             self.fragmentos_table.setItem(row, 2, size_item)
             self.fragmentos_table.setItem(row, 3, date_item)
@@ -666,6 +627,20 @@ class FragmentoFragmentosScreen(QWidget):
                 f"Tamaño total: {self.formatear_tamaño_archivo(total_size)}"
             )
 
+    def pedir_miniatura(self, frag):
+        """Poner el póster del fragmento como icono de su fila en cuanto esté disponible"""
+        ruta = frag['path']
+
+        def asignar(pixmap):
+            for row, actual in enumerate(self.fragmentos_data):
+                if actual['path'] == ruta:
+                    item = self.fragmentos_table.item(row, 0)
+                    if item is not None:
+                        item.setIcon(QIcon(pixmap))
+                    return
+
+        cache_miniaturas().solicitar(ruta, POSTER, asignar, solicitante=self)
+
     def on_fragmento_selected(self, index):
         """Manejar selección de fragmento en la tabla"""
         row = index.row()
@@ -676,10 +651,12 @@ class FragmentoFragmentosScreen(QWidget):
             self.btn_delete.setEnabled(True)
             self.btn_preview_play.setEnabled(True)
             self.preview_label.setText(f"Fragmento seleccionado: {fragmento['name']}")
+            mostrar_miniatura(self.preview_label, fragmento['path'])
             self.logger.info(f"Fragmento seleccionado: {fragmento['name']}")
         else:
             self.btn_preview_play.setEnabled(False)
             self.preview_label.setText("La previsualización de video se mostrará aquí")
+            self.preview_label.setProperty("ruta_miniatura", "")
 
     def mostrar_detalles_fragmento(self, fragmento):
         """Mostrar detalles del fragmento seleccionado"""
@@ -704,17 +681,16 @@ class FragmentoFragmentosScreen(QWidget):
             marcas_path = Path(f"data/marcas/marcas_{entrevista_id}.json")
 
             if marcas_path.exists():
-                with open(marcas_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    for m in data.get("marcas", []):
-                        try:
-                            if int(m.get("pregunta_id")) == int(pregunta_id):
-                                marca_inicio = m.get("inicio", "N/A")
-                                marca_fin = m.get("fin", "N/A")
-                                marca_nota = m.get("nota", "No disponible")
-                                break
-                        except ValueError:
-                            continue
+                data = cargar_marcas(marcas_path)
+                for m in data.get("marcas", []):
+                    try:
+                        if int(m.get("pregunta_id")) == int(pregunta_id):
+                            marca_inicio = m.get("inicio", "N/A")
+                            marca_fin = m.get("fin", "N/A")
+                            marca_nota = m.get("nota", "No disponible")
+                            break
+                    except ValueError:
+                        continue
 
             else:
                 self.logger.warning(f"No se encontró archivo de marcas para {entrevista_id}")
@@ -746,8 +722,10 @@ class FragmentoFragmentosScreen(QWidget):
         if 0 <= current_row < len(self.fragmentos_data):
             fragmento = self.fragmentos_data[current_row]
             try:
-                self._abrir_video(fragmento['path'])
-                self.logger.info(f"Reproduciendo fragmento (previsualización): {fragmento['path']}")
+                # La previsualización usa el proxy de baja resolución si fue generado
+                ruta = Fragmento.ruta_lectura(fragmento['path'])
+                self._abrir_video(ruta)
+                self.logger.info(f"Reproduciendo fragmento (previsualización): {ruta}")
             except Exception as e:
                 self.logger.error(f"No se pudo abrir el video: {str(e)}")
                 self.mostrar_error(f"No se pudo abrir el video: {str(e)}")
@@ -782,7 +760,8 @@ class FragmentoFragmentosScreen(QWidget):
             if reply == QMessageBox.Yes:
                 try:
                     fragmento['path'].unlink()  # Eliminar archivo
-                    self.cargar_fragmentos_entrevista(self.current_entrevista)  # Recargar
+                    self._eliminar_proxy(fragmento['path'])
+                    # La fila se quita sola: el listado vigila la carpeta (on_fragmento_eliminado)
                     QMessageBox.information(self, "Éxito", "Fragmento eliminado correctamente")
                 except Exception as e:
                     self.mostrar_error(f"Error al eliminar fragmento: {str(e)}")
@@ -801,12 +780,16 @@ class FragmentoFragmentosScreen(QWidget):
                 for fragmento in self.fragmentos_data:
                     try:
                         fragmento['path'].unlink()
+                        self._eliminar_proxy(fragmento['path'])
                         deleted_count += 1
                     except:
                         continue
                 
                 # Intentar eliminar la carpeta si está vacía
                 try:
+                    proxy_dir = Fragmento.ruta_proxy_de(entrevista_dir / "x.mp4").parent
+                    if proxy_dir.exists() and not any(proxy_dir.iterdir()):
+                        proxy_dir.rmdir()
                     if not any(entrevista_dir.iterdir()):
                         entrevista_dir.rmdir()
                 except:
@@ -819,6 +802,7 @@ class FragmentoFragmentosScreen(QWidget):
                 )
                 
                 # Recargar interfaz
+                self.listado.detener()
                 self.cargar_entrevistas()
                 self.current_entrevista = None
                 self.fragmentos_data = []
@@ -827,6 +811,12 @@ class FragmentoFragmentosScreen(QWidget):
             except Exception as e:
                 self.mostrar_error(f"Error al eliminar fragmentos: {str(e)}")
 
+    def _eliminar_proxy(self, ruta_fragmento):
+        """Eliminar el proxy asociado a un fragmento, si existe."""
+        proxy = Fragmento.ruta_proxy_de(ruta_fragmento)
+        if proxy.exists():
+            proxy.unlink()
+
     def formatear_duracion(self, seconds):
         """Formatear duración en segundos a formato legible"""
         if seconds == "N/A":
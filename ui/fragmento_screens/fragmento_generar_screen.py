@@ -1,21 +1,24 @@
 import logging
 import os
-import json
 from pathlib import Path
 from datetime import datetime
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget,
     QTableWidgetItem, QHeaderView, QPushButton, QFrame,
-    QTextEdit, QSplitter, QMessageBox, QProgressBar
+    QTextEdit, QSplitter, QMessageBox, QProgressBar, QComboBox
 )
 from PySide6.QtCore import Qt, QThread, Signal
 from PySide6.QtGui import QFont, QColor
-import cv2
 import traceback
 
 # Importar clases del proyecto
 from classes.marcas import Marcas
-from classes.fragmento import Fragmento
+from classes.diario_marcas import cargar_marcas
+from classes.fragmento import Fragmento, PERFILES_PROXY
+from utils.progreso import MedidorProgreso
+from video_io.indice_frames import IndiceFrames
+from video_io.metadatos import servicio_metadatos
+from ui.utils.planificador_qt import servicio_planificador
 
 
 class GenerationThread(QThread):
@@ -25,11 +28,12 @@ class GenerationThread(QThread):
     finished_with_success = Signal(int, int)
     error_occurred = Signal(str)
 
-    def __init__(self, video_path, marcas_obj, fragmentos_dir):
+    def __init__(self, video_path, marcas_obj, fragmentos_dir, proxy=None):
         super().__init__()
         self.video_path = video_path
         self.marcas_obj = marcas_obj
         self.fragmentos_dir = fragmentos_dir
+        self.proxy = proxy
         self.logger = logging.getLogger(__name__)
 
     def run(self):
@@ -43,6 +47,18 @@ class GenerationThread(QThread):
                 self.finished_with_success.emit(0, 0)
                 return
 
+            # El progreso se mide en segundos de video a cortar, no en fragmentos terminados
+            duracion_total = sum(
+                m.fin - m.inicio for m in marcas if m.fin is not None and m.fin > m.inicio
+            )
+            medidor = MedidorProgreso(duracion_total)
+            offset = 0.0
+
+            # Índice de frames grabado junto al video: alinea marcas con los PTS reales
+            indice = IndiceFrames.cargar_para_video(self.video_path)
+            if indice is not None:
+                self.log_message.emit(f"🎯 Usando índice de frames ({len(indice)} frames) para alinear los cortes")
+
             for idx, marca in enumerate(marcas, 1):
                 try:
                     # Validación de tiempos
@@ -54,7 +70,12 @@ class GenerationThread(QThread):
 
                     # Generación del fragmento
                     fragmento = Fragmento(marca, self.fragmentos_dir)
-                    fragmento.generar_fragmento(self.video_path)
+                    fragmento.generar_fragmento(
+                        self.video_path,
+                        on_progreso=lambda t, base=offset: self._reportar_progreso(medidor, base + t),
+                        proxy=self.proxy,
+                        indice=indice,
+                    )
                     msg = f"✅ Fragmento generado correctamente: {fragmento.ruta_fragmento.name}"
                     self.log_message.emit(msg)
                     self.logger.info(msg)
@@ -66,8 +87,10 @@ class GenerationThread(QThread):
                     self.logger.error(error_msg)
                     self.logger.debug(traceback.format_exc())
 
-                # Emitir progreso
-                self.progress_updated.emit(int((idx / total) * 100))
+                # Avanzar al final del fragmento aunque ffmpeg no haya reportado el último tramo
+                if marca.fin is not None and marca.fin > marca.inicio:
+                    offset += marca.fin - marca.inicio
+                    self._reportar_progreso(medidor, offset)
 
             self.progress_updated.emit(100)
             self.finished_with_success.emit(exitos, total)
@@ -79,6 +102,14 @@ class GenerationThread(QThread):
             self.logger.debug(traceback.format_exc())
             self.error_occurred.emit(error_msg)
 
+    def _reportar_progreso(self, medidor, posicion):
+        """Emite porcentaje, throughput y ETA a partir de los segundos ya cortados."""
+        estado = medidor.avanzar(posicion)
+        if medidor.cambio_porcentaje():
+            self.progress_updated.emit(estado.porcentaje)
+        if medidor.debe_informar():
+            self.log_message.emit(f"⏳ {estado.describir()}")
+
 class FragmentoGenerarScreen(QWidget):
     """Pantalla para generar fragmentos desde marcas de video"""
     def __init__(self, logger=None, data_context=None, parent=None):
@@ -91,6 +122,7 @@ class FragmentoGenerarScreen(QWidget):
         self.marcas_obj = None
         self.setup_ui()
         self.load_videos_data()
+        servicio_planificador().trabajo_actualizado.connect(self.on_trabajo_actualizado)
 
     # ------------------------------------------------------------------
     # UI Principal
@@ -282,6 +314,20 @@ class FragmentoGenerarScreen(QWidget):
         """)
         layout.addWidget(self.marks_table)
 
+        # Proxy de baja resolución (se genera en la misma pasada de ffmpeg)
+        proxy_layout = QHBoxLayout()
+        proxy_label = QLabel("🪶 Proxy para previsualización/análisis:")
+        proxy_label.setStyleSheet("color: black;")
+        self.proxy_combo = QComboBox()
+        self.proxy_combo.addItem("Sin proxy", None)
+        for perfil, (altura, fps) in PERFILES_PROXY.items():
+            self.proxy_combo.addItem(f"{perfil} @ {fps} fps", perfil)
+        self.proxy_combo.setStyleSheet("color: black; background-color: white;")
+        proxy_layout.addWidget(proxy_label)
+        proxy_layout.addWidget(self.proxy_combo)
+        proxy_layout.addStretch()
+        layout.addLayout(proxy_layout)
+
         # Botón generar
         self.btn_generar = QPushButton("✂️ Generar Todos los Fragmentos")
         self.btn_generar.setEnabled(False)
@@ -296,6 +342,25 @@ class FragmentoGenerarScreen(QWidget):
             QPushButton:disabled { background: #9e9e9e; color: #ccc; }
         """)
         layout.addWidget(self.btn_generar)
+
+        # Corte + análisis + índice + gráficos en segundo plano (planificador de trabajos)
+        self.btn_segundo_plano = QPushButton("🗓️ Procesar en segundo plano")
+        self.btn_segundo_plano.setEnabled(False)
+        self.btn_segundo_plano.clicked.connect(self.procesar_en_segundo_plano)
+        self.btn_segundo_plano.setStyleSheet("""
+            QPushButton {
+                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                    stop:0 #42a5f5, stop:1 #1e88e5);
+                color: white; border-radius: 12px;
+                padding: 12px 24px; font-weight: bold;
+            }
+            QPushButton:disabled { background: #9e9e9e; color: #ccc; }
+        """)
+        layout.addWidget(self.btn_segundo_plano)
+
+        self.planificador_label = QLabel("")
+        self.planificador_label.setStyleSheet("color: #1b5e20;")
+        layout.addWidget(self.planificador_label)
         layout.addStretch()
         return frame
 
@@ -340,6 +405,8 @@ class FragmentoGenerarScreen(QWidget):
                 self.videos_data = []
                 return
 
+            # Duraciones de todos los videos: caché o sondeo en paralelo
+            servicio_metadatos().precargar(video_files)
             self.videos_data = [self.process_video_file(v) for v in video_files if v.exists()]
             self.update_videos_table()
             self.status_label.setText(f"✅ {len(self.videos_data)} videos cargados")
@@ -371,11 +438,8 @@ class FragmentoGenerarScreen(QWidget):
 
     def get_video_duration(self, video_path: Path):
         try:
-            cap = cv2.VideoCapture(str(video_path))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-            cap.release()
-            return f"{int(frames/fps//60)}:{int(frames/fps%60):02d}" if fps > 0 else "N/A"
+            segundos = servicio_metadatos().duracion(video_path)
+            return f"{int(segundos//60)}:{int(segundos%60):02d}" if segundos else "N/A"
         except Exception:
             return "N/A"
 
@@ -386,8 +450,7 @@ class FragmentoGenerarScreen(QWidget):
             if not marks_path.exists():
                 return {'count': 0, 'details': [], 'entrevista_id': entrevista_id}
 
-            with open(marks_path, 'r', encoding='utf-8') as f:
-                marks_data = json.load(f)
+            marks_data = cargar_marcas(marks_path)
 
             details = []
             for m in marks_data.get('marcas', []):
@@ -443,7 +506,9 @@ class FragmentoGenerarScreen(QWidget):
             self.current_video = video
             self.show_video_details(video)
             self.btn_generar.setEnabled(video['marks_count'] > 0)
+            self.btn_segundo_plano.setEnabled(video['marks_count'] > 0)
             self.load_marcas_object(video)
+            self.actualizar_estado_planificador()
 
     def show_video_details(self, video):
         self.video_info_label.setText(
@@ -493,7 +558,11 @@ class FragmentoGenerarScreen(QWidget):
         self.log_output.clear()
         self.log_output.append(f"🚀 Iniciando generación de fragmentos para {self.current_video['name']}")
 
-        self.thread = GenerationThread(self.current_video['path'], self.marcas_obj, fragmentos_dir)
+        proxy = self.proxy_combo.currentData()
+        if proxy:
+            self.log_output.append(f"🪶 Se generarán proxies {proxy} junto a cada fragmento")
+
+        self.thread = GenerationThread(self.current_video['path'], self.marcas_obj, fragmentos_dir, proxy=proxy)
         self.thread.progress_updated.connect(self.progress.setValue)
         self.thread.log_message.connect(self.log_output.append)
         self.thread.finished_with_success.connect(self.on_generation_finished)
@@ -501,6 +570,41 @@ class FragmentoGenerarScreen(QWidget):
         self.thread.start()
         self.btn_generar.setEnabled(False)
 
+    def procesar_en_segundo_plano(self):
+        """Encola corte, análisis, indexado y gráficos de la entrevista en el planificador."""
+        if not self.current_video or not self.marcas_obj:
+            self.show_warning("Seleccione un video válido con marcas.")
+            return
+        modelos = sorted(Path("ml").glob("*.h5")) + sorted(Path("ml").glob("*.keras"))
+        if not modelos:
+            self.show_error("❌ No se encontraron modelos en la carpeta ml/")
+            return
+
+        entrevista_id = self.current_video['entrevista_id']
+        try:
+            pendientes = servicio_planificador().encolar_entrevista(
+                entrevista_id, self.current_video['path'], self.marcas_obj.ruta_json, modelos[0],
+                proxy=self.proxy_combo.currentData(),
+            )
+        except Exception as e:
+            self.show_error(f"No se pudo encolar la entrevista {entrevista_id}: {e}")
+            return
+
+        self.log_output.append(f"🗓️ {pendientes} trabajos encolados para {entrevista_id} (modelo {modelos[0].name})")
+        self.actualizar_estado_planificador()
+
+    def on_trabajo_actualizado(self, trabajo):
+        if self.current_video and trabajo['entrevista_id'] == self.current_video['entrevista_id']:
+            if trabajo['estado'] == 'error':
+                self.log_output.append(f"❌ {trabajo['id']}: {trabajo['error']}")
+            self.actualizar_estado_planificador()
+
+    def actualizar_estado_planificador(self):
+        if not self.current_video:
+            self.planificador_label.setText("")
+            return
+        self.planificador_label.setText(servicio_planificador().describir(self.current_video['entrevista_id']))
+
     def on_generation_finished(self, exitos, total):
         msg_text = f"🏁 Generación completada: {exitos}/{total} fragmentos creados."
         self.log_output.append(msg_text)
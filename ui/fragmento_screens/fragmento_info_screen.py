@@ -1,6 +1,5 @@
 import logging
 import os
-import json
 from pathlib import Path
 from datetime import datetime
 from PySide6.QtWidgets import (
@@ -10,12 +9,13 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, QTimer, QSize
 from PySide6.QtGui import QFont, QIcon, QPixmap, QPainter
-import cv2
 import subprocess
 
 # Importar las clases de marcas
 from classes.marca import Marca
 from classes.marcas import Marcas
+from classes.diario_marcas import cargar_marcas
+from video_io.metadatos import servicio_metadatos
 
 
 class FragmentoInfoScreen(QWidget):
@@ -387,6 +387,9 @@ class FragmentoInfoScreen(QWidget):
 
             self.videos_data = []
             self.status_label.setText(f"Procesando {len(video_files)} videos...")
+
+            # Duraciones de todos los videos: caché o sondeo en paralelo
+            servicio_metadatos().precargar(video_files)
             
             for i, video_file in enumerate(video_files):
                 try:
@@ -434,17 +437,11 @@ class FragmentoInfoScreen(QWidget):
             return None
 
     def get_video_duration(self, video_path: Path):
-        """Obtener la duración del video usando OpenCV"""
+        """Obtener la duración del video desde el servicio de metadatos"""
         try:
-            cap = cv2.VideoCapture(str(video_path))
-            if cap.isOpened():
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-                cap.release()
-                
-                if fps > 0 and frame_count > 0:
-                    duration_seconds = frame_count / fps
-                    return self.format_duration(duration_seconds)
+            duration_seconds = servicio_metadatos().duracion(video_path)
+            if duration_seconds:
+                return self.format_duration(duration_seconds)
             return "N/A"
         except:
             return "N/A"
@@ -461,9 +458,8 @@ class FragmentoInfoScreen(QWidget):
             if not marks_path.exists():
                 return {'count': 0, 'details': [], 'entrevista_id': entrevista_id}
             
-            # Cargar marcas desde JSON
-            with open(marks_path, 'r', encoding='utf-8') as f:
-                marks_data = json.load(f)
+            # Cargar marcas desde JSON (snapshot más diario de cambios)
+            marks_data = cargar_marcas(marks_path)
             
             marks_details = []
             for marca in marks_data.get('marcas', []):
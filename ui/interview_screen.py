@@ -19,6 +19,7 @@ from classes.entrevista_preguntas import EntrevistaPreguntas
 from classes.marca import Marca
 from classes.marcas import Marcas
 from video_io.video import obtener_capturador, CapturadorVideo
+from video_io.captura import SistemaCaptura
 
 
 # ---- Bridge Python ↔ JS ----
@@ -61,6 +62,7 @@ class InterviewScreen(QWidget):
         
         # Core logic
         self.entrevista = None
+        self.trabajo_final = None  # TrabajoFinalizacion en curso tras detener la grabación
         self.preguntas = EntrevistaPreguntas()
         self.categorias = list(self.preguntas.preguntas.keys())
         self.categoria_idx = 0
@@ -146,6 +148,14 @@ class InterviewScreen(QWidget):
         self.lbl_video.setStyleSheet("background: black; color: white;")
         right_layout.addWidget(self.lbl_video, 3)
 
+        self.lbl_captura = QLabel("")
+        self.lbl_captura.setStyleSheet("font-size: 11px; color: #555;")
+        right_layout.addWidget(self.lbl_captura)
+
+        self.lbl_cola = QLabel("")
+        self.lbl_cola.setStyleSheet("font-size: 11px; color: #555;")
+        right_layout.addWidget(self.lbl_cola)
+
         layout.addLayout(right_layout, 5)
 
         # Conectar la señal updateData a un slot para reenviar (bridge ya inicializado)
@@ -157,38 +167,81 @@ class InterviewScreen(QWidget):
         self.btn_fin.clicked.connect(self.marcar_fin)
         self.btn_siguiente.clicked.connect(self.siguiente_pregunta)
 
-        # Cámara para preview
+        # Cámara: la lectura y la codificación corren en hilos propios (SistemaCaptura);
+        # el timer de la UI solo pinta el último frame disponible.
         self.cap = cv2.VideoCapture(0)
         if not self.cap.isOpened():
             QMessageBox.critical(self, "Error", "No se pudo abrir la cámara")
             sys.exit(1)
+        self._preview_size = (self.lbl_video.width(), self.lbl_video.height())
+        self._preview_seq = -1
+        self.captura = SistemaCaptura(self.cap, fps=30.0, procesar_preview=self._preparar_preview)
+        self.captura.iniciar()
 
         self.timer = QTimer()
         self.timer.timeout.connect(self.mostrar_frame)
         self.timer.start(33)  # Aproximadamente 30 FPS
 
+        # Estado de los cortes en segundo plano (sigue activo al detener la grabación)
+        self.timer_cola = QTimer()
+        self.timer_cola.timeout.connect(self.actualizar_estado_cola)
+        self.timer_cola.start(500)
+
         self.actualizar_pregunta()
 
+    def _preparar_preview(self, frame):
+        """Se ejecuta en el hilo de captura: conversión a RGB y escalado a QImage."""
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w, ch = frame_rgb.shape
+        qimg = QImage(frame_rgb.data, w, h, ch * w, QImage.Format_RGB888)
+        ancho, alto = max(self._preview_size[0], 1), max(self._preview_size[1], 1)
+        # La QImage apunta al buffer de numpy, que se libera al salir: se entrega
+        # siempre una copia (scaled() al mismo tamaño no copia los píxeles)
+        if (ancho, alto) == (w, h):
+            return qimg.copy()
+        return qimg.scaled(ancho, alto)
+
     def mostrar_frame(self):
-        ret, frame = self.cap.read()
-        if ret:
-            # Convertir para preview
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = frame_rgb.shape
-            qimg = QImage(frame_rgb.data, w, h, ch * w, QImage.Format_RGB888)
-            pix = QPixmap.fromImage(qimg)
-            self.lbl_video.setPixmap(pix.scaled(self.lbl_video.size()))
-
-            # Procesar frame para grabación
-            if self.is_recording:
-                self.capturador.procesar_frame(frame)
+        self._preview_size = (self.lbl_video.width(), self.lbl_video.height())
+        seq, qimg = self.captura.ultimo_preview()
+        if qimg is None or seq == self._preview_seq:
+            return
+        self._preview_seq = seq
+        self.lbl_video.setPixmap(QPixmap.fromImage(qimg))
 
     def actualizar_cronometro(self):
         self.tiempo_inicio += 1
         minutos = self.tiempo_inicio // 60
         segundos = self.tiempo_inicio % 60
         self.lbl_cronometro.setText(f"{minutos:02d}:{segundos:02d}")
+        if self.captura.grabando:
+            self.lbl_captura.setText(f"🎞️ {self.captura.estadisticas().describir(self.captura.buffer.capacidad)}")
     
+    def actualizar_estado_cola(self):
+        if self.trabajo_final is not None:
+            fraccion, mensaje = self.trabajo_final.progreso()
+            self.lbl_cola.setText(f"⏳ Finalizando {int(fraccion * 100)}% | {mensaje}")
+            if self.trabajo_final.done():
+                self._finalizacion_terminada()
+        elif self.entrevista is not None:
+            self.lbl_cola.setText(self.entrevista.cola.estado().describir())
+
+    def _finalizacion_terminada(self):
+        trabajo, self.trabajo_final = self.trabajo_final, None
+        self.btn_grabar.setEnabled(True)
+        error = trabajo.exception()
+        if error is not None:
+            QMessageBox.critical(self, "Error", f"No se pudo finalizar la entrevista: {error}")
+            return
+        stats = self.entrevista.estadisticas_captura or self.captura.estadisticas()
+        texto = f"🎞️ {stats.describir(self.captura.buffer.capacidad)}"
+        deriva = self.entrevista.deriva
+        if deriva and deriva.get("frames"):
+            texto += f" | deriva máx {deriva['deriva_max_ms']:.0f} ms"
+        self.lbl_captura.setText(texto)
+        self.lbl_cola.setText(f"✅ Entrevista finalizada | {self.entrevista.cola.estado().describir()}")
+        print("Entrevista finalizada")
+
     def on_update_data(self, data):
         """Reenviar los datos recibidos desde controls.html al entrevistado"""
         if hasattr(self, "entrevistado_window") and self.entrevistado_window:
@@ -242,7 +295,9 @@ class InterviewScreen(QWidget):
                 self.id = f"{date_part}_{num_part}"
                 self.output_file = videos_path / entrevista_id
                 self.output_file.parent.mkdir(parents=True, exist_ok=True)
-                self.entrevista = Entrevista(entrevista_id=self.id)
+                # Grabación por segmentos: si la app se cierra, lo grabado sigue siendo reproducible
+                self.entrevista = Entrevista(entrevista_id=self.id, nombre_video=self.output_file.name,
+                                             segmentado=True)
                 self.capturador = self.entrevista.capturador
                 self.marcas = self.entrevista.marcas
                 self.current_pregunta_id = 1
@@ -260,7 +315,8 @@ class InterviewScreen(QWidget):
                 # Iniciar grabación
                 self.tiempo_inicio = 0
                 self.lbl_cronometro.setText("00:00")
-                self.capturador.iniciar_grabacion(str(self.output_file), resolucion="720p", audio="AAC")
+                # Marcas y frames comparten el reloj monotónico de la entrevista
+                self.entrevista.iniciar(captura=self.captura)
                 self.is_recording = True
                 self.start_time = time.time()
                 self.cronometro_timer.start(1000)
@@ -270,15 +326,15 @@ class InterviewScreen(QWidget):
                 QMessageBox.critical(self, "Error", f"No se pudo iniciar la grabación: {str(e)}")
         else:
             try:
-                self.capturador.detener_grabacion()
+                # Detener la grabación, terminar los cortes, exportar el reporte y unir los
+                # segmentos en segundo plano; el progreso se muestra en actualizar_estado_cola
+                self.trabajo_final = self.entrevista.finalizar_async()
                 self.is_recording = False
                 self.start_time = None
                 self.cronometro_timer.stop()
                 self.btn_grabar.setText("🎥 Iniciar Grabación")
-                # Guardar marcas y exportar json al finalizar
-                if self.marcas:
-                    self.marcas.exportar_json(self.entrevista.marcas_json)
-                print("Grabación detenida")
+                self.btn_grabar.setEnabled(False)
+                print("Grabación detenida, finalizando entrevista")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"No se pudo detener la grabación: {str(e)}")
 
@@ -287,7 +343,7 @@ class InterviewScreen(QWidget):
             QMessageBox.warning(self, "Advertencia", "Debe iniciar la grabación primero")
             return
         try:
-            timestamp = time.time() - self.start_time
+            timestamp = self.entrevista.tiempo_relativo()
             nota = self.txt_comentarios.toPlainText().strip()
 
             marca = Marca(
@@ -298,8 +354,8 @@ class InterviewScreen(QWidget):
                 nota=nota
             )
 
-            # Agregar la marca sin guardar aún en archivo
-            self.marcas.marcas.append(marca)
+            # Se anota en el diario de marcas (sin reescribir el JSON completo)
+            self.marcas.agregar_marca(marca)
             print(f"Marca de inicio creada para pregunta {self.current_pregunta_id} en {timestamp:.2f}s")
 
             self.btn_inicio.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
@@ -322,15 +378,12 @@ class InterviewScreen(QWidget):
             return
 
         try:
-            timestamp = time.time() - self.start_time
             marca = self.marcas.buscar_marcas_por_pregunta_id(self.current_pregunta_id)
             if marca:
-                marca.fin = timestamp
-                marca.nota = self.txt_comentarios.toPlainText().strip()
-                print(f"Marca de fin actualizada para pregunta {self.current_pregunta_id} en {timestamp:.2f}s")
-
-                # Ahora sí guardar todo el conjunto de marcas actualizado
-                self.marcas._guardar_marcas_json()
+                # Cierra la marca, guarda el JSON y encola el corte del fragmento en segundo plano
+                self.entrevista.marcar_fin_pregunta(self.current_pregunta_id,
+                                                    self.txt_comentarios.toPlainText().strip())
+                print(f"Marca de fin actualizada para pregunta {self.current_pregunta_id} en {marca.fin:.2f}s")
 
                 self.pregunta_finalizada = True
                 self.btn_fin.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
@@ -384,12 +437,17 @@ class InterviewScreen(QWidget):
         self.btn_siguiente.setEnabled(False)
 
     def closeEvent(self, event):
-        if self.is_recording and self.capturador:
-            self.capturador.detener_grabacion()
+        self.timer.stop()
+        self.timer_cola.stop()
+        if self.is_recording and self.entrevista:
+            self.entrevista.detener_grabacion()
             if self.marcas:
                 self.marcas._guardar_marcas_json()
-        if self.cap:
-            self.cap.release()
+        if self.entrevista and self.trabajo_final is None:
+            # El corte en curso termina; los que no empezaron se pueden regenerar desde la pantalla de fragmentos
+            self.entrevista.cola.cerrar(cancelar=True)
+        # Detiene el hilo de captura y libera la cámara
+        self.captura.detener()
         event.accept()
 
     # ------------------------------------------------------------------
@@ -1,7 +1,5 @@
 import logging
 from pathlib import Path
-import json
-from datetime import datetime
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QMessageBox, QStackedWidget, QFrame, QScrollArea, QPushButton, QComboBox
@@ -20,6 +18,9 @@ from .utils.styles import (
 from .reportes_screens.resumen_screen import ResumenScreen
 from .reportes_screens.detalle_screen import DetalleScreen
 from .reportes_screens.export_screen import ExportScreen
+from .reportes_screens.datos_reportes import DatosReportes
+from classes.catalogo_resultados import CatalogoResultados
+from .utils.planificador_qt import servicio_planificador
 
 # 🔹 Definir paleta de colores verde agrícola completa
 AGRICULTURAL_GREEN_PALETTE = {
@@ -67,6 +68,14 @@ class ReportesMainWindow(QMainWindow):
         """)
 
         self._check_directories()
+        self.catalogo = CatalogoResultados()
+        # Lista de entrevistas al abrir; los datos de cada una se cargan al seleccionarla
+        self.datos = DatosReportes(self.catalogo, logger=self.logger, parent=self)
+        self.datos.datos_listos.connect(self.on_datos_entrevista_listos)
+        self.datos.entrevistas_actualizadas.connect(self.on_entrevistas_actualizadas)
+        self.datos.error_occurred.connect(
+            lambda entrevista_id, msg: self.show_error(f"Error cargando la entrevista {entrevista_id}: {msg}")
+        )
         self.data_context = {}  # Se cargará en setup_ui
         self.setup_ui()
         self.load_reportes_data()  # Cargar al init
@@ -75,136 +84,30 @@ class ReportesMainWindow(QMainWindow):
     
 
     def load_reportes_data(self):
-        """Cargar datos globales de entrevistas desde los fragmentos analizados - MEJORADO"""
+        """Cargar la lista de entrevistas desde el catálogo de resultados (SQLite)."""
         try:
             data = {
-                "entrevistas": [],
-                "por_entrevista": {},
+                # Ya ordenadas de la más nueva a la más antigua
+                "entrevistas": self.datos.listar_entrevistas(),
+                # LRU de entrevistas cargadas bajo demanda (ver on_entrevista_selected)
+                "por_entrevista": self.datos.por_entrevista,
+                # Agregados del estudio (promedios por entrevista, pregunta, cohorte...)
+                "datos": self.datos,
                 "videos": []
             }
-            
-            resultados_path = Path("data/resultados")
-            
-            # Buscar todas las carpetas de entrevistas en data/resultados
-            for entrevista_dir in resultados_path.iterdir():
-                if not entrevista_dir.is_dir():
-                    continue
-                    
-                entrevista_id = entrevista_dir.name
-                self.logger.info(f"Procesando entrevista: {entrevista_id}")
-                
-                # Buscar todos los JSONs de fragmentos en esta carpeta
-                fragmentos_data = {}
-                for json_file in entrevista_dir.glob("*.json"):
-                    try:
-                        with open(json_file, "r", encoding="utf-8") as f:
-                            fragmento_data = json.load(f)
-                        
-                        # Extraer información del fragmento - MEJORADO
-                        fragmento_info = fragmento_data.get("fragmento", {})
-                        analisis_info = fragmento_data.get("analisis", {})
-                        
-                        # MEJORADO: Extraer pregunta_id de diferentes formas posibles
-                        pregunta_id = fragmento_info.get("pregunta_id")
-                        if not pregunta_id:
-                            # Intentar extraer del nombre del archivo
-                            filename = json_file.stem
-                            if "pregunta" in filename.lower():
-                                # Buscar números después de "pregunta"
-                                import re
-                                match = re.search(r'pregunta[_\s]*(\d+)', filename.lower())
-                                if match:
-                                    pregunta_id = match.group(1)
-                        
-                        if not pregunta_id:
-                            self.logger.warning(f"No se pudo extraer pregunta_id de {json_file}")
-                            continue
-                        
-                        # MEJORADO: Asegurar que pregunta_id es string consistente
-                        pregunta_id = str(pregunta_id).zfill(3)  # Formato 001, 002, etc.
-                        
-                        # Guardar datos del análisis emocional
-                        fragmentos_data[pregunta_id] = {
-                            "intensidad": analisis_info.get("resumen_emociones", {}).get("avg_intensities", {}),
-                            "emocion_dominante": analisis_info.get("resumen_emociones", {}).get("dominant_emotion", ""),
-                            "confidence": analisis_info.get("resumen_emociones", {}).get("confidence", 0),
-                            "total_frames": analisis_info.get("total_frames_analizados", 0),
-                            "fecha_analisis": analisis_info.get("fecha_analisis", ""),
-                            "nota": f"Fragmento {pregunta_id}",
-                            "video_fragmento": fragmento_info.get("ruta", ""),
-                            "nombre_fragmento": fragmento_info.get("nombre", "")
-                        }
-                        
-                        self.logger.info(f"  - Pregunta {pregunta_id} cargada: {fragmentos_data[pregunta_id]['emocion_dominante']}")
-                        
-                    except Exception as e:
-                        self.logger.warning(f"Error cargando {json_file}: {str(e)}")
-                        continue
-                
-                if not fragmentos_data:
-                    self.logger.warning(f"No se encontraron fragmentos válidos para {entrevista_id}")
-                    continue
-                
-                # Info general de la entrevista
-                info = {
-                    "id": entrevista_id,
-                    "nombre": f"Entrevista {entrevista_id}",
-                    "num_preguntas": len(fragmentos_data),
-                    "promedios_globales": self._calcular_promedios_globales(fragmentos_data),
-                    "fecha": self._obtener_fecha_entrevista(entrevista_dir),
-                    "video_full": ""
-                }
-                data["entrevistas"].append(info)
-                data["por_entrevista"][entrevista_id] = fragmentos_data
-
-            # Ordenar entrevistas de la más nueva a la más antigua
-            data["entrevistas"].sort(key=lambda x: x["fecha"], reverse=True)
 
             self.data_context = data
-            self.logger.info(f"Datos de reportes cargados: {len(data['entrevistas'])} entrevistas, {sum(len(frags) for frags in data['por_entrevista'].values())} fragmentos totales.")
+            self.logger.info(f"Lista de reportes cargada: {len(data['entrevistas'])} entrevistas.")
             return True
 
         except Exception as e:
             self.logger.error(f"Error cargando datos de reportes: {str(e)}")
             import traceback
             self.logger.error(traceback.format_exc())
-            self.data_context = {"entrevistas": [], "por_entrevista": {}, "videos": []}
+            self.data_context = {"entrevistas": [], "por_entrevista": self.datos.por_entrevista,
+                                 "datos": self.datos, "videos": []}
             return False
 
-    def _calcular_promedios_globales(self, fragmentos_data):
-        """Helper: Calcula promedios de intensidades para las 7 emociones desde los fragmentos."""
-        emociones = ["angry", "contempt", "disgust", "fear", "happy", "sad", "surprise"]
-        totales = {emo: 0 for emo in emociones}
-        count = 0
-        
-        for datos_fragmento in fragmentos_data.values():
-            intensidad = datos_fragmento.get("intensidad", {})
-            for emo in emociones:
-                totales[emo] += intensidad.get(emo, 0)
-            count += 1
-        
-        if count == 0:
-            return {emo: 0 for emo in emociones}
-        return {emo: totales[emo] / count for emo in emociones}
-
-    def _obtener_fecha_entrevista(self, entrevista_dir):
-        """Obtener fecha de la entrevista desde el directorio o archivos."""
-        try:
-            # Intentar obtener fecha del primer fragmento
-            for json_file in entrevista_dir.glob("*.json"):
-                with open(json_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                fecha_str = data.get("analisis", {}).get("fecha_analisis", "")
-                if fecha_str:
-                    # Convertir de formato ISO a legible
-                    fecha_dt = datetime.fromisoformat(fecha_str.replace('Z', '+00:00'))
-                    return fecha_dt.strftime("%Y-%m-%d %H:%M")
-        except:
-            pass
-        
-        # Fallback: usar fecha de modificación del directorio
-        return datetime.fromtimestamp(entrevista_dir.stat().st_mtime).strftime("%Y-%m-%d %H:%M")
-
     def populate_entrevista_selector(self):
         """Poblar el selector de entrevistas con datos ordenados."""
         self.entrevista_selector.clear()  # Limpiar si hay items previos
@@ -447,14 +350,51 @@ class ReportesMainWindow(QMainWindow):
             parts = text.split()
             if len(parts) >= 2:
                 self.current_entrevista_id = parts[-1]
-                
-                # Actualizar todas las pantallas
-                self.resumen_screen.update_data(self.data_context, self.current_entrevista_id)
-                self.detalle_screen.update_data(self.data_context, self.current_entrevista_id)
-                self.export_screen.update_data(self.data_context, self.current_entrevista_id)
-                
                 self.logger.info(f"Entrevista seleccionada: {self.current_entrevista_id}")
+
+                # Lo que falte procesar de la entrevista en revisión pasa al frente de la cola
+                servicio_planificador().priorizar_entrevista(self.current_entrevista_id)
+
+                # Los datos se cargan en un hilo (o salen de la caché); las pantallas
+                # se actualizan en on_datos_entrevista_listos
+                self.datos.solicitar(self.current_entrevista_id)
+
+    def on_datos_entrevista_listos(self, entrevista_id):
+        """Actualiza las pantallas cuando los datos de la entrevista seleccionada están disponibles."""
+        if entrevista_id != self.current_entrevista_id:
+            return  # el usuario ya eligió otra entrevista
+        self.resumen_screen.update_data(self.data_context, entrevista_id)
+        self.detalle_screen.update_data(self.data_context, entrevista_id)
+        self.export_screen.update_data(self.data_context, entrevista_id)
     
+    def on_entrevistas_actualizadas(self, entrevista_ids):
+        """Refresca la lista de entrevistas y, si cambió la seleccionada, sus pantallas."""
+        try:
+            self.data_context["entrevistas"] = self.datos.entrevistas()
+        except Exception as e:
+            self.logger.error(f"Error actualizando la lista de entrevistas: {str(e)}")
+            return
+
+        nombres = [ent["nombre"] for ent in self.data_context["entrevistas"]]
+        actuales = [self.entrevista_selector.itemText(i) for i in range(self.entrevista_selector.count())]
+        if nombres != actuales:
+            seleccion = self.entrevista_selector.currentText()
+            self.entrevista_selector.blockSignals(True)
+            self.populate_entrevista_selector()
+            indice = self.entrevista_selector.findText(seleccion)
+            if indice >= 0:
+                self.entrevista_selector.setCurrentIndex(indice)
+            self.entrevista_selector.blockSignals(False)
+            if self.entrevista_selector.currentText() != seleccion:
+                # La entrevista seleccionada ya no tiene resultados
+                self.on_entrevista_selected(self.entrevista_selector.currentText())
+                return
+
+        if self.current_entrevista_id in entrevista_ids:
+            # Sale de memoria (ya reemplazada) o se recarga; las pantallas se
+            # actualizan en on_datos_entrevista_listos
+            self.datos.solicitar(self.current_entrevista_id)
+
     def create_menu_frame(self):
         """Crear frame para menú inferior con diseño de huerto moderno"""
         menu_frame = QFrame()
@@ -0,0 +1,129 @@
+import logging
+from collections import OrderedDict
+from PySide6.QtCore import QObject, QThread, Signal
+
+from classes.analitica import MotorAnalitica
+from classes.catalogo_resultados import CatalogoResultados
+from .vigilante_resultados import VigilanteResultados
+
+
+class CargaEntrevistaThread(QThread):
+    """Carga en segundo plano los datos por pregunta de una entrevista desde el catálogo."""
+    finished_with_success = Signal(str, dict)
+    error_occurred = Signal(str, str)
+
+    def __init__(self, catalogo: CatalogoResultados, entrevista_id: str):
+        super().__init__()
+        self.catalogo = catalogo
+        self.entrevista_id = entrevista_id
+
+    def run(self):
+        try:
+            self.finished_with_success.emit(self.entrevista_id, self.catalogo.preguntas_de(self.entrevista_id))
+        except Exception as e:
+            self.error_occurred.emit(self.entrevista_id, str(e))
+
+
+class DatosReportes(QObject):
+    """
+    Acceso a datos del módulo de reportes.
+
+    La lista de entrevistas sale del catálogo (consulta barata); los datos por
+    pregunta de cada entrevista se cargan solo al seleccionarla, en un hilo, y
+    se conservan las últimas `capacidad` entrevistas en un LRU. `por_entrevista`
+    es el propio LRU, así puede usarse directamente como
+    `data_context["por_entrevista"]` en las pantallas. `analitica` tiene los
+    agregados de todo el estudio y se actualiza con cada listado; de ahí salen
+    los promedios por entrevista (`entrevistas`, `promedios_entrevista`).
+
+    Tras el primer listado se vigila `data/resultados`: los resultados nuevos
+    se registran sin reescanear todo, las entrevistas en memoria se
+    reemplazan y se emite `entrevistas_actualizadas(list)` con sus ids.
+    """
+    datos_listos = Signal(str)
+    entrevistas_actualizadas = Signal(list)
+    error_occurred = Signal(str, str)
+
+    def __init__(self, catalogo: CatalogoResultados = None, capacidad: int = 5, logger=None, parent=None):
+        super().__init__(parent)
+        self.logger = logger or logging.getLogger(__name__)
+        self.catalogo = catalogo or CatalogoResultados()
+        self.capacidad = capacidad
+        self.por_entrevista = OrderedDict()
+        self.analitica = MotorAnalitica(self.catalogo)
+        self._hilos = {}
+        self.vigilante = VigilanteResultados(self.catalogo, cargadas=lambda: set(self.por_entrevista),
+                                             logger=self.logger, parent=self)
+        self.vigilante.resultados_actualizados.connect(self._on_resultados_actualizados)
+
+    def listar_entrevistas(self):
+        """Entrevistas con resultados, de la más nueva a la más antigua."""
+        # Referencia del vigilante antes de reindexar: lo que cambie después se detecta
+        self.vigilante.iniciar()
+        self.catalogo.reindexar()
+        # Solo se releen las entrevistas con resultados nuevos o modificados
+        for entrevista_id in self.analitica.sincronizar():
+            self.invalidar(entrevista_id)
+        return self.entrevistas()
+
+    def entrevistas(self):
+        """Lista del catálogo con los promedios de cada entrevista calculados por `analitica`."""
+        entrevistas = self.catalogo.entrevistas()
+        agregados = self.analitica.por_entrevista()
+        for entrevista in entrevistas:
+            if entrevista["id"] in agregados:
+                entrevista["promedios_globales"] = agregados[entrevista["id"]]["intensidad"]
+        return entrevistas
+
+    def promedios_entrevista(self, entrevista_id: str) -> dict:
+        """Intensidad media por emoción de una entrevista (vacío si no tiene resultados)."""
+        return self.analitica.por_entrevista(entrevistas=[entrevista_id]).get(entrevista_id, {}).get("intensidad", {})
+
+    def esta_cargada(self, entrevista_id: str) -> bool:
+        return entrevista_id in self.por_entrevista
+
+    def solicitar(self, entrevista_id: str):
+        """Pide los datos de una entrevista; `datos_listos` se emite cuando están en `por_entrevista`."""
+        if entrevista_id in self.por_entrevista:
+            self.por_entrevista.move_to_end(entrevista_id)
+            self.datos_listos.emit(entrevista_id)
+            return
+        if entrevista_id in self._hilos:
+            return  # ya se está cargando
+
+        hilo = CargaEntrevistaThread(self.catalogo, entrevista_id)
+        hilo.finished_with_success.connect(self._on_cargada)
+        hilo.error_occurred.connect(self._on_error)
+        hilo.finished.connect(lambda eid=entrevista_id: self._hilos.pop(eid, None))
+        self._hilos[entrevista_id] = hilo
+        hilo.start()
+
+    def invalidar(self, entrevista_id: str = None):
+        """Descarta del LRU una entrevista (o todas) para forzar su recarga."""
+        if entrevista_id is None:
+            self.por_entrevista.clear()
+        else:
+            self.por_entrevista.pop(entrevista_id, None)
+
+    def _on_cargada(self, entrevista_id: str, preguntas: dict):
+        self.por_entrevista[entrevista_id] = preguntas
+        self.por_entrevista.move_to_end(entrevista_id)
+        while len(self.por_entrevista) > self.capacidad:
+            descartada, _ = self.por_entrevista.popitem(last=False)
+            self.logger.debug(f"Entrevista {descartada} descartada de la caché de reportes")
+        self.logger.info(f"Datos de la entrevista {entrevista_id} cargados ({len(preguntas)} preguntas)")
+        self.datos_listos.emit(entrevista_id)
+
+    def _on_resultados_actualizados(self, afectadas: dict):
+        for entrevista_id, preguntas in afectadas.items():
+            if preguntas:
+                # Estaba en memoria: se reemplaza sin cambiar su posición en el LRU
+                self.por_entrevista[entrevista_id] = preguntas
+            else:
+                self.por_entrevista.pop(entrevista_id, None)
+        self.analitica.sincronizar()
+        self.entrevistas_actualizadas.emit(sorted(afectadas))
+
+    def _on_error(self, entrevista_id: str, mensaje: str):
+        self.logger.error(f"Error cargando la entrevista {entrevista_id}: {mensaje}")
+        self.error_occurred.emit(entrevista_id, mensaje)
@@ -1,20 +1,18 @@
 import logging
 from pathlib import Path
 import json
-import numpy as np
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QScrollArea,
     QGridLayout, QComboBox, QPushButton, QSplitter, QTextEdit
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
 from ..utils.styles import ColorPalette
+from ..utils.graficos import ARANA_DETALLE, EMOCIONES_DETALLE, datos_arana
+from ..utils.graficos_cache import mostrar_grafico
+from ..utils.listado_fragmentos import marcas_por_pregunta
+from .linea_tiempo_widget import LineaTiempoWidget
 
 class DetalleScreen(QWidget):
     def __init__(self, logger=None, data_context=None, parent=None):
@@ -103,8 +101,35 @@ class DetalleScreen(QWidget):
         """)
         self.detalle_layout.addWidget(self.detalle_placeholder)
 
+        # Línea de tiempo: se conserva entre preguntas (la entrevista se carga una vez)
+        self.linea_tiempo_frame = self.crear_frame_linea_tiempo()
+        self.linea_tiempo_frame.hide()
+
         return panel
 
+    def crear_frame_linea_tiempo(self):
+        """Crear frame con la línea de tiempo de emociones de la entrevista"""
+        frame = QFrame()
+        frame.setStyleSheet("""
+            QFrame {
+                background: rgba(255, 255, 255, 0.95);
+                border-radius: 20px;
+                border: 2px solid #c8e6c9;
+                padding: 20px;
+            }
+        """)
+        layout = QVBoxLayout(frame)
+
+        title = QLabel("📈 Emociones en el Tiempo")
+        title.setFont(QFont("Segoe UI", 16, QFont.Weight.Bold))
+        title.setStyleSheet("color: #1b5e20; padding: 10px;")
+        title.setAlignment(Qt.AlignCenter)
+        layout.addWidget(title)
+
+        self.linea_tiempo = LineaTiempoWidget(logger=self.logger)
+        layout.addWidget(self.linea_tiempo)
+        return frame
+
     def update_data(self, data_context, entrevista_id):
         """Actualizar datos y mostrar selector de preguntas - CORREGIDO"""
         self.data_context = data_context
@@ -208,7 +233,9 @@ class DetalleScreen(QWidget):
         # Limpiar panel de detalle
         for i in reversed(range(self.detalle_layout.count())):
             widget = self.detalle_layout.itemAt(i).widget()
-            if widget:
+            if widget is self.linea_tiempo_frame:
+                self.detalle_layout.removeWidget(widget)
+            elif widget:
                 widget.deleteLater()
         
         if not self.current_entrevista_id:
@@ -231,6 +258,41 @@ class DetalleScreen(QWidget):
         graph_frame = self.crear_grafico_detalle(datos, pregunta_id)
         self.detalle_layout.addWidget(graph_frame)
 
+        # Línea de tiempo de la entrevista, enfocada en esta pregunta
+        self.detalle_layout.addWidget(self.linea_tiempo_frame)
+        self.linea_tiempo_frame.show()
+        self.mostrar_linea_tiempo(pregunta_id)
+
+    def mostrar_linea_tiempo(self, pregunta_id):
+        """Cargar la línea de tiempo de todos los fragmentos y enfocar la pregunta"""
+        entrevista_data = self.data_context["por_entrevista"][self.current_entrevista_id]
+        try:
+            marcas = marcas_por_pregunta(self.current_entrevista_id)
+        except Exception as e:
+            self.logger.warning(f"No se pudieron leer las marcas de {self.current_entrevista_id}: {e}")
+            marcas = {}
+
+        partes, foco = [], None
+        for pid, datos in sorted(entrevista_data.items(), key=lambda x: int(x[0]) if x[0].isdigit() else 0):
+            if not datos.get("ruta_resultado"):
+                continue
+            marca = marcas.get(str(int(pid)) if pid.isdigit() else pid, {})
+            try:
+                inicio = float(marca["inicio"])
+            except (KeyError, TypeError, ValueError):
+                inicio = None
+            partes.append((datos["ruta_resultado"], inicio))
+            if pid == pregunta_id and inicio is not None:
+                try:
+                    foco = (inicio, float(marca["fin"]))
+                except (KeyError, TypeError, ValueError):
+                    foco = None
+
+        # La clave cambia si se reanaliza algún fragmento
+        clave = (self.current_entrevista_id,
+                 tuple((pid, d.get("fecha_analisis")) for pid, d in sorted(entrevista_data.items())))
+        self.linea_tiempo.cargar(clave, partes, foco)
+
     def crear_info_pregunta(self, datos):
         """Crear frame con información de la pregunta"""
         frame = QFrame()
@@ -291,49 +353,17 @@ class DetalleScreen(QWidget):
         graph_title.setAlignment(Qt.AlignCenter)
         layout.addWidget(graph_title)
         
-        # Crear gráfico
-        fig = Figure(figsize=(10, 8), facecolor='#f8fff8')
-        canvas = FigureCanvas(fig)
-        
-        emociones_es = {
-            "angry": "Enojo", "disgust": "Disgusto", "fear": "Miedo",
-            "happy": "Felicidad", "surprise": "Sorpresa", "sad": "Tristeza",
-            "contempt": "Desprecio"
-        }
-        
-        emociones_en = list(emociones_es.keys())
-        categorias = list(emociones_es.values())
-        
+        # Gráfico (renderizado en segundo plano y cacheado)
         intensidad = datos.get("intensidad", {})
-        valores = [intensidad.get(emo, 0) for emo in emociones_en]
-        
-        # Cerrar polígono
-        categorias_cerrado = categorias + categorias[:1]
-        valores_cerrado = valores + valores[:1]
-        
-        ax = fig.add_subplot(111, polar=True)
-        angles = np.linspace(0, 2*np.pi, len(categorias), endpoint=False).tolist()
-        angles += angles[:1]
-        
-        # Gráfico principal
-        ax.plot(angles, valores_cerrado, 'o-', linewidth=3, 
-                color='#2e7d32', markersize=10, label='Intensidad')
-        ax.fill(angles, valores_cerrado, alpha=0.25, color='#4caf50')
-        
-        # Etiquetas de valores
-        for angle, valor, categoria in zip(angles[:-1], valores, categorias):
-            ax.text(angle, valor + 0.02, f'{valor:.3f}', 
-                   ha='center', va='bottom', fontsize=9, color='#1b5e20')
-        
-        ax.set_xticks(angles[:-1])
-        ax.set_xticklabels(categorias, fontsize=12)
-        ax.set_ylim(0, max(valores_cerrado) * 1.3 if max(valores_cerrado) > 0 else 1)
-        ax.set_yticks([])
-        ax.grid(True, alpha=0.3)
-        ax.set_facecolor('#f1f8e9')
-        
-        plt.title('Distribución de Emociones', size=14, pad=25, 
-                 color='#2e572c', weight='bold')
-        
-        layout.addWidget(canvas)
+        grafico_label = QLabel("⏳ Generando gráfico...")
+        grafico_label.setAlignment(Qt.AlignCenter)
+        grafico_label.setStyleSheet("color: #666; padding: 10px;")
+        grafico_label.setMinimumSize(500, 400)
+        mostrar_grafico(
+            grafico_label, ARANA_DETALLE,
+            datos_arana(intensidad, 'Distribución de Emociones', EMOCIONES_DETALLE),
+            tamaño=(10, 8)
+        )
+
+        layout.addWidget(grafico_label)
         return frame
\ No newline at end of file
@@ -1,6 +1,10 @@
+import os
+import json
 import logging
 import zipfile
 import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 from PySide6.QtWidgets import (
@@ -10,12 +14,22 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, QThread, Signal
 from PySide6.QtGui import QFont
-import matplotlib.pyplot as plt
 import numpy as np
 
 from ..utils.styles import ColorPalette
+from ..utils.graficos import (
+    ARANA_GLOBAL, ARANA_PREGUNTA, EMOCIONES_ES, DIRECTORIO_CACHE, clave_grafico, datos_arana,
+    ordenar_preguntas, promedios_intensidad, renderizar_para_exportar
+)
 
 class ExportWorker(QThread):
+    """
+    Genera el ZIP del reporte en segundo plano.
+
+    Los gráficos se renderizan en un pool de procesos (matplotlib Agg) y cada
+    archivo se escribe en el ZIP en cuanto termina, sin acumularlos en memoria.
+    Los que ya están en el caché de gráficos en disco no se vuelven a dibujar.
+    """
     progress = Signal(int)
     finished = Signal(str)
     error = Signal(str)
@@ -25,43 +39,141 @@ class ExportWorker(QThread):
         self.data_context = data_context
         self.entrevista_id = entrevista_id
         self.options = options
+        self._hechos = 0
+        self._total = 1
 
     def run(self):
         try:
+            preguntas = self.data_context.get("por_entrevista", {}).get(self.entrevista_id)
+            if preguntas is None:
+                raise ValueError(f"No hay datos cargados para la entrevista {self.entrevista_id}")
+
             # Crear archivo temporal
             with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as tmp_file:
                 zip_path = tmp_file.name
 
-            with zipfile.ZipFile(zip_path, 'w') as zipf:
-                # Exportar gráficos según opciones
-                if self.options.get('global_chart', True):
-                    self.export_global_chart(zipf)
-                
-                if self.options.get('individual_charts', True):
-                    self.export_individual_charts(zipf)
-                
+            graficos = self.tareas_graficos(preguntas)
+            self._hechos = 0
+            self._total = (len(graficos)
+                           + int(self.options.get('data_json', True))
+                           + int(self.options.get('statistics', True))) or 1
+
+            with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as zipf:
+                if graficos:
+                    self.export_charts(zipf, graficos)
+
                 if self.options.get('data_json', True):
-                    self.export_json_data(zipf)
+                    self.export_json_data(zipf, preguntas)
 
+                if self.options.get('statistics', True):
+                    self.export_statistics(zipf, preguntas)
+
+            self.progress.emit(100)
             self.finished.emit(zip_path)
             
         except Exception as e:
             self.error.emit(str(e))
 
-    def export_global_chart(self, zipf):
-        """Exportar gráfico global"""
-        # Implementar generación de gráfico global
-        self.progress.emit(25)
+    def _avanzar(self):
+        self._hechos += 1
+        self.progress.emit(min(99, int(self._hechos * 100 / self._total)))
+
+    def tareas_graficos(self, preguntas):
+        """Lista de (archivo, tipo, datos, tamaño, formato) según las opciones elegidas."""
+        formatos = ["png"] + (["svg"] if self.options.get('svg', False) else [])
+        tareas = []
+        if self.options.get('global_chart', True):
+            promedios = promedios_intensidad(preguntas)
+            datos = datos_arana(promedios, f'Resumen Emocional Global\nEntrevista {self.entrevista_id}')
+            for formato in formatos:
+                tareas.append((f"graficos/global.{formato}", ARANA_GLOBAL, datos, (10, 8), formato))
+
+        if self.options.get('individual_charts', True):
+            for pregunta_id, datos_pregunta in ordenar_preguntas(preguntas):
+                datos = datos_arana(datos_pregunta.get("intensidad", {}), f'Pregunta {pregunta_id}')
+                for formato in formatos:
+                    tareas.append((f"graficos/pregunta_{pregunta_id}.{formato}", ARANA_PREGUNTA, datos, (6, 5), formato))
+        return tareas
 
-    def export_individual_charts(self, zipf):
-        """Exportar gráficos individuales"""
-        # Implementar generación de gráficos individuales
-        self.progress.emit(75)
+    def export_charts(self, zipf, tareas):
+        """Exportar gráficos: caché en disco primero, el resto en paralelo en procesos"""
+        pendientes = []
+        for nombre, tipo, datos, tamaño, formato in tareas:
+            png = None
+            if formato == "png":
+                ruta = DIRECTORIO_CACHE / f"{clave_grafico(tipo, datos, tamaño)}.png"
+                if ruta.exists():
+                    png = ruta.read_bytes()
+            if png is not None:
+                zipf.writestr(nombre, png, compress_type=zipfile.ZIP_STORED)
+                self._avanzar()
+            else:
+                pendientes.append((nombre, tipo, datos, tamaño, formato))
+
+        if not pendientes:
+            return
 
-    def export_json_data(self, zipf):
+        # 'spawn' evita heredar con fork el estado de Qt y de sus hilos
+        procesos = min(len(pendientes), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futuros = [pool.submit(renderizar_para_exportar, *tarea) for tarea in pendientes]
+            try:
+                for futuro in as_completed(futuros):
+                    nombre, contenido = futuro.result()
+                    # PNG ya está comprimido: se guarda sin volver a comprimir
+                    compresion = zipfile.ZIP_STORED if nombre.endswith(".png") else zipfile.ZIP_DEFLATED
+                    zipf.writestr(nombre, contenido, compress_type=compresion)
+                    self._avanzar()
+            except Exception:
+                for futuro in futuros:
+                    futuro.cancel()
+                raise
+
+    def export_json_data(self, zipf, preguntas):
         """Exportar datos en JSON"""
-        # Implementar exportación de datos
-        self.progress.emit(100)
+        info = next((e for e in self.data_context.get("entrevistas", []) if e.get("id") == self.entrevista_id), {})
+        datos = {
+            "entrevista": info,
+            "fecha_exportacion": datetime.now().isoformat(),
+            "preguntas": dict(ordenar_preguntas(preguntas))
+        }
+        zipf.writestr("datos.json", json.dumps(datos, ensure_ascii=False, indent=2))
+        self._avanzar()
+
+    def export_statistics(self, zipf, preguntas):
+        """Exportar estadísticas resumen por emoción y emociones dominantes"""
+        emociones = list(EMOCIONES_ES)
+        matriz = np.array([[datos.get("intensidad", {}).get(emo, 0) or 0 for emo in emociones]
+                           for _, datos in ordenar_preguntas(preguntas)], dtype=float).reshape(-1, len(emociones))
+
+        por_emocion = {}
+        if len(matriz):
+            for i, emo in enumerate(emociones):
+                columna = matriz[:, i]
+                por_emocion[emo] = {
+                    "promedio": float(columna.mean()),
+                    "desviacion": float(columna.std()),
+                    "minimo": float(columna.min()),
+                    "maximo": float(columna.max())
+                }
+
+        dominantes = {}
+        for datos in preguntas.values():
+            emocion = datos.get("emocion_dominante") or "N/A"
+            dominantes[emocion] = dominantes.get(emocion, 0) + 1
+
+        confianzas = [datos.get("confidence", 0) or 0 for datos in preguntas.values()]
+        estadisticas = {
+            "entrevista_id": self.entrevista_id,
+            "total_preguntas": len(preguntas),
+            "total_frames": sum(datos.get("total_frames", 0) or 0 for datos in preguntas.values()),
+            "confianza_promedio": float(np.mean(confianzas)) if confianzas else 0.0,
+            "emociones_dominantes": dominantes,
+            "intensidad_por_emocion": por_emocion
+        }
+        zipf.writestr("estadisticas.json", json.dumps(estadisticas, ensure_ascii=False, indent=2))
+        self._avanzar()
+
 
 class ExportScreen(QWidget):
     def __init__(self, logger=None, data_context=None, parent=None):
@@ -160,9 +272,10 @@ class ExportScreen(QWidget):
         self.chk_individual = QCheckBox("Gráficos por pregunta")
         self.chk_data = QCheckBox("Datos en JSON")
         self.chk_stats = QCheckBox("Estadísticas resumen")
+        self.chk_svg = QCheckBox("Gráficos también en SVG")
         
-        for chk in [self.chk_global, self.chk_individual, self.chk_data, self.chk_stats]:
-            chk.setChecked(True)
+        for chk in [self.chk_global, self.chk_individual, self.chk_data, self.chk_stats, self.chk_svg]:
+            chk.setChecked(chk is not self.chk_svg)
             chk.setFont(QFont("Segoe UI", 10))
             chk.setStyleSheet("color: #555; padding: 6px;")
             content_layout.addWidget(chk)
@@ -268,11 +381,13 @@ class ExportScreen(QWidget):
             'global_chart': self.chk_global.isChecked(),
             'individual_charts': self.chk_individual.isChecked(),
             'data_json': self.chk_data.isChecked(),
-            'statistics': self.chk_stats.isChecked()
+            'statistics': self.chk_stats.isChecked(),
+            'svg': self.chk_svg.isChecked()
         }
 
         # Mostrar progreso
         self.progress_frame.show()
+        self.progress_label.setText("Generando gráficos y datos...")
         self.progress_bar.setValue(0)
 
         # Iniciar worker
@@ -0,0 +1,225 @@
+"""
+Línea de tiempo de emociones de una entrevista con zoom y desplazamiento.
+
+Se cargan en un hilo las pirámides de todos los fragmentos de la entrevista
+(`classes.linea_tiempo`), ubicados en el tiempo del video original según
+sus marcas. En cada zoom o desplazamiento solo se piden las cubetas que
+caben en el ancho del gráfico: media por emoción como línea y el rango
+mínimo-máximo como banda.
+
+Rueda del ratón: zoom centrado en el cursor. Arrastrar: desplazar.
+Doble clic o "Ver toda la entrevista": vista completa.
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
+from PySide6.QtCore import QThread, Signal
+from PySide6.QtGui import QFont
+from matplotlib.figure import Figure
+try:
+    from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+except ImportError:  # matplotlib < 3.5
+    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+
+from classes.linea_tiempo import LineaTiempoEntrevista, obtener_linea_tiempo
+from ..utils.graficos import EMOCIONES_ES
+
+COLORES_EMOCIONES = {
+    "angry": "#d32f2f", "contempt": "#6d4c41", "disgust": "#7b1fa2", "fear": "#455a64",
+    "happy": "#2e7d32", "sad": "#1565c0", "surprise": "#f9a825"
+}
+# Separación entre fragmentos sin marca al ubicarlos uno tras otro (s)
+_HUECO_SIN_MARCA = 1.0
+_ZOOM_RUEDA = 1.25
+
+
+class CargaLineaTiempoThread(QThread):
+    """Carga (o construye) las pirámides de los fragmentos y las une en una línea de tiempo."""
+    finished_with_success = Signal(object)
+    error_occurred = Signal(str)
+
+    def __init__(self, partes: List[Tuple[str, Optional[float]]]):
+        super().__init__()
+        # (ruta del resultado, inicio en el video original o None si no hay marca)
+        self.partes = partes
+
+    def run(self):
+        try:
+            lineas = []
+            fin_anterior = 0.0
+            for ruta, inicio in self.partes:
+                linea = obtener_linea_tiempo(ruta)
+                # Sin marca: a continuación del fragmento anterior
+                linea.desplazamiento = inicio if inicio is not None else fin_anterior + _HUECO_SIN_MARCA
+                fin_anterior = linea.fin
+                lineas.append(linea)
+            self.finished_with_success.emit(LineaTiempoEntrevista(lineas))
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+
+
+class LineaTiempoWidget(QWidget):
+    def __init__(self, logger=None, parent=None):
+        super().__init__(parent)
+        self.logger = logger or logging.getLogger(__name__)
+        self.linea: Optional[LineaTiempoEntrevista] = None
+        self._clave = None
+        self._foco = None
+        self._hilos: List[CargaLineaTiempoThread] = []
+        self._arrastre = None
+        self._bandas = []
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        header = QHBoxLayout()
+        self.estado_label = QLabel("⏳ Cargando línea de tiempo...")
+        self.estado_label.setFont(QFont("Segoe UI", 10))
+        self.estado_label.setStyleSheet("color: #555;")
+        header.addWidget(self.estado_label)
+        header.addStretch()
+        self.btn_ver_todo = QPushButton("🌐 Ver toda la entrevista")
+        self.btn_ver_todo.setEnabled(False)
+        self.btn_ver_todo.clicked.connect(self.ver_todo)
+        header.addWidget(self.btn_ver_todo)
+        layout.addLayout(header)
+
+        self.figura = Figure(figsize=(10, 3.5), facecolor="#f8fff8")
+        self.canvas = FigureCanvasQTAgg(self.figura)
+        self.canvas.setMinimumHeight(280)
+        self.ax = self.figura.add_subplot(111)
+        self.ax.set_facecolor("#f1f8e9")
+        self.ax.set_xlabel("Tiempo en el video original (s)")
+        self.ax.set_ylabel("Intensidad")
+        self.ax.grid(True, alpha=0.3)
+        self.lineas = {
+            emo: self.ax.plot([], [], linewidth=1.2, color=COLORES_EMOCIONES.get(emo), label=EMOCIONES_ES.get(emo, emo))[0]
+            for emo in EMOCIONES_ES
+        }
+        self.ax.legend(loc="upper right", fontsize=8, ncol=4)
+        self.figura.tight_layout()
+        layout.addWidget(self.canvas)
+
+        self.canvas.mpl_connect("scroll_event", self._on_rueda)
+        self.canvas.mpl_connect("button_press_event", self._on_presionar)
+        self.canvas.mpl_connect("motion_notify_event", self._on_mover)
+        self.canvas.mpl_connect("button_release_event", self._on_soltar)
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+    def cargar(self, clave, partes: List[Tuple[str, Optional[float]]], foco: Optional[Tuple[float, float]] = None):
+        """
+        Muestra la línea de tiempo de una entrevista. Si `clave` es la misma
+        que la ya cargada solo se mueve la vista a `foco` (inicio, fin).
+        """
+        self._foco = foco
+        if clave == self._clave and self.linea is not None:
+            self._mostrar_foco()
+            return
+        self._clave = clave
+        self.linea = None
+        self.btn_ver_todo.setEnabled(False)
+        self.estado_label.setText("⏳ Cargando línea de tiempo...")
+
+        hilo = CargaLineaTiempoThread(partes)
+        hilo.finished_with_success.connect(lambda linea, c=clave: self._on_cargada(c, linea))
+        hilo.error_occurred.connect(lambda mensaje, c=clave: self._on_error(c, mensaje))
+        hilo.finished.connect(lambda h=hilo: self._hilos.remove(h) if h in self._hilos else None)
+        self._hilos.append(hilo)
+        hilo.start()
+
+    def _on_cargada(self, clave, linea: LineaTiempoEntrevista):
+        if clave != self._clave:
+            return  # se pidió otra entrevista mientras tanto
+        self.linea = linea
+        if linea.vacia:
+            self.estado_label.setText("No hay datos por frame para esta entrevista")
+            return
+        self.btn_ver_todo.setEnabled(True)
+        self._mostrar_foco()
+
+    def _on_error(self, clave, mensaje: str):
+        if clave != self._clave:
+            return
+        self.logger.error(f"Error cargando la línea de tiempo: {mensaje}")
+        self.estado_label.setText(f"❌ Error cargando la línea de tiempo: {mensaje}")
+
+    # ------------------------------------------------------------------
+    # Vista
+    # ------------------------------------------------------------------
+    def _mostrar_foco(self):
+        if self.linea is None or self.linea.vacia:
+            return
+        if self._foco is not None:
+            self._ver(*self._foco)
+        else:
+            self.ver_todo()
+
+    def ver_todo(self):
+        if self.linea is not None and not self.linea.vacia:
+            self._ver(self.linea.inicio, self.linea.fin)
+
+    def _ver(self, t0: float, t1: float):
+        """Ajusta el tramo visible a los límites de la entrevista y redibuja."""
+        inicio, fin = self.linea.inicio, self.linea.fin
+        ancho = min(max(t1 - t0, 0.5), max(fin - inicio, 0.5))
+        t0 = min(max(t0, inicio), max(fin - ancho, inicio))
+        self.ax.set_xlim(t0, t0 + ancho)
+        self._redibujar()
+
+    def _redibujar(self):
+        t0, t1 = self.ax.get_xlim()
+        max_puntos = max(self.canvas.width() // 2, 100)
+        tiempos, minimo, maximo, media = self.linea.ventana(t0, t1, max_puntos)
+
+        for banda in self._bandas:
+            banda.remove()
+        self._bandas = []
+        emociones = self.linea.emociones
+        for emo, linea in self.lineas.items():
+            if emo not in emociones:
+                continue
+            k = emociones.index(emo)
+            linea.set_data(tiempos, media[:, k])
+            if len(tiempos):
+                self._bandas.append(self.ax.fill_between(
+                    tiempos, minimo[:, k], maximo[:, k], color=linea.get_color(), alpha=0.12, linewidth=0
+                ))
+        self.ax.set_ylim(0, 1.05)
+        self.estado_label.setText(f"⏱️ {t0:.1f}s – {t1:.1f}s ({len(tiempos)} puntos)")
+        self.canvas.draw_idle()
+
+    # ------------------------------------------------------------------
+    # Ratón
+    # ------------------------------------------------------------------
+    def _on_rueda(self, evento):
+        if self.linea is None or self.linea.vacia or evento.xdata is None:
+            return
+        t0, t1 = self.ax.get_xlim()
+        factor = 1 / _ZOOM_RUEDA if evento.button == "up" else _ZOOM_RUEDA
+        centro = evento.xdata
+        self._ver(centro - (centro - t0) * factor, centro + (t1 - centro) * factor)
+
+    def _on_presionar(self, evento):
+        if self.linea is None or self.linea.vacia or evento.xdata is None:
+            return
+        if evento.dblclick:
+            self.ver_todo()
+            return
+        self._arrastre = (evento.x, self.ax.get_xlim())
+
+    def _on_mover(self, evento):
+        if self._arrastre is None:
+            return
+        x_inicial, (t0, t1) = self._arrastre
+        segundos_por_pixel = (t1 - t0) / max(self.ax.bbox.width, 1)
+        desplazamiento = (x_inicial - evento.x) * segundos_por_pixel
+        self._ver(t0 + desplazamiento, t1 + desplazamiento)
+
+    def _on_soltar(self, _evento):
+        self._arrastre = None
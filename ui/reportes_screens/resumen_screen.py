@@ -1,20 +1,16 @@
 import logging
 from pathlib import Path
 import json
-import numpy as np
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QScrollArea,
     QGridLayout, QComboBox, QPushButton
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QPixmap
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
 from ..utils.styles import ColorPalette
+from ..utils.graficos import ARANA_GLOBAL, ARANA_PREGUNTA, datos_arana, promedios_intensidad
+from ..utils.graficos_cache import mostrar_grafico
 
 class ResumenScreen(QWidget):
     def __init__(self, logger=None, data_context=None, parent=None):
@@ -107,68 +103,18 @@ class ResumenScreen(QWidget):
 
     def crear_grafico_global(self, entrevista_data):
         """Crear gráfico araña con promedios globales - CORREGIDO"""
-        # Calcular promedios de todas las preguntas
-        emociones = ["angry", "contempt", "disgust", "fear", "happy", "surprise", "sad"]
-        promedios = {emo: 0 for emo in emociones}
-        count = 0
-        
-        for pregunta_id, datos in entrevista_data.items():
-            intensidad = datos.get("intensidad", {})
-            for emo in emociones:
-                promedios[emo] += intensidad.get(emo, 0)
-            count += 1
-        
-        if count > 0:
-            for emo in emociones:
-                promedios[emo] /= count
+        # Promedios de todas las preguntas (motor de analítica de DatosReportes)
+        datos_reportes = self.data_context.get("datos")
+        promedios = datos_reportes.promedios_entrevista(self.current_entrevista_id) if datos_reportes else {}
+        if not promedios:
+            promedios = promedios_intensidad(entrevista_data)
 
-        # Crear gráfico araña
-        fig = Figure(figsize=(10, 8), facecolor='#f8fff8')
-        canvas = FigureCanvas(fig)
-        
-        # Traducción de emociones al español
-        emociones_es = {
-            "angry": "Enojo",
-            "contempt": "Desprecio", 
-            "disgust": "Disgusto",
-            "fear": "Miedo",
-            "happy": "Felicidad",
-            "surprise": "Sorpresa",
-            "sad": "Tristeza"
-        }
-        
-        categorias = [emociones_es[emo] for emo in emociones]
-        valores = [promedios[emo] for emo in emociones]
-        
-        # CORRECCIÓN: Cerrar el polígono correctamente
-        # Necesitamos el mismo número de ángulos que de valores
-        num_vars = len(categorias)
-        
-        # Calcular ángulos para cada eje
-        angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
-        
-        # Cerrar el polígono repitiendo el primer valor al final
-        valores_cerrado = valores + valores[:1]
-        angles_cerrado = angles + angles[:1]
-        
-        ax = fig.add_subplot(111, polar=True)
-        ax.plot(angles_cerrado, valores_cerrado, 'o-', linewidth=2, label='Promedio Global', 
-                color='#2e7d32', markersize=8)
-        ax.fill(angles_cerrado, valores_cerrado, alpha=0.25, color='#4caf50')
-        
-        # Configurar ejes
-        ax.set_xticks(angles)
-        ax.set_xticklabels(categorias, fontsize=11)
-        
-        # Establecer límites del gráfico
-        y_max = max(valores_cerrado) * 1.2 if max(valores_cerrado) > 0 else 0.2
-        ax.set_ylim(0, y_max)
-        ax.set_yticks(np.linspace(0, y_max, 5))
-        ax.grid(True, alpha=0.3)
-        ax.set_facecolor('#f1f8e9')
-        
-        plt.title(f'Resumen Emocional Global\nEntrevista {self.current_entrevista_id}', 
-                size=14, pad=20, color='#2e572c', weight='bold')
+        # Gráfico araña (renderizado en segundo plano y cacheado)
+        grafico_label = self.crear_label_grafico(
+            ARANA_GLOBAL,
+            datos_arana(promedios, f'Resumen Emocional Global\nEntrevista {self.current_entrevista_id}'),
+            tamaño=(10, 8)
+        )
 
         # Frame para el gráfico (CORREGIDO: sin box-shadow)
         graph_frame = QFrame()
@@ -188,7 +134,7 @@ class ResumenScreen(QWidget):
         title_label.setAlignment(Qt.AlignCenter)
         graph_layout.addWidget(title_label)
         
-        graph_layout.addWidget(canvas)
+        graph_layout.addWidget(grafico_label)
         self.scroll_layout.addWidget(graph_frame)
     
     
@@ -200,7 +146,6 @@ class ResumenScreen(QWidget):
         }
         
         emociones_en = list(emociones_es.keys())
-        categorias = list(emociones_es.values())
         
         # Layout de grid para los gráficos individuales
         grid_frame = QFrame()
@@ -229,38 +174,14 @@ class ResumenScreen(QWidget):
             row = i // 2
             col = i % 2
             
-            # Crear gráfico individual
-            fig = Figure(figsize=(6, 5), facecolor='#f8fff8')
-            canvas = FigureCanvas(fig)
-            
+            # Gráfico individual (renderizado en segundo plano y cacheado)
             intensidad = datos.get("intensidad", {})
-            valores = [intensidad.get(emo, 0) for emo in emociones_en]
-            
-            # CORRECCIÓN: Cerrar polígono correctamente
-            num_vars = len(categorias)
-            angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
-            
-            valores_cerrado = valores + valores[:1]
-            angles_cerrado = angles + angles[:1]
-            
-            ax = fig.add_subplot(111, polar=True)
-            ax.plot(angles_cerrado, valores_cerrado, 'o-', linewidth=2, 
-                    color='#388e3c', markersize=6)
-            ax.fill(angles_cerrado, valores_cerrado, alpha=0.3, color='#66bb6a')
-            
-            ax.set_xticks(angles)
-            ax.set_xticklabels(categorias, fontsize=9)
-            
-            y_max = max(valores_cerrado) * 1.2 if max(valores_cerrado) > 0 else 0.2
-            ax.set_ylim(0, y_max)
-            ax.set_yticks([])
-            ax.grid(True, alpha=0.3)
-            ax.set_facecolor('#f1f8e9')
-            
-            nota = datos.get("nota", "Sin comentarios")
-            plt.title(f'Pregunta {pregunta_id}', 
-                    size=10, pad=15, color='#2e572c')
-            
+            grafico_label = self.crear_label_grafico(
+                ARANA_PREGUNTA,
+                datos_arana(intensidad, f'Pregunta {pregunta_id}', emociones_en),
+                tamaño=(6, 5)
+            )
+
             # Frame individual (CORREGIDO: sin box-shadow)
             individual_frame = QFrame()
             individual_frame.setStyleSheet("""
@@ -272,13 +193,22 @@ class ResumenScreen(QWidget):
                 }
             """)
             individual_layout = QVBoxLayout(individual_frame)
-            individual_layout.addWidget(canvas)
+            individual_layout.addWidget(grafico_label)
             
             grid_layout.addWidget(individual_frame, row, col)
         
         self.scroll_layout.addWidget(grid_frame)
     
 
+    def crear_label_grafico(self, tipo, datos, tamaño):
+        """QLabel que muestra el gráfico cuando el caché lo entrega"""
+        label = QLabel("⏳ Generando gráfico...")
+        label.setAlignment(Qt.AlignCenter)
+        label.setStyleSheet("color: #666; padding: 10px;")
+        label.setMinimumSize(int(tamaño[0] * 50), int(tamaño[1] * 50))
+        mostrar_grafico(label, tipo, datos, tamaño=tamaño)
+        return label
+
     def show_placeholder(self, message):
         """Mostrar mensaje placeholder"""
         self.placeholder_label = QLabel(f"🌱 {message}")
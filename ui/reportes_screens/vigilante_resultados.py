@@ -0,0 +1,134 @@
+"""
+Vigilancia de `data/resultados` para refrescar los reportes abiertos.
+
+Un QFileSystemWatcher (inotify en Linux) avisa de cambios en la carpeta de
+resultados y en cada carpeta de entrevista; si no se puede vigilar alguna
+carpeta (límite de inotify, unidades de red) se sondea con un QTimer. En
+ambos casos el trabajo lo hace `DetectorCambios` en un QThread: solo los
+archivos nuevos o modificados se leen y se registran en el catálogo.
+"""
+
+import logging
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, Signal
+
+from classes.catalogo_resultados import CatalogoResultados
+from classes.detector_cambios import DetectorCambios
+
+
+class ActualizacionResultadosThread(QThread):
+    """Escanea, registra en el catálogo lo que cambió y relee las entrevistas afectadas."""
+    finished_with_success = Signal(dict)
+    error_occurred = Signal(str)
+
+    def __init__(self, detector: DetectorCambios, catalogo: CatalogoResultados, cargadas: set):
+        super().__init__()
+        self.detector = detector
+        self.catalogo = catalogo
+        self.cargadas = cargadas
+
+    def run(self):
+        try:
+            cambios = self.detector.escanear()
+            if not cambios:
+                self.finished_with_success.emit({})
+                return
+            self.catalogo.registrar_cambios(cambios.nuevos + cambios.modificados, cambios.eliminados)
+            # Datos por pregunta solo de las entrevistas que ya estaban en memoria;
+            # None para las demás (basta con saber que cambiaron)
+            afectadas = {
+                entrevista_id: self.catalogo.preguntas_de(entrevista_id) if entrevista_id in self.cargadas else None
+                for entrevista_id in cambios.entrevistas()
+            }
+            self.finished_with_success.emit(afectadas)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+
+
+class VigilanteResultados(QObject):
+    """
+    Emite `resultados_actualizados(dict)` con {entrevista_id: preguntas o None}
+    cada vez que aparecen, cambian o se borran resultados.
+    """
+    resultados_actualizados = Signal(dict)
+    error_occurred = Signal(str)
+
+    def __init__(self, catalogo: CatalogoResultados, cargadas=None, logger=None,
+                 retardo_ms: int = 500, intervalo_sondeo_ms: int = 5000, parent=None):
+        super().__init__(parent)
+        self.logger = logger or logging.getLogger(__name__)
+        self.catalogo = catalogo
+        self.directorio = Path(catalogo.resultados_dir)
+        self.detector = DetectorCambios(self.directorio)
+        # Función que devuelve los ids de entrevistas cargadas en memoria
+        self.cargadas = cargadas or (lambda: set())
+        self._hilo: Optional[ActualizacionResultadosThread] = None
+        self._pendiente = False
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directorio_cambiado)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(retardo_ms)
+        self._timer.timeout.connect(self.actualizar)
+        self._sondeo = QTimer(self)
+        self._sondeo.setInterval(intervalo_sondeo_ms)
+        self._sondeo.timeout.connect(self.actualizar)
+
+    def iniciar(self):
+        """Toma el estado actual como referencia y empieza a vigilar."""
+        self.detector.inicializar()
+        self._vigilar_carpetas()
+
+    def detener(self):
+        self._timer.stop()
+        self._sondeo.stop()
+        rutas = self._watcher.directories()
+        if rutas:
+            self._watcher.removePaths(rutas)
+
+    def _vigilar_carpetas(self):
+        """Vigila la carpeta de resultados y cada carpeta de entrevista; sondeo si alguna falla."""
+        carpetas = []
+        if self.directorio.is_dir():
+            carpetas = [self.directorio] + [p for p in self.directorio.iterdir() if p.is_dir()]
+        vigiladas = set(self._watcher.directories())
+        fallidas = [c for c in carpetas if str(c) not in vigiladas and not self._watcher.addPath(str(c))]
+        if not carpetas or fallidas:
+            if not self._sondeo.isActive():
+                self.logger.warning("⚠️ No se pueden vigilar las carpetas de resultados; se revisarán por sondeo")
+                self._sondeo.start()
+        elif self._sondeo.isActive():
+            self._sondeo.stop()
+
+    def _on_directorio_cambiado(self, _ruta):
+        self._timer.start()  # agrupar ráfagas (detalle + resumen, varios fragmentos)
+
+    def actualizar(self):
+        """Busca cambios ahora (si ya hay un escaneo en curso, se repite al terminar)."""
+        if self._hilo is not None:
+            self._pendiente = True
+            return
+        self._vigilar_carpetas()  # carpetas de entrevistas nuevas
+        self._hilo = ActualizacionResultadosThread(self.detector, self.catalogo, set(self.cargadas()))
+        self._hilo.finished_with_success.connect(self._on_actualizado)
+        self._hilo.error_occurred.connect(self._on_error)
+        self._hilo.finished.connect(self._on_hilo_terminado)
+        self._hilo.start()
+
+    def _on_actualizado(self, afectadas: dict):
+        if afectadas:
+            self.logger.info(f"📥 Resultados nuevos o modificados en: {', '.join(sorted(afectadas))}")
+            self.resultados_actualizados.emit(afectadas)
+
+    def _on_error(self, mensaje: str):
+        self.logger.error(f"Error actualizando resultados: {mensaje}")
+        self.error_occurred.emit(mensaje)
+
+    def _on_hilo_terminado(self):
+        self._hilo = None
+        if self._pendiente:
+            self._pendiente = False
+            self.actualizar()
@@ -0,0 +1,188 @@
+"""
+Renderizado de los gráficos araña de reportes a PNG.
+
+Solo usa matplotlib con el backend Agg (sin Qt), así que puede llamarse
+desde cualquier hilo. Cada gráfico se describe con un tipo, sus datos, un
+tamaño y un tema; esos cuatro valores forman la clave del caché de
+`graficos_cache`.
+"""
+
+import io
+import json
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Súbase al cambiar el aspecto de los gráficos: invalida el caché en disco
+VERSION_GRAFICOS = 1
+
+# Tipos de gráfico
+ARANA_GLOBAL = "arana_global"
+ARANA_PREGUNTA = "arana_pregunta"
+ARANA_DETALLE = "arana_detalle"
+
+EMOCIONES_ES = {
+    "angry": "Enojo", "contempt": "Desprecio", "disgust": "Disgusto", "fear": "Miedo",
+    "happy": "Felicidad", "surprise": "Sorpresa", "sad": "Tristeza"
+}
+
+TEMAS = {
+    "verde": {
+        "fondo": "#f8fff8",
+        "fondo_ejes": "#f1f8e9",
+        "linea": "#2e7d32",
+        "linea_suave": "#388e3c",
+        "relleno": "#4caf50",
+        "relleno_suave": "#66bb6a",
+        "titulo": "#2e572c",
+        "etiqueta": "#1b5e20",
+    }
+}
+TEMA_POR_DEFECTO = "verde"
+
+DIRECTORIO_CACHE = Path("data/cache/graficos")
+
+
+def _ejes_arana(fig, tema, valores, categorias):
+    """Ejes polares con el polígono cerrado; devuelve (ax, ángulos sin cerrar, valores cerrados)."""
+    angles = np.linspace(0, 2 * np.pi, len(categorias), endpoint=False).tolist()
+    ax = fig.add_subplot(111, polar=True)
+    ax.set_facecolor(tema["fondo_ejes"])
+    ax.grid(True, alpha=0.3)
+    return ax, angles, valores + valores[:1]
+
+
+def _arana_global(fig, tema, datos):
+    categorias = [EMOCIONES_ES[emo] for emo in datos["emociones"]]
+    valores = list(datos["valores"])
+    ax, angles, valores_cerrado = _ejes_arana(fig, tema, valores, categorias)
+    ax.plot(angles + angles[:1], valores_cerrado, 'o-', linewidth=2, label='Promedio Global',
+            color=tema["linea"], markersize=8)
+    ax.fill(angles + angles[:1], valores_cerrado, alpha=0.25, color=tema["relleno"])
+    ax.set_xticks(angles)
+    ax.set_xticklabels(categorias, fontsize=11)
+    y_max = max(valores_cerrado) * 1.2 if max(valores_cerrado) > 0 else 0.2
+    ax.set_ylim(0, y_max)
+    ax.set_yticks(np.linspace(0, y_max, 5))
+    ax.set_title(datos.get("titulo", ""), size=14, pad=20, color=tema["titulo"], weight='bold')
+
+
+def _arana_pregunta(fig, tema, datos):
+    categorias = [EMOCIONES_ES[emo] for emo in datos["emociones"]]
+    valores = list(datos["valores"])
+    ax, angles, valores_cerrado = _ejes_arana(fig, tema, valores, categorias)
+    ax.plot(angles + angles[:1], valores_cerrado, 'o-', linewidth=2,
+            color=tema["linea_suave"], markersize=6)
+    ax.fill(angles + angles[:1], valores_cerrado, alpha=0.3, color=tema["relleno_suave"])
+    ax.set_xticks(angles)
+    ax.set_xticklabels(categorias, fontsize=9)
+    y_max = max(valores_cerrado) * 1.2 if max(valores_cerrado) > 0 else 0.2
+    ax.set_ylim(0, y_max)
+    ax.set_yticks([])
+    ax.set_title(datos.get("titulo", ""), size=10, pad=15, color=tema["titulo"])
+
+
+def _arana_detalle(fig, tema, datos):
+    categorias = [EMOCIONES_ES[emo] for emo in datos["emociones"]]
+    valores = list(datos["valores"])
+    ax, angles, valores_cerrado = _ejes_arana(fig, tema, valores, categorias)
+    ax.plot(angles + angles[:1], valores_cerrado, 'o-', linewidth=3,
+            color=tema["linea"], markersize=10, label='Intensidad')
+    ax.fill(angles + angles[:1], valores_cerrado, alpha=0.25, color=tema["relleno"])
+    for angle, valor in zip(angles, valores):
+        ax.text(angle, valor + 0.02, f'{valor:.3f}',
+                ha='center', va='bottom', fontsize=9, color=tema["etiqueta"])
+    ax.set_xticks(angles)
+    ax.set_xticklabels(categorias, fontsize=12)
+    ax.set_ylim(0, max(valores_cerrado) * 1.3 if max(valores_cerrado) > 0 else 1)
+    ax.set_yticks([])
+    ax.set_title(datos.get("titulo", ""), size=14, pad=25, color=tema["titulo"], weight='bold')
+
+
+_RENDERIZADORES = {
+    ARANA_GLOBAL: _arana_global,
+    ARANA_PREGUNTA: _arana_pregunta,
+    ARANA_DETALLE: _arana_detalle,
+}
+
+
+def datos_arana(intensidad: dict, titulo: str = "", emociones=None) -> dict:
+    """Datos serializables de un gráfico araña a partir de un dict de intensidades."""
+    emociones = list(emociones or EMOCIONES_ES)
+    return {
+        "emociones": emociones,
+        # Redondeado: la clave de caché no depende del orden en que se sumaron los promedios
+        "valores": [round(float(intensidad.get(emo, 0) or 0), 6) for emo in emociones],
+        "titulo": titulo,
+    }
+
+
+def clave_grafico(tipo: str, datos: dict, tamaño=(10, 8), tema: str = TEMA_POR_DEFECTO) -> str:
+    contenido = json.dumps([VERSION_GRAFICOS, tipo, datos, list(tamaño), tema], sort_keys=True)
+    return hashlib.sha1(contenido.encode("utf-8")).hexdigest()
+
+
+def ordenar_preguntas(preguntas):
+    """Preguntas ordenadas numéricamente, como en las pantallas de reportes"""
+    return sorted(preguntas.items(), key=lambda x: int(x[0]) if x[0].isdigit() else 0)
+
+
+def promedios_intensidad(preguntas):
+    """Promedio de intensidad por emoción sobre todas las preguntas"""
+    promedios = {emo: 0 for emo in EMOCIONES_ES}
+    for datos in preguntas.values():
+        intensidad = datos.get("intensidad", {})
+        for emo in promedios:
+            promedios[emo] += intensidad.get(emo, 0) or 0
+    if preguntas:
+        for emo in promedios:
+            promedios[emo] /= len(preguntas)
+    return promedios
+
+
+# Orden de emociones del gráfico de detalle (DetalleScreen)
+EMOCIONES_DETALLE = ["angry", "disgust", "fear", "happy", "surprise", "sad", "contempt"]
+
+
+def graficos_de_entrevista(entrevista_id: str, preguntas: dict, promedios: Optional[dict] = None):
+    """
+    (tipo, datos, tamaño) de todos los gráficos que muestran las pantallas de
+    reportes para una entrevista: global, uno por pregunta y el de detalle.
+    Mismos datos que ResumenScreen y DetalleScreen, así las claves coinciden.
+    `promedios` son los del motor de analítica; sin ellos se calculan aquí.
+    """
+    graficos = [(ARANA_GLOBAL,
+                 datos_arana(promedios or promedios_intensidad(preguntas),
+                             f'Resumen Emocional Global\nEntrevista {entrevista_id}'),
+                 (10, 8))]
+    for pregunta_id, datos in ordenar_preguntas(preguntas):
+        intensidad = datos.get("intensidad", {})
+        graficos.append((ARANA_PREGUNTA, datos_arana(intensidad, f'Pregunta {pregunta_id}'), (6, 5)))
+        graficos.append((ARANA_DETALLE, datos_arana(intensidad, 'Distribución de Emociones', EMOCIONES_DETALLE),
+                         (10, 8)))
+    return graficos
+
+
+def renderizar_grafico(tipo: str, datos: dict, tamaño=(10, 8), tema: str = TEMA_POR_DEFECTO,
+                       dpi: int = 100, formato: str = "png") -> bytes:
+    """Dibuja el gráfico `tipo` con figura de `tamaño` pulgadas y lo devuelve como PNG (o SVG)."""
+    if tipo not in _RENDERIZADORES:
+        raise ValueError(f"Tipo de gráfico desconocido: {tipo}")
+    colores = TEMAS.get(tema, TEMAS[TEMA_POR_DEFECTO])
+
+    fig = Figure(figsize=tamaño, dpi=dpi, facecolor=colores["fondo"])
+    FigureCanvasAgg(fig)
+    _RENDERIZADORES[tipo](fig, colores, datos)
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=formato, facecolor=fig.get_facecolor())
+    return buffer.getvalue()
+
+
+def renderizar_para_exportar(nombre: str, tipo: str, datos: dict, tamaño=(10, 8), formato: str = "png"):
+    """Versión para ProcessPoolExecutor: devuelve (nombre del archivo, bytes)."""
+    return nombre, renderizar_grafico(tipo, datos, tamaño, formato=formato)
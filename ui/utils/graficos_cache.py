@@ -0,0 +1,211 @@
+"""
+Caché de gráficos renderizados para las pantallas de reportes.
+
+La clave es un hash de (versión, tipo de gráfico, datos, tamaño, tema). Los
+pixmaps ya decodificados se guardan en memoria con expulsión LRU y los PNG en
+disco bajo `data/cache/graficos/`, así que volver a una pregunta o reabrir
+una entrevista no vuelve a dibujar nada. Lo que falta se renderiza en el
+QThreadPool global, fuera del hilo de la interfaz. El tamaño de la clave es el
+del render; en pantalla `mostrar_grafico` reescala el pixmap al del label.
+"""
+
+import os
+import logging
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from PySide6.QtCore import QEvent, QObject, QRunnable, QThreadPool, Qt, Signal, Slot
+from PySide6.QtGui import QPixmap
+
+# La clave y la carpeta viven en graficos (sin Qt) para que el planificador
+# pueda dejar los PNG listos desde otro proceso
+from .graficos import TEMA_POR_DEFECTO, DIRECTORIO_CACHE, clave_grafico, renderizar_grafico
+
+logger = logging.getLogger(__name__)
+
+
+class _SenalesRender(QObject):
+    listo = Signal(str, bytes)
+    error = Signal(str, str)
+
+
+class _TareaRender(QRunnable):
+    """Busca el PNG en disco o lo renderiza; se ejecuta en el QThreadPool."""
+
+    def __init__(self, cache: "CacheGraficos", clave: str, tipo: str, datos: dict, tamaño, tema: str):
+        super().__init__()
+        self.cache = cache
+        self.clave = clave
+        self.args = (tipo, datos, tamaño, tema)
+
+    def run(self):
+        try:
+            png = self.cache.leer_disco(self.clave)
+            if png is None:
+                png = renderizar_grafico(*self.args)
+                self.cache.escribir_disco(self.clave, png)
+            self.cache.senales.listo.emit(self.clave, png)
+        except Exception as e:
+            self.cache.senales.error.emit(self.clave, str(e))
+
+
+class CacheGraficos(QObject):
+    """
+    Caché en dos niveles (memoria LRU de QPixmap y PNG en disco).
+
+    Usar desde el hilo de la interfaz: los QPixmap solo se crean y entregan
+    ahí; el renderizado y el acceso a disco ocurren en el pool de hilos.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_CACHE, capacidad: int = 64, parent=None):
+        super().__init__(parent)
+        self.directorio = Path(directorio)
+        self.capacidad = capacidad
+        self._memoria: "OrderedDict[str, QPixmap]" = OrderedDict()
+        self._esperando: Dict[str, List[Callable[[QPixmap], None]]] = {}
+        self._pool = QThreadPool.globalInstance()
+        self.senales = _SenalesRender()
+        self.senales.listo.connect(self._on_renderizado)
+        self.senales.error.connect(self._on_error)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Disco (se usa desde los hilos del pool)
+    # ------------------------------------------------------------------
+    def _ruta(self, clave: str) -> Path:
+        return self.directorio / f"{clave}.png"
+
+    def leer_disco(self, clave: str) -> Optional[bytes]:
+        try:
+            return self._ruta(clave).read_bytes()
+        except OSError:
+            return None
+
+    def escribir_disco(self, clave: str, png: bytes):
+        try:
+            fd, temporal = tempfile.mkstemp(suffix=".tmp", dir=str(self.directorio))
+            with os.fdopen(fd, "wb") as f:
+                f.write(png)
+            os.replace(temporal, self._ruta(clave))
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el gráfico {clave} en disco: {e}")
+
+    # ------------------------------------------------------------------
+    # Memoria (hilo de la interfaz)
+    # ------------------------------------------------------------------
+    def obtener(self, clave: str) -> Optional[QPixmap]:
+        pixmap = self._memoria.get(clave)
+        if pixmap is not None:
+            self._memoria.move_to_end(clave)
+        return pixmap
+
+    def _guardar_memoria(self, clave: str, pixmap: QPixmap):
+        self._memoria[clave] = pixmap
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.capacidad:
+            self._memoria.popitem(last=False)
+
+    def solicitar(self, tipo: str, datos: dict, callback: Callable[[QPixmap], None],
+                  tamaño=(10, 8), tema: str = TEMA_POR_DEFECTO) -> str:
+        """
+        Entrega el gráfico a `callback`: en el acto si está en memoria, si no
+        cuando termine la carga de disco o el renderizado. Devuelve la clave.
+        """
+        clave = clave_grafico(tipo, datos, tamaño, tema)
+        pixmap = self.obtener(clave)
+        if pixmap is not None:
+            callback(pixmap)
+            return clave
+
+        if clave in self._esperando:
+            self._esperando[clave].append(callback)  # ya se está renderizando
+            return clave
+        self._esperando[clave] = [callback]
+        self._pool.start(_TareaRender(self, clave, tipo, datos, tamaño, tema))
+        return clave
+
+    @Slot(str, bytes)
+    def _on_renderizado(self, clave: str, png: bytes):
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(png, "PNG"):
+            self._on_error(clave, "PNG inválido")
+            return
+        self._guardar_memoria(clave, pixmap)
+        for callback in self._esperando.pop(clave, []):
+            try:
+                callback(pixmap)
+            except RuntimeError:
+                pass  # el widget destino ya fue destruido
+
+    @Slot(str, str)
+    def _on_error(self, clave: str, mensaje: str):
+        self._esperando.pop(clave, None)
+        logger.error(f"Error renderizando gráfico {clave}: {mensaje}")
+
+
+_cache_global: Optional[CacheGraficos] = None
+
+
+def cache_graficos() -> CacheGraficos:
+    """Instancia compartida por todas las pantallas de reportes."""
+    global _cache_global
+    if _cache_global is None:
+        _cache_global = CacheGraficos()
+    return _cache_global
+
+
+class _AjusteGrafico(QObject):
+    """
+    Mantiene el gráfico de un QLabel ajustado al tamaño del label: guarda el
+    pixmap renderizado y lo reescala (sin pasar de su tamaño original, para
+    no pixelarlo) cada vez que el label cambia de tamaño.
+    """
+
+    NOMBRE = "ajuste_grafico"
+
+    def __init__(self, label):
+        super().__init__(label)
+        self.setObjectName(self.NOMBRE)
+        self.label = label
+        self.original: Optional[QPixmap] = None
+        label.installEventFilter(self)
+
+    @classmethod
+    def de(cls, label) -> "_AjusteGrafico":
+        ajuste = label.findChild(QObject, cls.NOMBRE)
+        return ajuste if isinstance(ajuste, cls) else cls(label)
+
+    def asignar(self, pixmap: QPixmap):
+        self.original = pixmap
+        self._escalar()
+
+    def _escalar(self):
+        tamaño = self.label.contentsRect().size()
+        if self.original is None or tamaño.isEmpty():
+            return
+        self.label.setPixmap(self.original.scaled(tamaño.boundedTo(self.original.size()),
+                                                  Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+    def eventFilter(self, objeto, evento):
+        if objeto is self.label and evento.type() == QEvent.Resize:
+            self._escalar()
+        return False
+
+
+def mostrar_grafico(label, tipo: str, datos: dict, tamaño=(10, 8), tema: str = TEMA_POR_DEFECTO):
+    """
+    Pide el gráfico para un QLabel y lo mantiene ajustado al tamaño del label.
+    Si mientras tanto el label pasa a mostrar otro gráfico (o se destruye), el
+    resultado se descarta.
+    """
+    clave = clave_grafico(tipo, datos, tamaño, tema)
+    label.setProperty("clave_grafico", clave)
+    ajuste = _AjusteGrafico.de(label)
+
+    def asignar(pixmap):
+        if label.property("clave_grafico") == clave:
+            ajuste.asignar(pixmap)
+
+    cache_graficos().solicitar(tipo, datos, asignar, tamaño, tema)
@@ -0,0 +1,239 @@
+"""
+Listado de fragmentos de una entrevista en segundo plano.
+
+`ListadoFragmentos` recorre `data/fragmentos/<id>/` en un QThread y entrega
+los fragmentos por lotes para que las tablas se llenen poco a poco. El
+archivo de marcas se lee una sola vez por entrevista y las duraciones salen
+del servicio de metadatos. Después vigila la carpeta y el archivo de marcas
+con un QFileSystemWatcher y solo emite lo que cambió (altas, cambios y bajas).
+"""
+
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PySide6.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, Signal
+
+from classes.diario_marcas import cargar_marcas, ruta_diario_para
+from video_io.metadatos import servicio_metadatos
+
+MARCAS_DIR = Path("data/marcas")
+
+
+def _clave_pregunta(pregunta_id) -> str:
+    """'007' y 7 se comparan igual."""
+    texto = str(pregunta_id)
+    return str(int(texto)) if texto.isdigit() else texto
+
+
+def ids_de_fragmento(nombre: str) -> Tuple[str, str]:
+    """fragmento_<entrevista>_<pregunta>.mp4 -> (entrevista_id, pregunta_id)"""
+    partes = Path(nombre).stem.split("_")
+    return "_".join(partes[1:-1]), partes[-1]
+
+
+def marcas_por_pregunta(entrevista_id: str) -> Dict[str, dict]:
+    ruta = MARCAS_DIR / f"marcas_{entrevista_id}.json"
+    if not ruta.exists() and not ruta_diario_para(ruta).exists():
+        return {}
+    return {_clave_pregunta(m.get("pregunta_id")): m for m in cargar_marcas(ruta).get("marcas", [])}
+
+
+class ListadoFragmentosThread(QThread):
+    """Arma la información de cada fragmento (stat, duración, marca) y la emite por lotes."""
+    lote_listo = Signal(int, list)
+    error_occurred = Signal(int, str)
+
+    def __init__(self, generacion: int, entrevista_dir: Path, rutas: Optional[List[Path]] = None,
+                 formatear_duracion: Optional[Callable[[float], str]] = None, tamaño_lote: int = 8):
+        super().__init__()
+        self.generacion = generacion
+        self.entrevista_dir = Path(entrevista_dir)
+        self.rutas = rutas
+        self.formatear_duracion = formatear_duracion or (lambda s: f"{s:.1f}s")
+        self.tamaño_lote = tamaño_lote
+        self._marcas: Dict[str, Dict[str, dict]] = {}
+
+    def run(self):
+        try:
+            rutas = self.rutas if self.rutas is not None else sorted(self.entrevista_dir.glob("*.mp4"))
+            for i in range(0, len(rutas), self.tamaño_lote):
+                if self.isInterruptionRequested():
+                    return
+                lote = rutas[i:i + self.tamaño_lote]
+                duraciones = servicio_metadatos().precargar(lote)
+                infos = []
+                for ruta in lote:
+                    info = self._info_fragmento(ruta, duraciones.get(ruta))
+                    if info is not None:
+                        infos.append(info)
+                if infos:
+                    self.lote_listo.emit(self.generacion, infos)
+        except Exception as e:
+            self.error_occurred.emit(self.generacion, str(e))
+
+    def _info_fragmento(self, ruta: Path, metadatos) -> Optional[dict]:
+        try:
+            stat = ruta.stat()
+        except OSError:
+            return None  # borrado mientras se listaba
+        entrevista_id, pregunta_id = ids_de_fragmento(ruta.name)
+        info = {
+            'path': ruta,
+            'name': ruta.name,
+            'duration': self.formatear_duracion(metadatos.duracion) if metadatos else "N/A",
+            'size': stat.st_size,
+            'creation_time': datetime.fromtimestamp(stat.st_ctime),
+            'modification_time': datetime.fromtimestamp(stat.st_mtime),
+            'entrevista_id': entrevista_id,
+            'pregunta_id': pregunta_id
+        }
+
+        # Marcas: un archivo por entrevista, leído una sola vez por listado
+        if entrevista_id not in self._marcas:
+            try:
+                self._marcas[entrevista_id] = marcas_por_pregunta(entrevista_id)
+            except Exception:
+                self._marcas[entrevista_id] = {}
+        marca = self._marcas[entrevista_id].get(_clave_pregunta(pregunta_id))
+        if marca is not None:
+            info['marca_inicio'] = marca.get("inicio", "N/A")
+            info['marca_fin'] = marca.get("fin", "N/A")
+            info['marca_nota'] = marca.get("nota", "")
+        return info
+
+
+class ListadoFragmentos(QObject):
+    """
+    Listado incremental y vigilado de los fragmentos de una entrevista.
+
+    Señales: `lote_listo(list)` con fragmentos nuevos (carga inicial o
+    archivos que aparecen), `fragmento_actualizado(dict)` cuando cambia un
+    fragmento ya listado o su marca, `fragmento_eliminado(str)` con la ruta
+    de un fragmento borrado y `error_occurred(str)`.
+    """
+    lote_listo = Signal(list)
+    fragmento_actualizado = Signal(dict)
+    fragmento_eliminado = Signal(str)
+    error_occurred = Signal(str)
+
+    def __init__(self, formatear_duracion: Optional[Callable[[float], str]] = None,
+                 logger=None, retardo_ms: int = 400, parent=None):
+        super().__init__(parent)
+        self.logger = logger or logging.getLogger(__name__)
+        self.formatear_duracion = formatear_duracion
+        self.entrevista_dir: Optional[Path] = None
+        self._generacion = 0
+        self._hilos: List[ListadoFragmentosThread] = []
+        self._conocidos: Dict[str, Tuple[int, float]] = {}
+        self._marcas_vigiladas: List[str] = []
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._programar_sincronizacion)
+        self._watcher.fileChanged.connect(self._on_marcas_cambiadas)
+        # Agrupa las ráfagas de eventos (ffmpeg escribiendo, varias altas seguidas)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(retardo_ms)
+        self._timer.timeout.connect(self._sincronizar)
+        self._marcas_cambiadas = False
+
+    def cargar(self, entrevista_dir):
+        """Empieza a listar una entrevista (cancela el listado anterior)."""
+        self.detener()
+        self.entrevista_dir = Path(entrevista_dir)
+        self._vigilar()
+        self._lanzar(None)
+
+    def detener(self):
+        self._generacion += 1
+        self._timer.stop()
+        for hilo in self._hilos:
+            hilo.requestInterruption()
+        rutas = self._watcher.directories() + self._watcher.files()
+        if rutas:
+            self._watcher.removePaths(rutas)
+        self._conocidos.clear()
+        self._marcas_cambiadas = False
+        self.entrevista_dir = None
+
+    def _vigilar(self):
+        self._watcher.addPath(str(self.entrevista_dir))
+        ruta_marcas = MARCAS_DIR / f"marcas_{self.entrevista_dir.name}.json"
+        self._marcas_vigiladas = [str(ruta_marcas), str(ruta_diario_para(ruta_marcas))]
+        self._vigilar_marcas()
+
+    def _vigilar_marcas(self):
+        # Tras un reemplazo atómico el watcher pierde el archivo: se vuelve a añadir
+        existentes = [r for r in self._marcas_vigiladas if Path(r).exists() and r not in self._watcher.files()]
+        if existentes:
+            self._watcher.addPaths(existentes)
+
+    def _lanzar(self, rutas: Optional[List[Path]]):
+        hilo = ListadoFragmentosThread(self._generacion, self.entrevista_dir, rutas, self.formatear_duracion)
+        hilo.lote_listo.connect(self._on_lote)
+        hilo.error_occurred.connect(self._on_error)
+        hilo.finished.connect(lambda h=hilo: self._hilos.remove(h) if h in self._hilos else None)
+        self._hilos.append(hilo)
+        hilo.start()
+
+    def _ocupado(self) -> bool:
+        return any(h.generacion == self._generacion and h.isRunning() for h in self._hilos)
+
+    def _on_lote(self, generacion: int, infos: list):
+        if generacion != self._generacion:
+            return  # listado de otra entrevista
+        nuevos = []
+        for info in infos:
+            clave = str(info['path'])
+            ya_listado = clave in self._conocidos
+            self._conocidos[clave] = (info['size'], info['modification_time'].timestamp())
+            if ya_listado:
+                self.fragmento_actualizado.emit(info)
+            else:
+                nuevos.append(info)
+        if nuevos:
+            self.lote_listo.emit(nuevos)
+
+    def _on_error(self, generacion: int, mensaje: str):
+        if generacion == self._generacion:
+            self.logger.error(f"Error listando fragmentos: {mensaje}")
+            self.error_occurred.emit(mensaje)
+
+    def _programar_sincronizacion(self, *_):
+        self._timer.start()
+
+    def _on_marcas_cambiadas(self, *_):
+        self._marcas_cambiadas = True
+        self._timer.start()
+
+    def _sincronizar(self):
+        """Compara la carpeta con lo ya listado y vuelve a leer solo lo que cambió."""
+        if self.entrevista_dir is None:
+            return
+        if self._ocupado():
+            self._timer.start()  # esperar a que termine el listado en curso
+            return
+        self._vigilar_marcas()
+
+        actuales = {}
+        for ruta in self.entrevista_dir.glob("*.mp4"):
+            try:
+                stat = ruta.stat()
+            except OSError:
+                continue
+            actuales[str(ruta)] = (stat.st_size, stat.st_mtime)
+
+        for clave in set(self._conocidos) - set(actuales):
+            del self._conocidos[clave]
+            self.fragmento_eliminado.emit(clave)
+
+        if self._marcas_cambiadas:
+            # La marca de cualquier fragmento pudo cambiar: se releen todos (duración en caché)
+            cambiados = sorted(actuales)
+            self._marcas_cambiadas = False
+        else:
+            cambiados = sorted(c for c, estado in actuales.items() if self._conocidos.get(c) != estado)
+        if cambiados:
+            self._lanzar([Path(c) for c in cambiados])
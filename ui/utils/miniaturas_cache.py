@@ -0,0 +1,194 @@
+"""
+Miniaturas de fragmentos para las tablas y paneles de vista previa.
+
+Las imágenes salen de `video_io.miniaturas` (caché en disco por contenido);
+aquí se generan en un QThreadPool propio con pocos hilos, para no competir
+con el análisis ni lanzar decenas de ffmpeg a la vez, y los QPixmap ya
+decodificados se guardan en memoria con clave (ruta, tamaño, mtime). Al
+volver a una pantalla las miniaturas se asignan en el acto.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, Signal, Slot
+from PySide6.QtGui import QPixmap
+
+from video_io.miniaturas import obtener_miniaturas
+
+logger = logging.getLogger(__name__)
+
+POSTER = "poster"
+TIRA = "tira"
+
+
+def clave_miniatura(ruta) -> Optional[str]:
+    try:
+        stat = Path(ruta).stat()
+    except OSError:
+        return None
+    return f"{Path(ruta).resolve()}|{stat.st_size}|{stat.st_mtime}"
+
+
+class _SenalesMiniatura(QObject):
+    listo = Signal(str, str, str)
+    error = Signal(str, str)
+    descartada = Signal(str, str)
+
+
+class _TareaMiniatura(QRunnable):
+    """Busca o genera las miniaturas de un video; se ejecuta en el pool de miniaturas."""
+
+    def __init__(self, senales: _SenalesMiniatura, clave: str, ruta: Path, descartada: Callable[[str], bool]):
+        super().__init__()
+        self.senales = senales
+        self.clave = clave
+        self.ruta = ruta
+        self.descartada = descartada
+
+    def run(self):
+        if self.descartada(self.clave):
+            # Nadie la espera ya (se cambió de entrevista): no se lanza ffmpeg
+            self.senales.descartada.emit(self.clave, str(self.ruta))
+            return
+        try:
+            miniaturas = obtener_miniaturas(self.ruta)
+            self.senales.listo.emit(self.clave, str(miniaturas.poster), str(miniaturas.tira))
+        except Exception as e:
+            self.senales.error.emit(self.clave, str(e))
+
+
+class CacheMiniaturas(QObject):
+    """
+    Póster y tira de cada fragmento como QPixmap, con memoria LRU.
+
+    Usar desde el hilo de la interfaz. La generación usa como mucho
+    `max_hilos` procesos de ffmpeg simultáneos. Cada pedido puede indicar
+    su `solicitante` (la pantalla), para cancelar solo los suyos.
+    """
+
+    def __init__(self, capacidad: int = 256, max_hilos: int = 2, parent=None):
+        super().__init__(parent)
+        self.capacidad = capacidad
+        self._memoria: "OrderedDict[str, Dict[str, QPixmap]]" = OrderedDict()
+        self._esperando: Dict[str, List[Tuple[str, Callable[[QPixmap], None], object]]] = {}
+        self._en_cola: Set[str] = set()  # claves con una tarea lanzada que aún no terminó
+        self._descartadas: Set[str] = set()  # se consulta desde los hilos del pool
+        self._lock = threading.Lock()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_hilos)
+        self.senales = _SenalesMiniatura()
+        self.senales.listo.connect(self._on_generada)
+        self.senales.error.connect(self._on_error)
+        self.senales.descartada.connect(self._on_descartada)
+
+    def _guardar_memoria(self, clave: str, pixmaps: Dict[str, QPixmap]):
+        self._memoria[clave] = pixmaps
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.capacidad:
+            self._memoria.popitem(last=False)
+
+    def solicitar(self, ruta, tipo: str, callback: Callable[[QPixmap], None],
+                  solicitante=None) -> Optional[str]:
+        """
+        Entrega el póster o la tira (`tipo`) de un video a `callback`: en el
+        acto si ya está en memoria, si no cuando termine la generación.
+        """
+        clave = clave_miniatura(ruta)
+        if clave is None:
+            return None
+        pixmaps = self._memoria.get(clave)
+        if pixmaps is not None:
+            self._memoria.move_to_end(clave)
+            callback(pixmaps[tipo])
+            return clave
+
+        if clave in self._esperando:
+            self._esperando[clave].append((tipo, callback, solicitante))
+            return clave
+        self._esperando[clave] = [(tipo, callback, solicitante)]
+        self._lanzar(clave, ruta)
+        return clave
+
+    def _lanzar(self, clave: str, ruta):
+        with self._lock:
+            self._descartadas.discard(clave)
+        if clave not in self._en_cola:
+            self._en_cola.add(clave)
+            self._pool.start(_TareaMiniatura(self.senales, clave, Path(ruta), self._esta_descartada))
+
+    def _esta_descartada(self, clave: str) -> bool:
+        with self._lock:
+            return clave in self._descartadas
+
+    def _terminada(self, clave: str):
+        self._en_cola.discard(clave)
+        with self._lock:
+            self._descartadas.discard(clave)
+
+    def cancelar_pendientes(self, solicitante):
+        """
+        Descarta los pedidos de `solicitante` que siguen esperando (p. ej. al
+        cambiar de entrevista). Las generaciones que ya nadie espera no llegan
+        a lanzar ffmpeg; las que otra pantalla también pidió siguen su curso.
+        """
+        for clave, pedidos in list(self._esperando.items()):
+            restantes = [p for p in pedidos if p[2] is not solicitante]
+            if restantes:
+                self._esperando[clave] = restantes
+                continue
+            del self._esperando[clave]
+            with self._lock:
+                self._descartadas.add(clave)
+
+    @Slot(str, str, str)
+    def _on_generada(self, clave: str, ruta_poster: str, ruta_tira: str):
+        self._terminada(clave)
+        pixmaps = {POSTER: QPixmap(ruta_poster), TIRA: QPixmap(ruta_tira)}
+        if pixmaps[POSTER].isNull() or pixmaps[TIRA].isNull():
+            self._on_error(clave, "imagen ilegible")
+            return
+        self._guardar_memoria(clave, pixmaps)
+        for tipo, callback, _ in self._esperando.pop(clave, []):
+            try:
+                callback(pixmaps[tipo])
+            except RuntimeError:
+                pass  # el widget destino ya fue destruido
+
+    @Slot(str, str)
+    def _on_error(self, clave: str, mensaje: str):
+        self._terminada(clave)
+        self._esperando.pop(clave, None)
+        logger.warning(f"Sin miniaturas para {clave.split('|')[0]}: {mensaje}")
+
+    @Slot(str, str)
+    def _on_descartada(self, clave: str, ruta: str):
+        self._terminada(clave)
+        if clave in self._esperando:
+            self._lanzar(clave, ruta)  # se volvió a pedir después de cancelarla
+
+
+_cache_global: Optional[CacheMiniaturas] = None
+
+
+def cache_miniaturas() -> CacheMiniaturas:
+    """Instancia compartida por las pantallas de fragmentos y análisis."""
+    global _cache_global
+    if _cache_global is None:
+        _cache_global = CacheMiniaturas()
+    return _cache_global
+
+
+def mostrar_miniatura(label, ruta, tipo: str = TIRA):
+    """Pide una miniatura para un QLabel; se descarta si el label ya muestra otro video."""
+    label.setProperty("ruta_miniatura", str(ruta))
+
+    def asignar(pixmap):
+        if label.property("ruta_miniatura") == str(ruta):
+            label.setPixmap(pixmap.scaled(label.contentsRect().size(), Qt.KeepAspectRatio,
+                                          Qt.SmoothTransformation))
+
+    cache_miniaturas().solicitar(ruta, tipo, asignar)
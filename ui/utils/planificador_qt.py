@@ -0,0 +1,85 @@
+"""
+Acceso al planificador de trabajos desde la interfaz.
+
+`classes.planificador.Planificador` avisa a sus suscriptores desde su propio
+hilo; aquí esos avisos se reemiten como señal Qt (se entregan en el hilo de
+la interfaz), así cualquier ventana puede mostrar el progreso de la cola sin
+consultarla. La instancia es compartida y se detiene al cerrar la aplicación;
+lo que quede a medias se retoma en el próximo arranque.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+from PySide6.QtCore import QCoreApplication, QObject, Signal
+
+from classes.planificador import (
+    Planificador, plan_entrevista, PENDIENTE, EJECUTANDO, COMPLETADO, ERROR,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ServicioPlanificador(QObject):
+    """Planificador compartido con señales Qt."""
+
+    # dict del trabajo que cambió (ver Trabajo.a_dict)
+    trabajo_actualizado = Signal(dict)
+
+    def __init__(self, planificador: Optional[Planificador] = None, parent=None):
+        super().__init__(parent)
+        self.planificador = planificador or Planificador()
+        self.planificador.suscribir(self.trabajo_actualizado.emit)
+
+    def iniciar(self):
+        self.planificador.iniciar()
+
+    def detener(self):
+        self.planificador.detener()
+
+    def encolar_entrevista(self, entrevista_id: str, video, marcas_json, modelo, proxy: Optional[str] = None,
+                           rehacer: bool = False) -> int:
+        """Encola el grafo completo de una entrevista; devuelve cuántos trabajos quedaron pendientes."""
+        trabajos = plan_entrevista(entrevista_id, video, marcas_json, modelo, proxy=proxy)
+        return self.planificador.encolar(trabajos, rehacer=rehacer)
+
+    def priorizar_entrevista(self, entrevista_id: str):
+        self.planificador.priorizar_entrevista(entrevista_id)
+
+    def cancelar_entrevista(self, entrevista_id: str) -> int:
+        return self.planificador.cancelar_entrevista(entrevista_id)
+
+    def estado(self, entrevista_id: Optional[str] = None) -> dict:
+        return self.planificador.estado(entrevista_id)
+
+    def describir(self, entrevista_id: Optional[str] = None) -> str:
+        """Texto corto para una etiqueta de estado."""
+        conteos = self.estado(entrevista_id)["conteos"]
+        total = sum(conteos.values())
+        if total == 0:
+            return "Sin trabajos en segundo plano"
+        texto = f"🗓️ {conteos[COMPLETADO]}/{total} completados"
+        if conteos[EJECUTANDO] or conteos[PENDIENTE]:
+            texto += f" | {conteos[EJECUTANDO]} en curso, {conteos[PENDIENTE]} pendientes"
+        if conteos[ERROR]:
+            texto += f" | ❌ {conteos[ERROR]} con error"
+        return texto
+
+
+_servicio: Optional[ServicioPlanificador] = None
+_servicio_lock = threading.Lock()
+
+
+def servicio_planificador() -> ServicioPlanificador:
+    """Instancia compartida por todas las ventanas; se inicia al primer uso."""
+    global _servicio
+    with _servicio_lock:
+        if _servicio is None:
+            _servicio = ServicioPlanificador()
+            _servicio.iniciar()
+            app = QCoreApplication.instance()
+            if app is not None:
+                app.aboutToQuit.connect(_servicio.detener)
+            logger.info("Planificador de trabajos iniciado")
+        return _servicio
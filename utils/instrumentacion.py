@@ -0,0 +1,209 @@
+"""
+Instrumentación por etapas para el análisis de fragmentos.
+
+`Instrumentacion` mide con un reloj monotónico (`time.perf_counter_ns`)
+cuánto tarda cada etapa del bucle de análisis (decodificación, conversión de
+color, detección de rostro, recorte, preprocesado, inferencia, serialización)
+y lleva contadores (frames leídos, sin rostro, ...). Al terminar un fragmento
+`resumen()` da, por etapa, número de llamadas, total y percentiles p50/p95/p99
+en milisegundos, más los fps de extremo a extremo; es lo que se guarda en el
+resultado (`analisis.rendimiento`) y se escribe en el log.
+
+Con las trazas activadas (`main.py --trazar`) cada medición se guarda además
+como evento "X" del formato Chrome trace event; `exportar_traza` escribe el
+JSON que se abre en chrome://tracing o https://ui.perfetto.dev.
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Nombres de etapas usados por Analisis y AnalysisThread
+DECODIFICACION = "decodificacion"
+CONVERSION_COLOR = "conversion_color"
+DETECCION_ROSTRO = "deteccion_rostro"
+RECORTE = "recorte"
+PREPROCESADO = "preprocesado"
+INFERENCIA = "inferencia"
+SERIALIZACION = "serializacion"
+
+PERCENTILES = (50, 95, 99)
+DIRECTORIO_TRAZAS = Path("logs") / "trazas"
+
+_trazas_activas = False
+
+
+def activar_trazas(activar: bool = True):
+    """Guarda eventos de traza en las próximas instrumentaciones (ver `main.py --trazar`)."""
+    global _trazas_activas
+    _trazas_activas = activar
+
+
+def trazas_activas() -> bool:
+    return _trazas_activas
+
+
+def percentil(valores_ordenados: List[int], p: float) -> int:
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not valores_ordenados:
+        return 0
+    indice = max(int(-(-p * len(valores_ordenados) // 100)) - 1, 0)  # ceil(p·n/100) - 1
+    return valores_ordenados[min(indice, len(valores_ordenados) - 1)]
+
+
+class _Medicion:
+    """Context manager de una etapa; se reutiliza para no crear objetos por frame."""
+    __slots__ = ("_instr", "_nombre", "_inicio")
+
+    def __init__(self, instr: "Instrumentacion", nombre: str):
+        self._instr = instr
+        self._nombre = nombre
+        self._inicio = 0
+
+    def __enter__(self):
+        self._inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *_exc):
+        self._instr.registrar(self._nombre, self._inicio, time.perf_counter_ns())
+        return False
+
+
+class Instrumentacion:
+    """Temporizadores y contadores por etapa de un trabajo (normalmente un fragmento)."""
+
+    def __init__(self, nombre: str = "analisis", trazar: Optional[bool] = None):
+        self.nombre = nombre
+        self.trazar = trazas_activas() if trazar is None else trazar
+        self.duraciones: Dict[str, List[int]] = {}
+        self.contadores: Dict[str, int] = {}
+        self.eventos: List[dict] = []
+        self._mediciones: Dict[str, _Medicion] = {}
+        self._inicio = time.perf_counter_ns()
+        self._fin: Optional[int] = None
+
+    def etapa(self, nombre: str) -> _Medicion:
+        """`with instr.etapa(INFERENCIA): ...` mide el bloque."""
+        medicion = self._mediciones.get(nombre)
+        if medicion is None:
+            medicion = self._mediciones[nombre] = _Medicion(self, nombre)
+        return medicion
+
+    def registrar(self, nombre: str, inicio_ns: int, fin_ns: int):
+        """Agrega una medición ya tomada (p. ej. fuera de un `with`)."""
+        self.duraciones.setdefault(nombre, []).append(fin_ns - inicio_ns)
+        if self.trazar:
+            self.eventos.append({
+                "name": nombre, "cat": self.nombre, "ph": "X",
+                "ts": inicio_ns / 1000.0, "dur": (fin_ns - inicio_ns) / 1000.0,
+                "pid": os.getpid(), "tid": threading.get_ident(),
+            })
+
+    def contar(self, nombre: str, cantidad: int = 1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    def terminar(self):
+        """Fija el fin del trabajo para el cálculo de fps (si no, se usa el momento del resumen)."""
+        self._fin = time.perf_counter_ns()
+
+    @property
+    def segundos_totales(self) -> float:
+        fin = self._fin if self._fin is not None else time.perf_counter_ns()
+        return (fin - self._inicio) / 1e9
+
+    def resumen(self, frames: Optional[int] = None) -> dict:
+        """
+        {"segundos": ..., "fps": ..., "contadores": {...}, "etapas": {etapa:
+        {"llamadas", "total_ms", "media_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"}}}.
+        `frames` (por defecto el contador "frames") se usa para los fps.
+        """
+        etapas = {}
+        for nombre, valores in self.duraciones.items():
+            ordenados = sorted(valores)
+            total = sum(ordenados)
+            datos = {
+                "llamadas": len(ordenados),
+                "total_ms": round(total / 1e6, 3),
+                "media_ms": round(total / len(ordenados) / 1e6, 3),
+            }
+            for p in PERCENTILES:
+                datos[f"p{p}_ms"] = round(percentil(ordenados, p) / 1e6, 3)
+            datos["max_ms"] = round(ordenados[-1] / 1e6, 3)
+            etapas[nombre] = datos
+
+        segundos = self.segundos_totales
+        if frames is None:
+            frames = self.contadores.get("frames", 0)
+        return {
+            "segundos": round(segundos, 3),
+            "fps": round(frames / segundos, 2) if segundos > 0 and frames else None,
+            "contadores": dict(self.contadores),
+            "etapas": etapas,
+        }
+
+    def describir(self, resumen: Optional[dict] = None) -> str:
+        """Una línea por etapa, de la más costosa a la más barata, para el log."""
+        resumen = resumen or self.resumen()
+        fps = resumen["fps"]
+        lineas = [f"{self.nombre}: {resumen['segundos']:.2f}s" + (f", {fps:.1f} fps" if fps else "")]
+        etapas = sorted(resumen["etapas"].items(), key=lambda e: e[1]["total_ms"], reverse=True)
+        for nombre, datos in etapas:
+            lineas.append(
+                f"  {nombre:<18} {datos['total_ms']:>10.1f} ms  x{datos['llamadas']:<6} "
+                f"p50 {datos['p50_ms']:.2f}  p95 {datos['p95_ms']:.2f}  p99 {datos['p99_ms']:.2f} ms"
+            )
+        return "\n".join(lineas)
+
+    def exportar_traza(self, ruta=None) -> Optional[Path]:
+        """
+        Escribe los eventos en formato Chrome trace event (JSON). Sin trazas
+        activadas no hay eventos y no se escribe nada.
+        """
+        if not self.eventos:
+            return None
+        if ruta is None:
+            ruta = DIRECTORIO_TRAZAS / f"traza_{self.nombre}_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump({
+                "traceEvents": self.eventos,
+                "displayTimeUnit": "ms",
+                "otherData": {"contadores": self.contadores},
+            }, f)
+        return ruta
+
+
+class _InstrumentacionNula(Instrumentacion):
+    """No mide nada: para llamadas a Analisis sin instrumentación."""
+
+    class _Nada:
+        __slots__ = ()
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *_exc):
+            return False
+
+    _NADA = _Nada()
+
+    def __init__(self):
+        super().__init__("nula", trazar=False)
+
+    def etapa(self, nombre: str):
+        return self._NADA
+
+    def registrar(self, nombre: str, inicio_ns: int, fin_ns: int):
+        pass
+
+    def contar(self, nombre: str, cantidad: int = 1):
+        pass
+
+
+INSTRUMENTACION_NULA = _InstrumentacionNula()
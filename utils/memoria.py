@@ -0,0 +1,167 @@
+"""
+Medición de memoria y límite configurable para sesiones largas de análisis.
+
+`MonitorMemoria` toma la RSS del proceso cada `intervalo` frames, guarda el
+pico del fragmento y lanza `MemoriaExcedida` en cuanto se supera el límite,
+en vez de dejar que el sistema empiece a paginar o mate el proceso. Con
+`tracemalloc` activado además reporta el pico de memoria Python y las líneas
+que más memoria retienen al terminar el fragmento.
+
+El límite se fija al arrancar (`main.py --memoria-max MB`) y activa el modo
+con presupuesto de memoria del análisis: los datos por frame se escriben a
+disco a medida que se producen (ver `EscritorDetalle`).
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tracemalloc
+from typing import List, Optional
+
+try:
+    import psutil  # opcional: RSS en cualquier plataforma
+except ImportError:
+    psutil = None
+
+MB = 1024 * 1024
+INTERVALO_FRAMES = 30
+LINEAS_TRACEMALLOC = 5
+
+_limite_mb: Optional[float] = None
+_perfil_tracemalloc = False
+
+
+def configurar(limite_mb: Optional[float] = None, perfil_tracemalloc: bool = False):
+    """Límite de RSS (MB, None = sin límite) y snapshots de tracemalloc para los próximos análisis."""
+    global _limite_mb, _perfil_tracemalloc
+    if limite_mb is not None and limite_mb <= 0:
+        raise ValueError("El límite de memoria debe ser mayor que 0 MB")
+    _limite_mb = limite_mb
+    _perfil_tracemalloc = perfil_tracemalloc
+
+
+def limite_configurado() -> Optional[float]:
+    return _limite_mb
+
+
+def modo_presupuesto() -> bool:
+    """True si hay límite de memoria: el análisis escribe los frames a disco a medida que los produce."""
+    return _limite_mb is not None
+
+
+class MemoriaExcedida(RuntimeError):
+    """La RSS del proceso superó el límite configurado."""
+
+
+def rss_actual() -> Optional[int]:
+    """Memoria residente actual del proceso en bytes (None si no se puede medir)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/statm", "r") as f:
+                paginas = int(f.read().split()[1])
+            return paginas * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            pass
+    try:
+        import resource
+        # Sin otra fuente se usa el pico (ru_maxrss: KB en Linux, bytes en macOS)
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == "darwin" else pico * 1024
+    except (ImportError, OSError):
+        return None
+
+
+class MonitorMemoria:
+    """RSS y (opcionalmente) tracemalloc de un fragmento, con límite de RSS."""
+
+    def __init__(self, limite_mb: Optional[float] = None, usar_tracemalloc: bool = False,
+                 intervalo: int = INTERVALO_FRAMES, nombre: str = "análisis"):
+        self.limite = limite_mb * MB if limite_mb is not None else None
+        self.usar_tracemalloc = usar_tracemalloc
+        self.intervalo = max(int(intervalo), 1)
+        self.nombre = nombre
+        self.rss_inicial: Optional[int] = None
+        self.rss_pico: Optional[int] = None
+        self._llamadas = 0
+        self._inicio_tracemalloc = False
+
+    @classmethod
+    def desde_configuracion(cls, nombre: str = "análisis") -> "MonitorMemoria":
+        return cls(_limite_mb, _perfil_tracemalloc, nombre=nombre)
+
+    def comenzar(self) -> "MonitorMemoria":
+        self.rss_inicial = self.rss_pico = rss_actual()
+        if self.usar_tracemalloc:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._inicio_tracemalloc = True
+            if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+                tracemalloc.reset_peak()
+        self._verificar(self.rss_inicial)
+        return self
+
+    def revisar(self):
+        """Llamar en cada frame: mide cada `intervalo` llamadas y falla si se pasa del límite."""
+        self._llamadas += 1
+        if self._llamadas % self.intervalo:
+            return
+        rss = rss_actual()
+        if rss is None:
+            return
+        if self.rss_pico is None or rss > self.rss_pico:
+            self.rss_pico = rss
+        self._verificar(rss)
+
+    def _verificar(self, rss: Optional[int]):
+        if self.limite is not None and rss is not None and rss > self.limite:
+            raise MemoriaExcedida(
+                f"Memoria excedida durante {self.nombre}: {rss / MB:.0f} MB en uso, "
+                f"límite {self.limite / MB:.0f} MB. Analice menos fragmentos por tanda, "
+                f"use proxies de menor resolución o suba el límite (--memoria-max)."
+            )
+
+    def terminar(self) -> dict:
+        """Resumen en MB: RSS inicial, final y pico; pico y líneas principales de tracemalloc."""
+        rss_final = rss_actual()
+        if rss_final is not None and (self.rss_pico is None or rss_final > self.rss_pico):
+            self.rss_pico = rss_final
+        informe = {
+            "rss_inicial_mb": _a_mb(self.rss_inicial),
+            "rss_final_mb": _a_mb(rss_final),
+            "rss_pico_mb": _a_mb(self.rss_pico),
+            "limite_mb": _a_mb(self.limite),
+        }
+        if self.usar_tracemalloc and tracemalloc.is_tracing():
+            actual, pico = tracemalloc.get_traced_memory()
+            informe["python_actual_mb"] = _a_mb(actual)
+            informe["python_pico_mb"] = _a_mb(pico)
+            informe["principales"] = _principales(tracemalloc.take_snapshot())
+            if self._inicio_tracemalloc:
+                tracemalloc.stop()
+        return informe
+
+
+def _principales(snapshot, lineas: int = LINEAS_TRACEMALLOC) -> List[str]:
+    estadisticas = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ]).statistics("lineno")
+    return [f"{e.traceback[0].filename}:{e.traceback[0].lineno} {e.size / MB:.2f} MB ({e.count} bloques)"
+            for e in estadisticas[:lineas]]
+
+
+def _a_mb(valor: Optional[float]) -> Optional[float]:
+    return round(valor / MB, 1) if valor is not None else None
+
+
+def describir(informe: dict) -> str:
+    """Texto corto para el log de la UI."""
+    partes = [f"RSS pico {informe['rss_pico_mb']} MB"]
+    if informe.get("limite_mb"):
+        partes.append(f"límite {informe['limite_mb']} MB")
+    if "python_pico_mb" in informe:
+        partes.append(f"Python pico {informe['python_pico_mb']} MB")
+    return " | ".join(partes)
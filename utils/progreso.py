@@ -0,0 +1,106 @@
+"""
+Seguimiento de progreso para trabajos largos (generación de fragmentos y
+análisis). Convierte el avance medido en segundos de video en porcentaje,
+throughput (fps, múltiplo de tiempo real) y tiempo estimado restante.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass
+class EstadoProgreso:
+    fraccion: float
+    segundos_procesados: float
+    segundos_transcurridos: float
+    fps: Optional[float] = None
+    x_tiempo_real: Optional[float] = None
+    eta_segundos: Optional[float] = None
+
+    @property
+    def porcentaje(self) -> int:
+        return int(max(0.0, min(1.0, self.fraccion)) * 100)
+
+    def describir(self) -> str:
+        """Texto corto para el log de la UI: porcentaje, fps, xRT y ETA."""
+        partes = [f"{self.porcentaje}%"]
+        if self.fps is not None:
+            partes.append(f"{self.fps:.1f} fps")
+        if self.x_tiempo_real is not None:
+            partes.append(f"{self.x_tiempo_real:.2f}x tiempo real")
+        if self.eta_segundos is not None:
+            partes.append(f"ETA {formatear_eta(self.eta_segundos)}")
+        return " | ".join(partes)
+
+
+def formatear_eta(segundos: float) -> str:
+    segundos = max(0, int(round(segundos)))
+    horas, resto = divmod(segundos, 3600)
+    minutos, segs = divmod(resto, 60)
+    if horas:
+        return f"{horas:d}:{minutos:02d}:{segs:02d}"
+    return f"{minutos:02d}:{segs:02d}"
+
+
+class MedidorProgreso:
+    """
+    Acumula el avance de un trabajo expresado en segundos de video.
+
+    `duracion_total` es la suma de duraciones de todo el trabajo y cada llamada a
+    `avanzar` recibe la posición absoluta alcanzada (no incrementos), de modo que
+    los callbacks de ffmpeg y del bucle de análisis pueden reportar directamente.
+    """
+
+    def __init__(self, duracion_total: float, fps_video: float = 30.0,
+                 intervalo_informe: float = 1.0,
+                 reloj: Callable[[], float] = time.monotonic):
+        self.duracion_total = max(float(duracion_total), 0.0)
+        self.fps_video = fps_video
+        self.intervalo_informe = intervalo_informe
+        self._reloj = reloj
+        self._inicio = reloj()
+        self._ultimo_informe = self._inicio
+        self._ultimo_porcentaje = -1
+        self.estado = EstadoProgreso(0.0, 0.0, 0.0)
+
+    def avanzar(self, segundos_procesados: float) -> EstadoProgreso:
+        """Registra la posición alcanzada y recalcula throughput y ETA."""
+        ahora = self._reloj()
+        transcurrido = ahora - self._inicio
+        procesados = min(max(segundos_procesados, 0.0), self.duracion_total or segundos_procesados)
+
+        fraccion = procesados / self.duracion_total if self.duracion_total > 0 else 0.0
+        x_tiempo_real = fps = eta = None
+        if transcurrido > 0 and procesados > 0:
+            x_tiempo_real = procesados / transcurrido
+            fps = x_tiempo_real * self.fps_video
+            eta = (self.duracion_total - procesados) / x_tiempo_real
+
+        self.estado = EstadoProgreso(
+            fraccion=fraccion,
+            segundos_procesados=procesados,
+            segundos_transcurridos=transcurrido,
+            fps=fps,
+            x_tiempo_real=x_tiempo_real,
+            eta_segundos=eta,
+        )
+        return self.estado
+
+    def cambio_porcentaje(self) -> bool:
+        """True si el porcentaje entero cambió desde la última consulta."""
+        porcentaje = self.estado.porcentaje
+        if porcentaje != self._ultimo_porcentaje:
+            self._ultimo_porcentaje = porcentaje
+            return True
+        return False
+
+    def debe_informar(self) -> bool:
+        """Limita los mensajes de log a uno por `intervalo_informe` segundos."""
+        ahora = self._reloj()
+        if ahora - self._ultimo_informe >= self.intervalo_informe:
+            self._ultimo_informe = ahora
+            return True
+        return False
@@ -0,0 +1,256 @@
+"""
+Subsistema de captura con hilos dedicados.
+
+Un hilo lee la cámara y publica el último frame para la previsualización; al
+grabar, los frames pasan por un buffer circular acotado hacia un hilo
+codificador que llama a `CapturadorVideo.procesar_frame`. Así la UI nunca
+espera al encoder y una pausa del encoder no hace perder frames de preview.
+"""
+
+import threading
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BufferCircular:
+    """Cola acotada y segura entre hilos: si está llena se descarta el elemento más antiguo."""
+
+    def __init__(self, capacidad: int):
+        if capacidad <= 0:
+            raise ValueError("La capacidad del buffer debe ser positiva")
+        self.capacidad = capacidad
+        self._items = deque()
+        self._condicion = threading.Condition()
+        self.descartados = 0
+        self.profundidad_maxima = 0
+
+    def poner(self, item) -> bool:
+        """Encola un elemento. Devuelve True si hubo que descartar el más antiguo."""
+        with self._condicion:
+            descartado = False
+            if len(self._items) >= self.capacidad:
+                self._items.popleft()
+                self.descartados += 1
+                descartado = True
+            self._items.append(item)
+            self.profundidad_maxima = max(self.profundidad_maxima, len(self._items))
+            self._condicion.notify()
+            return descartado
+
+    def tomar(self, timeout: Optional[float] = None):
+        """Extrae el elemento más antiguo o devuelve None si vence el timeout."""
+        with self._condicion:
+            if not self._items:
+                self._condicion.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def __len__(self):
+        with self._condicion:
+            return len(self._items)
+
+
+@dataclass
+class EstadisticasCaptura:
+    frames_capturados: int = 0
+    frames_encolados: int = 0
+    frames_escritos: int = 0
+    frames_descartados: int = 0
+    frames_duplicados: int = 0
+    profundidad_cola: int = 0
+    profundidad_maxima: int = 0
+    errores_lectura: int = 0
+    errores_escritura: int = 0
+
+    def to_dict(self):
+        return asdict(self)
+
+    def describir(self, capacidad: int) -> str:
+        return (f"cola {self.profundidad_cola}/{capacidad} | "
+                f"descartados {self.frames_descartados} | duplicados {self.frames_duplicados}")
+
+
+class SistemaCaptura:
+    """
+    Captura la cámara en un hilo propio y, durante la grabación, alimenta a un
+    `CapturadorVideo` desde un hilo codificador separado.
+
+    La grabación se mantiene a `fps` nominales respecto al reloj monotónico: si
+    la cámara entrega frames tarde se duplica el último para no desincronizar el
+    video, y si los entrega más rápido se omiten los sobrantes.
+    """
+
+    def __init__(self, fuente, fps: float = 30.0, capacidad: int = 60,
+                 procesar_preview: Optional[Callable[[Any], Any]] = None):
+        # `fuente` debe ofrecer read() -> (ok, frame) y release(), como cv2.VideoCapture
+        self.fuente = fuente
+        self.fps = fps
+        self.buffer = BufferCircular(capacidad)
+        self.procesar_preview = procesar_preview
+
+        self._lock = threading.Lock()
+        self._ultimo_frame = None
+        self._ultimo_preview = None
+        self._secuencia = 0
+
+        self._activo = threading.Event()
+        self._grabando = threading.Event()
+        self._hilo_captura = None
+        self._hilo_codificador = None
+        self._capturador = None
+        self._acepta_marca_tiempo = False
+        self._indice = None
+        self._inicio_grabacion = None
+        self._stats = EstadisticasCaptura()
+
+    # ------------------------------------------------------------------
+    # Captura
+    # ------------------------------------------------------------------
+    def iniciar(self):
+        """Arranca el hilo de captura (preview)."""
+        if self._activo.is_set():
+            return
+        self._activo.set()
+        self._hilo_captura = threading.Thread(target=self._bucle_captura, name="captura-camara", daemon=True)
+        self._hilo_captura.start()
+
+    def detener(self):
+        """Detiene la grabación (si la hay), el hilo de captura y libera la fuente."""
+        if self._grabando.is_set():
+            self.detener_grabacion()
+        self._activo.clear()
+        if self._hilo_captura is not None:
+            self._hilo_captura.join(timeout=2)
+            self._hilo_captura = None
+        try:
+            self.fuente.release()
+        except Exception:
+            pass
+
+    def ultimo_frame(self):
+        """Devuelve (secuencia, frame BGR) del último frame capturado."""
+        with self._lock:
+            return self._secuencia, self._ultimo_frame
+
+    def ultimo_preview(self):
+        """Devuelve (secuencia, resultado de procesar_preview) del último frame."""
+        with self._lock:
+            return self._secuencia, self._ultimo_preview
+
+    def _bucle_captura(self):
+        while self._activo.is_set():
+            ok, frame = self.fuente.read()
+            ahora = time.monotonic()
+            if not ok or frame is None:
+                self._stats.errores_lectura += 1
+                time.sleep(0.005)
+                continue
+
+            preview = None
+            if self.procesar_preview is not None:
+                try:
+                    preview = self.procesar_preview(frame)
+                except Exception as e:
+                    logger.warning(f"Error preparando preview: {e}")
+
+            with self._lock:
+                self._ultimo_frame = frame
+                self._ultimo_preview = preview
+                self._secuencia += 1
+            self._stats.frames_capturados += 1
+
+            if self._grabando.is_set():
+                self._encolar_para_grabacion(frame, ahora)
+
+    def _encolar_para_grabacion(self, frame, instante):
+        # Número de frames que el video debería tener a este instante
+        objetivo = int((instante - self._inicio_grabacion) * self.fps) + 1
+        faltan = objetivo - self._stats.frames_encolados
+        if faltan <= 0:
+            return  # la cámara va más rápido que los fps nominales
+        # Limitar las copias a la capacidad del buffer tras un bloqueo largo de la cámara
+        faltan = min(faltan, self.buffer.capacidad)
+        for _ in range(faltan):
+            if self.buffer.poner((frame, instante)):
+                self._stats.frames_descartados += 1
+        self._stats.frames_encolados += faltan
+        self._stats.frames_duplicados += faltan - 1
+
+    # ------------------------------------------------------------------
+    # Grabación
+    # ------------------------------------------------------------------
+    def iniciar_grabacion(self, capturador, indice=None, inicio: Optional[float] = None):
+        """Empieza a enviar frames al capturador desde el hilo codificador.
+
+        indice: EscritorIndiceFrames opcional donde se anota el instante de captura
+            de cada frame escrito, relativo a `inicio`.
+        inicio: origen monotónico de la grabación (por defecto, ahora). Debe ser el
+            mismo reloj con el que se toman las marcas.
+        """
+        if self._grabando.is_set():
+            raise RuntimeError("La captura ya está grabando")
+        self._capturador = capturador
+        self._acepta_marca_tiempo = getattr(capturador, "acepta_marca_tiempo", False)
+        self._indice = indice
+        self._stats = EstadisticasCaptura(frames_capturados=self._stats.frames_capturados)
+        self.buffer = BufferCircular(self.buffer.capacidad)
+        self._inicio_grabacion = inicio if inicio is not None else time.monotonic()
+        self._grabando.set()
+        self._hilo_codificador = threading.Thread(target=self._bucle_codificador, name="codificador-video", daemon=True)
+        self._hilo_codificador.start()
+
+    def detener_grabacion(self, timeout: float = 10.0) -> EstadisticasCaptura:
+        """Deja de encolar, vacía el buffer en el capturador y devuelve las estadísticas."""
+        if not self._grabando.is_set():
+            raise RuntimeError("La captura no está grabando")
+        self._grabando.clear()
+        if self._hilo_codificador is not None:
+            self._hilo_codificador.join(timeout=timeout)
+            if self._hilo_codificador.is_alive():
+                logger.warning("El hilo codificador no terminó a tiempo; quedan frames sin escribir")
+            self._hilo_codificador = None
+        self._capturador = None
+        self._indice = None
+        stats = self.estadisticas()
+        logger.info(f"Captura detenida: {stats.to_dict()}")
+        return stats
+
+    def _bucle_codificador(self):
+        # Sigue mientras se graba o mientras queden frames pendientes en el buffer
+        while self._grabando.is_set() or len(self.buffer) > 0:
+            item = self.buffer.tomar(timeout=0.1)
+            if item is None:
+                continue
+            frame, instante = item
+            try:
+                if self._acepta_marca_tiempo:
+                    self._capturador.procesar_frame(frame, marca_tiempo=instante)
+                else:
+                    self._capturador.procesar_frame(frame)
+                self._stats.frames_escritos += 1
+            except Exception as e:
+                self._stats.errores_escritura += 1
+                logger.error(f"Error escribiendo frame: {e}")
+                continue
+            if self._indice is not None:
+                self._indice.agregar(instante - self._inicio_grabacion)
+
+    # ------------------------------------------------------------------
+    # Estadísticas
+    # ------------------------------------------------------------------
+    @property
+    def grabando(self) -> bool:
+        return self._grabando.is_set()
+
+    def estadisticas(self) -> EstadisticasCaptura:
+        """Copia de los contadores actuales (descartados, duplicados, profundidad de cola)."""
+        stats = EstadisticasCaptura(**self._stats.to_dict())
+        stats.profundidad_cola = len(self.buffer)
+        stats.profundidad_maxima = self.buffer.profundidad_maxima
+        return stats
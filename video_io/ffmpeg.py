@@ -0,0 +1,63 @@
+import subprocess
+import threading
+import logging
+from collections import deque
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Número de líneas de stderr que se conservan para el mensaje de error
+_LINEAS_STDERR = 40
+
+
+def ejecutar_ffmpeg(comando: List[str], on_progreso: Optional[Callable[[float], None]] = None):
+    """
+    Ejecuta un comando ffmpeg con `-progress pipe:1` y reporta en tiempo real
+    los segundos de salida ya escritos (`out_time_ms`) mediante `on_progreso`.
+
+    Lanza subprocess.CalledProcessError si ffmpeg termina con error, igual que
+    subprocess.run(check=True), para mantener el manejo de errores existente.
+    """
+    if not comando or comando[0] != 'ffmpeg':
+        raise ValueError("El comando debe comenzar con 'ffmpeg'")
+
+    comando_progreso = [comando[0], '-hide_banner', '-nostats', '-progress', 'pipe:1'] + list(comando[1:])
+    proceso = subprocess.Popen(
+        comando_progreso,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        stdin=subprocess.DEVNULL,
+        text=True,
+        bufsize=1,
+    )
+
+    # stderr se drena en otro hilo para que ffmpeg nunca se bloquee al escribir
+    cola_stderr = deque(maxlen=_LINEAS_STDERR)
+    lector_stderr = threading.Thread(
+        target=lambda: cola_stderr.extend(proceso.stderr), daemon=True
+    )
+    lector_stderr.start()
+
+    try:
+        for linea in proceso.stdout:
+            clave, _, valor = linea.strip().partition('=')
+            if clave == 'out_time_ms' and on_progreso is not None:
+                # Pese al nombre, ffmpeg reporta out_time_ms en microsegundos
+                try:
+                    segundos = int(valor) / 1_000_000
+                except ValueError:
+                    continue
+                on_progreso(segundos)
+    except BaseException:
+        # Si el callback falla nadie lee stdout: ffmpeg se bloquearía al llenar el pipe
+        proceso.kill()
+        raise
+    finally:
+        retorno = proceso.wait()
+        lector_stderr.join(timeout=5)
+
+    if retorno != 0:
+        raise subprocess.CalledProcessError(
+            retorno, comando_progreso, output=None, stderr="".join(cola_stderr)
+        )
+    return retorno
@@ -0,0 +1,128 @@
+"""
+Índice lateral (sidecar) de frames grabados.
+
+Durante la grabación se anota, por cada frame escrito en el video, el instante
+de captura medido con el reloj monotónico de la entrevista. Al cortar
+fragmentos, los tiempos de las marcas (mismo reloj) se traducen a índices de
+frame y PTS exactos del video, de modo que frames perdidos o duplicados no
+desplazan los cortes.
+"""
+
+import os
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SUFIJO_INDICE = ".frames.csv"
+
+
+def ruta_indice_para(video_path) -> Path:
+    """Ruta del índice asociado a un video (interview_X.mp4 -> interview_X.frames.csv)."""
+    video_path = Path(video_path)
+    return video_path.with_name(video_path.stem + SUFIJO_INDICE)
+
+
+class EscritorIndiceFrames:
+    """Escribe el índice en lotes mientras se graba (lo usa el hilo codificador)."""
+
+    def __init__(self, ruta, fps: float, tamaño_lote: int = 30):
+        self.ruta = Path(ruta)
+        self.fps = fps
+        self.tamaño_lote = tamaño_lote
+        self.frames = 0
+        self._pendientes = []
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._archivo = open(self.ruta, "w", encoding="utf-8")
+        self._archivo.write(f"# fps={fps}\n")
+        self._archivo.write("frame,pts,captura\n")
+
+    def agregar(self, captura: float):
+        """Anota el siguiente frame del video con su instante de captura relativo (segundos)."""
+        self._pendientes.append(f"{self.frames},{self.frames / self.fps:.6f},{captura:.6f}\n")
+        self.frames += 1
+        if len(self._pendientes) >= self.tamaño_lote:
+            self._volcar()
+
+    def _volcar(self):
+        if self._pendientes:
+            self._archivo.writelines(self._pendientes)
+            self._archivo.flush()
+            self._pendientes.clear()
+
+    def cerrar(self):
+        if self._archivo.closed:
+            return
+        self._volcar()
+        os.fsync(self._archivo.fileno())
+        self._archivo.close()
+
+
+class IndiceFrames:
+    """Lectura del índice y conversión de tiempos de marca a frames/PTS del video."""
+
+    def __init__(self, capturas: np.ndarray, fps: float):
+        self.capturas = np.asarray(capturas, dtype=np.float64)
+        self.fps = fps
+
+    @classmethod
+    def cargar(cls, ruta) -> "IndiceFrames":
+        ruta = Path(ruta)
+        fps = 30.0
+        with open(ruta, "r", encoding="utf-8") as f:
+            primera = f.readline().strip()
+            if primera.startswith("# fps="):
+                fps = float(primera.split("=", 1)[1])
+        datos = np.loadtxt(ruta, delimiter=",", comments="#", skiprows=2, ndmin=2)
+        capturas = datos[:, 2] if datos.size else np.empty(0)
+        return cls(capturas, fps)
+
+    @classmethod
+    def cargar_para_video(cls, video_path) -> Optional["IndiceFrames"]:
+        """Carga el índice de un video si existe y es legible; None en caso contrario."""
+        ruta = ruta_indice_para(video_path)
+        if not ruta.exists():
+            return None
+        try:
+            return cls.cargar(ruta)
+        except Exception as e:
+            logger.warning(f"No se pudo leer el índice de frames {ruta}: {e}")
+            return None
+
+    def __len__(self):
+        return len(self.capturas)
+
+    def frame_para_tiempo(self, t: float) -> int:
+        """Primer frame del video capturado en o después de `t` (tiempo de marca)."""
+        return int(np.searchsorted(self.capturas, t, side="left"))
+
+    def pts_para_tiempo(self, t: float) -> float:
+        """PTS en segundos del frame correspondiente al tiempo de marca `t`."""
+        return self.frame_para_tiempo(t) / self.fps
+
+    def rango_pts(self, inicio: float, fin: float) -> Tuple[float, float]:
+        """Convierte un intervalo de marca en (pts_inicio, pts_fin) del video."""
+        return self.pts_para_tiempo(inicio), self.pts_para_tiempo(fin)
+
+    def estadisticas_deriva(self) -> dict:
+        """Desfase entre la posición de cada frame en el video y su instante real de captura."""
+        n = len(self.capturas)
+        if n == 0:
+            return {"frames": 0}
+        pts = np.arange(n, dtype=np.float64) / self.fps
+        deriva = pts - self.capturas
+        pasos = np.diff(self.capturas)
+        return {
+            "frames": n,
+            "fps": self.fps,
+            "duracion_video": n / self.fps,
+            "duracion_captura": float(self.capturas[-1]),
+            "deriva_media_ms": float(np.mean(deriva) * 1000),
+            "deriva_max_ms": float(np.max(np.abs(deriva)) * 1000),
+            "deriva_final_ms": float(deriva[-1] * 1000),
+            "frames_duplicados": int(np.count_nonzero(pasos == 0)),
+            "huecos": int(np.count_nonzero(pasos > 1.5 / self.fps)),
+        }
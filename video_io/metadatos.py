@@ -0,0 +1,325 @@
+"""
+Metadatos de video (duración, fps, frames, resolución) sin decodificar.
+
+Para MP4/MOV se leen directamente las cajas del contenedor (`moov/mvhd`,
+`trak/tkhd`, `mdia/mdhd`, `stbl/stsz`); si el archivo no es MP4 o la
+cabecera no tiene duración (MP4 fragmentado, grabación sin cerrar) se usa
+ffprobe y, como último recurso, cv2. Los resultados se guardan en
+`data/cache/metadatos.sqlite3` con clave (ruta, tamaño, mtime), así que cada
+archivo se sondea una sola vez mientras no cambie.
+"""
+
+import json
+import struct
+import sqlite3
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RUTA_CACHE = Path("data/cache/metadatos.sqlite3")
+
+# Cajas que solo contienen otras cajas
+_CONTENEDORES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+
+@dataclass
+class MetadatosVideo:
+    duracion: float                 # segundos
+    fps: Optional[float] = None
+    frames: Optional[int] = None
+    ancho: Optional[int] = None
+    alto: Optional[int] = None
+    fuente: str = ""                # "mp4", "ffprobe" o "cv2"
+
+
+# ----------------------------------------------------------------------
+# Lector de cajas MP4
+# ----------------------------------------------------------------------
+def _cajas(f, inicio: int, fin: int):
+    """Itera (tipo, inicio del contenido, fin de la caja) entre `inicio` y `fin`."""
+    posicion = inicio
+    while posicion + 8 <= fin:
+        f.seek(posicion)
+        cabecera = f.read(8)
+        if len(cabecera) < 8:
+            return
+        tamaño, tipo = struct.unpack(">I4s", cabecera)
+        contenido = posicion + 8
+        if tamaño == 1:  # tamaño de 64 bits
+            tamaño = struct.unpack(">Q", f.read(8))[0]
+            contenido += 8
+        elif tamaño == 0:  # hasta el final del archivo
+            tamaño = fin - posicion
+        if tamaño < contenido - posicion:
+            return  # caja corrupta
+        yield tipo, contenido, posicion + tamaño
+        posicion += tamaño
+
+
+def _leer_caja_completa(f, inicio: int, fin: int) -> bytes:
+    f.seek(inicio)
+    return f.read(fin - inicio)
+
+
+def _tiempo_y_duracion(datos: bytes) -> Tuple[int, int]:
+    """(timescale, duration) de una caja mvhd o mdhd."""
+    if datos[0] == 1:
+        return struct.unpack(">IQ", datos[20:32])
+    return struct.unpack(">II", datos[12:20])
+
+
+def leer_cabecera_mp4(ruta) -> Optional[MetadatosVideo]:
+    """Metadatos leídos del átomo `moov`; None si no es MP4 o no tiene duración."""
+    ruta = Path(ruta)
+    tamaño_archivo = ruta.stat().st_size
+    resultado = MetadatosVideo(duracion=0.0, fuente="mp4")
+
+    with open(ruta, "rb") as f:
+        moov = next(((i, e) for tipo, i, e in _cajas(f, 0, tamaño_archivo) if tipo == b"moov"), None)
+        if moov is None:
+            return None
+
+        pila = [moov]
+        while pila:
+            inicio, fin = pila.pop()
+            for tipo, contenido, final in _cajas(f, inicio, fin):
+                if tipo == b"trak":
+                    # Cada pista se recorre aparte: solo interesa la de video
+                    pista = {}
+                    pila_pista = [(contenido, final)]
+                    while pila_pista:
+                        i, e = pila_pista.pop()
+                        for t, c, fi in _cajas(f, i, e):
+                            if t in _CONTENEDORES:
+                                pila_pista.append((c, fi))
+                            elif t in (b"tkhd", b"mdhd", b"hdlr", b"stsz", b"stts"):
+                                pista[t] = _leer_caja_completa(f, c, fi)
+                    if pista.get(b"hdlr", b"")[8:12] == b"vide" and resultado.frames is None:
+                        _aplicar_pista_video(resultado, pista)
+                elif tipo == b"mvhd":
+                    escala, duracion = _tiempo_y_duracion(_leer_caja_completa(f, contenido, final))
+                    if escala:
+                        resultado.duracion = duracion / escala
+                elif tipo in _CONTENEDORES:
+                    pila.append((contenido, final))
+
+    if resultado.duracion <= 0:
+        return None
+    return resultado
+
+
+def _aplicar_pista_video(resultado: MetadatosVideo, pista: dict):
+    tkhd = pista.get(b"tkhd")
+    if tkhd and len(tkhd) >= 84:
+        # ancho y alto en punto fijo 16.16 al final de tkhd
+        ancho, alto = struct.unpack(">II", tkhd[-8:])
+        resultado.ancho, resultado.alto = ancho >> 16, alto >> 16
+
+    stsz = pista.get(b"stsz")
+    if stsz and len(stsz) >= 12:
+        resultado.frames = struct.unpack(">I", stsz[8:12])[0]
+    elif pista.get(b"stts"):
+        stts = pista[b"stts"]
+        entradas = struct.unpack(">I", stts[4:8])[0]
+        resultado.frames = sum(
+            struct.unpack(">I", stts[8 + 8 * n:12 + 8 * n])[0] for n in range(entradas)
+        )
+
+    mdhd = pista.get(b"mdhd")
+    if mdhd and resultado.frames:
+        escala, duracion = _tiempo_y_duracion(mdhd)
+        if escala and duracion:
+            resultado.fps = resultado.frames / (duracion / escala)
+
+
+# ----------------------------------------------------------------------
+# Alternativas: ffprobe y cv2
+# ----------------------------------------------------------------------
+def probar_ffprobe(ruta) -> Optional[MetadatosVideo]:
+    comando = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "stream=width,height,avg_frame_rate,nb_frames:format=duration",
+        "-of", "json", str(ruta)
+    ]
+    try:
+        salida = subprocess.run(comando, capture_output=True, text=True, timeout=30, check=True).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    try:
+        datos = json.loads(salida or "{}")
+    except ValueError:
+        return None
+    stream = (datos.get("streams") or [{}])[0]
+    try:
+        duracion = float(datos.get("format", {}).get("duration", 0))
+    except (TypeError, ValueError):
+        duracion = 0.0
+    if duracion <= 0:
+        return None
+
+    fps = None
+    num, _, den = str(stream.get("avg_frame_rate", "0/0")).partition("/")
+    if num.isdigit() and den.isdigit() and int(den):
+        fps = int(num) / int(den)
+    frames = int(stream["nb_frames"]) if str(stream.get("nb_frames", "")).isdigit() else None
+    return MetadatosVideo(duracion=duracion, fps=fps, frames=frames,
+                          ancho=stream.get("width"), alto=stream.get("height"), fuente="ffprobe")
+
+
+def probar_cv2(ruta) -> Optional[MetadatosVideo]:
+    try:
+        import cv2
+    except ImportError:
+        return None
+    cap = cv2.VideoCapture(str(ruta))
+    try:
+        if not cap.isOpened():
+            return None
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        if fps <= 0 or frames <= 0:
+            return None
+        return MetadatosVideo(duracion=frames / fps, fps=fps, frames=int(frames),
+                              ancho=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                              alto=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), fuente="cv2")
+    finally:
+        cap.release()
+
+
+def probar_video(ruta) -> Optional[MetadatosVideo]:
+    """Cabecera MP4, luego ffprobe, luego cv2. None si ninguno puede leer el archivo."""
+    try:
+        metadatos = leer_cabecera_mp4(ruta)
+    except (OSError, struct.error, IndexError) as e:
+        logger.debug(f"Cabecera MP4 ilegible en {ruta}: {e}")
+        metadatos = None
+    return metadatos or probar_ffprobe(ruta) or probar_cv2(ruta)
+
+
+# ----------------------------------------------------------------------
+# Servicio con caché persistente
+# ----------------------------------------------------------------------
+class ServicioMetadatos:
+    """
+    Metadatos de video con caché en memoria y en SQLite, clave (ruta, tamaño, mtime).
+
+    `precargar` sondea en paralelo los archivos que aún no están en caché; las
+    pantallas la llaman con todos los archivos de un listado y después piden
+    cada uno con `metadatos`/`duracion`, que ya no tocan el disco.
+    """
+
+    def __init__(self, ruta_cache=RUTA_CACHE, max_workers: int = 8):
+        self.ruta_cache = Path(ruta_cache)
+        self.max_workers = max_workers
+        self._memoria: Dict[Tuple[str, int, float], Optional[MetadatosVideo]] = {}
+        self._lock = threading.Lock()
+        self.ruta_cache.parent.mkdir(parents=True, exist_ok=True)
+        with self._conectar() as con:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS metadatos (
+                    ruta   TEXT PRIMARY KEY,
+                    tamaño INTEGER,
+                    mtime  REAL,
+                    datos  TEXT
+                )
+            """)
+
+    @contextmanager
+    def _conectar(self):
+        con = sqlite3.connect(str(self.ruta_cache), timeout=10)
+        con.row_factory = sqlite3.Row
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    @staticmethod
+    def _clave(ruta: Path) -> Optional[Tuple[str, int, float]]:
+        try:
+            stat = ruta.stat()
+        except OSError:
+            return None
+        return str(ruta.resolve()), stat.st_size, stat.st_mtime
+
+    def precargar(self, rutas: Iterable) -> Dict[Path, Optional[MetadatosVideo]]:
+        """Metadatos de varios archivos: caché primero, el resto sondeado en paralelo."""
+        claves = {}
+        for ruta in map(Path, rutas):
+            clave = self._clave(ruta)
+            if clave is not None:
+                claves[ruta] = clave
+
+        with self._lock:
+            faltan = {r: c for r, c in claves.items() if c not in self._memoria}
+        if faltan:
+            self._cargar_de_disco(faltan)
+            with self._lock:
+                faltan = {r: c for r, c in faltan.items() if c not in self._memoria}
+        if faltan:
+            trabajadores = min(self.max_workers, len(faltan))
+            with ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix="metadatos") as pool:
+                sondeados = dict(zip(faltan, pool.map(probar_video, faltan)))
+            self._guardar({faltan[r]: m for r, m in sondeados.items()})
+
+        with self._lock:
+            return {r: self._memoria.get(c) for r, c in claves.items()}
+
+    def metadatos(self, ruta) -> Optional[MetadatosVideo]:
+        return self.precargar([ruta]).get(Path(ruta))
+
+    def duracion(self, ruta) -> Optional[float]:
+        """Duración en segundos o None si no se pudo leer."""
+        metadatos = self.metadatos(ruta)
+        return metadatos.duracion if metadatos else None
+
+    def _cargar_de_disco(self, faltan: Dict[Path, Tuple[str, int, float]]):
+        por_ruta = {c[0]: c for c in faltan.values()}
+        encontrados = {}
+        with self._conectar() as con:
+            rutas = list(por_ruta)
+            # Consultas por lotes (límite de parámetros de SQLite)
+            for i in range(0, len(rutas), 500):
+                lote = rutas[i:i + 500]
+                marcadores = ", ".join("?" * len(lote))
+                for fila in con.execute(f"SELECT * FROM metadatos WHERE ruta IN ({marcadores})", lote):
+                    clave = por_ruta[fila["ruta"]]
+                    if (fila["tamaño"], fila["mtime"]) == clave[1:]:
+                        datos = json.loads(fila["datos"]) if fila["datos"] else None
+                        encontrados[clave] = MetadatosVideo(**datos) if datos else None
+        with self._lock:
+            self._memoria.update(encontrados)
+
+    def _guardar(self, resultados: Dict[Tuple[str, int, float], Optional[MetadatosVideo]]):
+        with self._lock:
+            self._memoria.update(resultados)
+        filas = [
+            (ruta, tamaño, mtime, json.dumps(asdict(m)) if m else None)
+            for (ruta, tamaño, mtime), m in resultados.items()
+        ]
+        try:
+            with self._conectar() as con:
+                con.executemany("INSERT OR REPLACE INTO metadatos VALUES (?, ?, ?, ?)", filas)
+        except sqlite3.Error as e:
+            logger.warning(f"No se pudo actualizar la caché de metadatos: {e}")
+
+
+_servicio: Optional[ServicioMetadatos] = None
+_servicio_lock = threading.Lock()
+
+
+def servicio_metadatos() -> ServicioMetadatos:
+    """Instancia compartida por todas las pantallas."""
+    global _servicio
+    with _servicio_lock:
+        if _servicio is None:
+            _servicio = ServicioMetadatos()
+        return _servicio
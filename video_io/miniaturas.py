@@ -0,0 +1,153 @@
+"""
+Miniaturas de fragmentos: un póster y una tira de N cuadros por video.
+
+Ambas imágenes salen de una sola pasada de ffmpeg que decodifica solo los
+cuadros clave (`-skip_frame nokey`), así que no se decodifica el video
+completo. Se guardan en `data/cache/miniaturas/` con un nombre que es el hash
+del contenido del video (tamaño y muestras del inicio, centro y final) más
+los parámetros; renombrar o mover un fragmento no invalida sus miniaturas y
+cambiar su contenido genera otras nuevas. Sin ffmpeg se usa cv2.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+from video_io.ffmpeg import ejecutar_ffmpeg
+from video_io.metadatos import servicio_metadatos
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_MINIATURAS = Path("data/cache/miniaturas")
+
+# Súbase al cambiar cómo se generan las miniaturas: invalida la caché en disco
+VERSION_MINIATURAS = 1
+CUADROS_TIRA = 6
+ANCHO_MINIATURA = 240
+
+# Opciones de codificación de cada salida según el formato
+_CODIFICACION = {
+    "jpg": ["-q:v", "4"],
+    "webp": ["-c:v", "libwebp", "-quality", "75"],
+}
+_BLOQUE_HUELLA = 64 * 1024
+
+
+@dataclass
+class Miniaturas:
+    poster: Path
+    tira: Path
+    cuadros: int
+
+    def existen(self) -> bool:
+        return self.poster.exists() and self.tira.exists()
+
+
+def huella_video(ruta) -> str:
+    """Hash del contenido: tamaño más 64 KB del inicio, del centro y del final."""
+    ruta = Path(ruta)
+    tamaño = ruta.stat().st_size
+    sha = hashlib.sha1(str(tamaño).encode("ascii"))
+    with open(ruta, "rb") as f:
+        for posicion in (0, tamaño // 2, tamaño - _BLOQUE_HUELLA):
+            f.seek(max(0, posicion))
+            sha.update(f.read(_BLOQUE_HUELLA))
+    return sha.hexdigest()
+
+
+def rutas_miniaturas(huella: str, cuadros: int = CUADROS_TIRA, ancho: int = ANCHO_MINIATURA,
+                     formato: str = "jpg", directorio=DIRECTORIO_MINIATURAS) -> Miniaturas:
+    base = Path(directorio) / f"{huella}_v{VERSION_MINIATURAS}_{cuadros}x{ancho}"
+    return Miniaturas(poster=Path(f"{base}_poster.{formato}"), tira=Path(f"{base}_tira.{formato}"),
+                      cuadros=cuadros)
+
+
+def _extraer_ffmpeg(ruta: Path, destino: Miniaturas, duracion: float, ancho: int, formato: str):
+    """Póster (cuadro central de la tira) y tira en una sola pasada por los cuadros clave."""
+    cuadros = destino.cuadros
+    filtro = (
+        f"[0:v]fps={cuadros}/{duracion:.3f},scale={ancho}:-2,split=2[t][p];"
+        f"[t]tile={cuadros}x1[tira];"
+        f"[p]select='eq(n\\,{cuadros // 2})'[poster]"
+    )
+    codificacion = _CODIFICACION[formato]
+    comando = [
+        "ffmpeg", "-y", "-skip_frame", "nokey", "-i", str(ruta),
+        "-filter_complex", filtro,
+        "-map", "[tira]", "-frames:v", "1", *codificacion, str(destino.tira),
+        "-map", "[poster]", "-frames:v", "1", *codificacion, str(destino.poster),
+    ]
+    ejecutar_ffmpeg(comando)
+
+
+def _extraer_cv2(ruta: Path, destino: Miniaturas, duracion: float, ancho: int, formato: str):
+    """Alternativa sin ffmpeg: un seek por cuadro con cv2."""
+    import cv2
+    import numpy as np
+
+    cap = cv2.VideoCapture(str(ruta))
+    if not cap.isOpened():
+        raise RuntimeError(f"No se pudo abrir el video: {ruta}")
+    imagenes: List["np.ndarray"] = []
+    try:
+        for i in range(destino.cuadros):
+            cap.set(cv2.CAP_PROP_POS_MSEC, (i + 0.5) * duracion / destino.cuadros * 1000)
+            ok, frame = cap.read()
+            if not ok:
+                continue
+            alto = max(2, int(frame.shape[0] * ancho / frame.shape[1]) // 2 * 2)
+            imagenes.append(cv2.resize(frame, (ancho, alto), interpolation=cv2.INTER_AREA))
+    finally:
+        cap.release()
+    if not imagenes:
+        raise RuntimeError(f"No se pudo leer ningún cuadro de {ruta.name}")
+
+    extension = f".{formato}"
+    for imagen, salida in ((imagenes[len(imagenes) // 2], destino.poster), (np.hstack(imagenes), destino.tira)):
+        ok, datos = cv2.imencode(extension, imagen)
+        if not ok:
+            raise RuntimeError(f"No se pudo codificar la miniatura {salida.name}")
+        salida.write_bytes(datos.tobytes())
+
+
+def obtener_miniaturas(ruta, cuadros: int = CUADROS_TIRA, ancho: int = ANCHO_MINIATURA,
+                       formato: str = "jpg", directorio=DIRECTORIO_MINIATURAS) -> Miniaturas:
+    """
+    Miniaturas de un video, generándolas si no están en caché.
+
+    Se escriben con nombres temporales y se publican con `os.replace`, así
+    que otro hilo o proceso nunca ve una imagen a medio escribir.
+    """
+    if formato not in _CODIFICACION:
+        raise ValueError(f"Formato de miniatura no soportado: {formato}")
+    ruta = Path(ruta)
+    destino = rutas_miniaturas(huella_video(ruta), cuadros, ancho, formato, directorio)
+    if destino.existen():
+        return destino
+
+    destino.poster.parent.mkdir(parents=True, exist_ok=True)
+    sufijo = f".{os.getpid()}_{threading.get_ident()}.tmp.{formato}"
+    temporal = Miniaturas(poster=Path(str(destino.poster) + sufijo), tira=Path(str(destino.tira) + sufijo),
+                          cuadros=cuadros)
+    duracion = servicio_metadatos().duracion(ruta) or float(cuadros)
+    try:
+        try:
+            _extraer_ffmpeg(ruta, temporal, duracion, ancho, formato)
+        except FileNotFoundError:
+            logger.info("ffmpeg no disponible; miniaturas con cv2")
+            _extraer_cv2(ruta, temporal, duracion, ancho, formato)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"ffmpeg no pudo generar miniaturas de {ruta.name}: {e.stderr}") from e
+        os.replace(temporal.tira, destino.tira)
+        os.replace(temporal.poster, destino.poster)
+    finally:
+        for sobrante in (temporal.tira, temporal.poster):
+            if sobrante.exists():
+                sobrante.unlink()
+    return destino
+
@@ -0,0 +1,120 @@
+"""
+Grabación segmentada: el video se escribe en trozos MPEG-TS de duración fija
+(`segmento_00000.ts`, ...) y ffmpeg añade cada trozo terminado a una lista CSV.
+
+Si la aplicación se cierra inesperadamente, los segmentos ya escritos siguen
+siendo reproducibles, y los fragmentos cuyas marcas ya están cubiertas por
+segmentos completos pueden cortarse sin esperar al final de la entrevista.
+El archivo `.mp4` clásico se obtiene bajo demanda con `concatenar`.
+"""
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from video_io.ffmpeg import ejecutar_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+SUFIJO_SEGMENTOS = "_segmentos"
+LISTA_SEGMENTOS = "segmentos.csv"
+LISTA_CONCAT = "concat.txt"
+PATRON_SEGMENTO = "segmento_%05d.ts"
+
+
+def ruta_segmentos_para(video_path) -> Path:
+    """Carpeta de segmentos asociada a un video (interview_X.mp4 -> interview_X_segmentos/)."""
+    video_path = Path(video_path)
+    return video_path.with_name(video_path.stem + SUFIJO_SEGMENTOS)
+
+
+@dataclass
+class Segmento:
+    ruta: Path
+    inicio: float
+    fin: float
+
+    @property
+    def duracion(self) -> float:
+        return self.fin - self.inicio
+
+
+class IndiceSegmentos:
+    """Lectura de la lista de segmentos completos que mantiene ffmpeg durante la grabación."""
+
+    def __init__(self, directorio):
+        self.directorio = Path(directorio)
+        self.ruta_lista = self.directorio / LISTA_SEGMENTOS
+
+    @classmethod
+    def para_video(cls, video_path) -> Optional["IndiceSegmentos"]:
+        """Índice de segmentos de un video, o None si no se grabó en modo segmentado."""
+        directorio = ruta_segmentos_para(video_path)
+        return cls(directorio) if directorio.is_dir() else None
+
+    def segmentos(self) -> List[Segmento]:
+        """Segmentos cerrados, en orden (ffmpeg solo lista un segmento al terminarlo)."""
+        if not self.ruta_lista.exists():
+            return []
+        segmentos = []
+        with open(self.ruta_lista, "r", encoding="utf-8") as f:
+            for linea in f:
+                partes = linea.strip().split(",")
+                if len(partes) < 3:
+                    continue  # línea a medio escribir
+                try:
+                    segmentos.append(Segmento(self.directorio / partes[0], float(partes[1]), float(partes[2])))
+                except ValueError:
+                    continue
+        return segmentos
+
+    def cubierto_hasta(self) -> float:
+        """Segundos de video disponibles en segmentos completos."""
+        segmentos = self.segmentos()
+        return segmentos[-1].fin if segmentos else 0.0
+
+    def cubre(self, inicio: float, fin: float) -> bool:
+        """True si el intervalo [inicio, fin] ya está en segmentos completos."""
+        segmentos = self.segmentos()
+        return bool(segmentos) and segmentos[0].inicio <= inicio and fin <= segmentos[-1].fin
+
+    def preparar_corte(self, inicio: float, fin: float, destino_lista=None) -> Tuple[Path, float]:
+        """
+        Escribe una lista para el demuxer concat con los segmentos que cubren
+        [inicio, fin] y devuelve (ruta_lista, desplazamiento), donde el
+        desplazamiento es `inicio` medido desde el primer segmento de la lista.
+        """
+        cubiertos = [s for s in self.segmentos() if s.fin > inicio and s.inicio < fin]
+        if not cubiertos or cubiertos[-1].fin < fin:
+            raise RuntimeError(f"Los segmentos aún no cubren el intervalo {inicio:.2f}-{fin:.2f}s")
+        destino_lista = Path(destino_lista) if destino_lista else self.directorio / f"corte_{inicio:.3f}_{fin:.3f}.txt"
+        self._escribir_lista(cubiertos, destino_lista)
+        return destino_lista, inicio - cubiertos[0].inicio
+
+    def concatenar(self, destino, on_progreso: Optional[Callable[[float], None]] = None) -> Path:
+        """Une todos los segmentos (sin reencodear) en un único archivo MP4."""
+        segmentos = self.segmentos()
+        if not segmentos:
+            raise RuntimeError(f"No hay segmentos completos en {self.directorio}")
+        destino = Path(destino)
+        lista = self.directorio / LISTA_CONCAT
+        self._escribir_lista(segmentos, lista)
+        comando = [
+            'ffmpeg',
+            '-f', 'concat', '-safe', '0', '-i', str(lista),
+            '-c', 'copy',
+            '-bsf:a', 'aac_adtstoasc',      # ADTS (MPEG-TS) -> formato de audio de MP4
+            '-movflags', '+faststart',
+            '-y', str(destino),
+        ]
+        logger.info(f"Concatenando {len(segmentos)} segmentos en {destino}")
+        ejecutar_ffmpeg(comando, on_progreso=on_progreso)
+        return destino
+
+    @staticmethod
+    def _escribir_lista(segmentos: List[Segmento], ruta: Path):
+        with open(ruta, "w", encoding="utf-8") as f:
+            for segmento in segmentos:
+                ruta_segmento = str(segmento.ruta.resolve()).replace("'", "'\\''")
+                f.write(f"file '{ruta_segmento}'\n")
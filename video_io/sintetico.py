@@ -0,0 +1,73 @@
+"""
+Fuentes de video sintéticas para probar la grabación y el análisis sin cámara.
+
+Los frames son BGR uint8 (como los entrega OpenCV) con un patrón tipo rostro
+que se desplaza de forma determinista, útil para medir encoders y detectores.
+"""
+
+import time
+import numpy as np
+import cv2
+
+
+def generar_frame_sintetico(indice: int, ancho: int = 1280, alto: int = 720):
+    """Dibuja el frame `indice`: fondo degradado y un óvalo con ojos y boca en movimiento."""
+    frame = np.empty((alto, ancho, 3), dtype=np.uint8)
+    frame[:, :, 0] = np.linspace(40, 90, ancho, dtype=np.uint8)[None, :]
+    frame[:, :, 1] = np.linspace(60, 120, alto, dtype=np.uint8)[:, None]
+    frame[:, :, 2] = 50
+
+    radio = alto // 5
+    cx = int(ancho / 2 + (ancho / 4) * np.sin(indice / 45.0))
+    cy = alto // 2
+    cv2.ellipse(frame, (cx, cy), (radio, int(radio * 1.3)), 0, 0, 360, (150, 180, 220), -1)
+    ojo = radio // 6
+    cv2.circle(frame, (cx - radio // 3, cy - radio // 3), ojo, (40, 40, 40), -1)
+    cv2.circle(frame, (cx + radio // 3, cy - radio // 3), ojo, (40, 40, 40), -1)
+    apertura = int(radio * (0.15 + 0.1 * np.sin(indice / 10.0)))
+    cv2.ellipse(frame, (cx, cy + radio // 2), (radio // 2, max(apertura, 1)), 0, 0, 180, (60, 60, 160), -1)
+    cv2.putText(frame, f"{indice:06d}", (20, alto - 20), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+    return frame
+
+
+def generar_frames_sinteticos(total: int, ancho: int = 1280, alto: int = 720):
+    """Generador de `total` frames sintéticos consecutivos."""
+    for indice in range(total):
+        yield generar_frame_sintetico(indice, ancho, alto)
+
+
+class FuenteSintetica:
+    """
+    Sustituto de cv2.VideoCapture (read/isOpened/release) basado en frames
+    sintéticos. Con `tiempo_real=True` respeta los fps como una cámara.
+    """
+
+    def __init__(self, total: int = None, ancho: int = 1280, alto: int = 720,
+                 fps: float = 30.0, tiempo_real: bool = False):
+        self.total = total
+        self.ancho = ancho
+        self.alto = alto
+        self.fps = fps
+        self.tiempo_real = tiempo_real
+        self._indice = 0
+        self._abierta = True
+        self._inicio = None
+
+    def isOpened(self):
+        return self._abierta
+
+    def read(self):
+        if not self._abierta or (self.total is not None and self._indice >= self.total):
+            return False, None
+        if self.tiempo_real:
+            if self._inicio is None:
+                self._inicio = time.monotonic()
+            espera = self._inicio + self._indice / self.fps - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+        frame = generar_frame_sintetico(self._indice, self.ancho, self.alto)
+        self._indice += 1
+        return True, frame
+
+    def release(self):
+        self._abierta = False
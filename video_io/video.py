@@ -1,12 +1,26 @@
 from abc import ABC, abstractmethod
 import platform
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
 from pathlib import Path
+from typing import Optional
 import cv2
+import numpy as np
+
+from video_io.segmentos import ruta_segmentos_para, LISTA_SEGMENTOS, PATRON_SEGMENTO
 
 # Algunas dependencias opcionales (importar bajo demanda)
 # pyaudio y av se importan solo en plataformas que las usan
 
 class CapturadorVideo(ABC):
+    # False si el capturador graba directamente del dispositivo e ignora procesar_frame
+    recibe_frames = True
+    # True si procesar_frame acepta el instante de captura (marca_tiempo)
+    acepta_marca_tiempo = False
+
     @abstractmethod
     def iniciar_grabacion(self, ruta_archivo: str, resolucion: str = '720p', codec: str = 'H.264', audio: str = 'AAC'):
         """Inicia la grabación de video y audio en el archivo especificado."""
@@ -24,6 +38,8 @@ class CapturadorVideo(ABC):
 
 
 class CapturadorVideoMacOS(CapturadorVideo):
+    recibe_frames = False
+
     def __init__(self):
         self.ffmpeg_process = None
         self.output_file = None
@@ -188,6 +204,195 @@ class CapturadorVideoWindows(CapturadorVideo):
             self.is_recording = False
 
 
+class CapturadorVideoLinux(CapturadorVideo):
+    """Capturador básico para Linux basado en OpenCV (sin audio)."""
+    def __init__(self):
+        self.out = None
+        self.is_recording = False
+
+    def iniciar_grabacion(self, ruta_archivo: str, resolucion: str = '720p', codec: str = 'H.264', audio: str = 'AAC'):
+        resolucion_map = {'720p': (1280, 720)}
+        if resolucion not in resolucion_map:
+            raise ValueError(f"Resolución {resolucion} no soportada")
+        width, height = resolucion_map[resolucion]
+        fourcc = cv2.VideoWriter_fourcc(*'X264')
+        self.out = cv2.VideoWriter(str(ruta_archivo), fourcc, 30.0, (width, height))
+        self.is_recording = True
+        print(f"Iniciando grabación en {ruta_archivo} en Linux (sin audio)")
+
+    def procesar_frame(self, frame):
+        if self.is_recording and self.out:
+            self.out.write(frame)
+
+    def detener_grabacion(self):
+        if self.out:
+            self.out.release()
+        self.out = None
+        self.is_recording = False
+        print("Grabación detenida en Linux (sin audio)")
+
+
+class CapturadorVideoFFmpeg(CapturadorVideo):
+    """
+    Graba enviando frames BGR crudos por stdin a un proceso ffmpeg (libx264).
+
+    Evita los fourcc de OpenCV (que en Linux suelen caer en codecs lentos o no
+    disponibles) y permite añadir una entrada de audio del sistema. Cada frame
+    se copia a un buffer preasignado del tamaño de salida antes de escribirse,
+    y se registra su marca de tiempo monotónica en `timestamps`.
+
+    Con `duracion_segmento` se graba en modo segmentado: trozos MPEG-TS de esa
+    duración en `<video>_segmentos/` más su lista CSV (ver video_io.segmentos);
+    el `.mp4` se genera después concatenando los segmentos.
+    """
+    acepta_marca_tiempo = True
+
+    def __init__(self, preset: str = 'veryfast', crf: int = 23, threads: int = 0,
+                 entrada_audio=None, fps: float = 30.0, ejecutable: str = 'ffmpeg',
+                 reloj=time.monotonic, duracion_segmento: Optional[float] = None):
+        # entrada_audio: (formato, dispositivo) de ffmpeg, p. ej. ('pulse', 'default') o ('alsa', 'hw:0')
+        self.preset = preset
+        self.crf = crf
+        self.threads = threads
+        self.entrada_audio = entrada_audio
+        self.fps = fps
+        self.ejecutable = ejecutable
+        self._reloj = reloj
+        self.duracion_segmento = duracion_segmento
+
+        self.proceso = None
+        self.ruta_segmentos = None
+        self.output_file = None
+        self.is_recording = False
+        self.timestamps = []
+        self.inicio_monotonico = None
+        self._buffer = None
+        self._vista = None
+        self._stderr = deque(maxlen=40)
+        self._lector_stderr = None
+
+    def construir_comando(self, ruta_archivo: str, width: int, height: int, con_audio: bool):
+        comando = [
+            self.ejecutable, '-hide_banner', '-loglevel', 'error', '-y',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}', '-framerate', str(self.fps),
+            '-i', 'pipe:0',
+        ]
+        if con_audio:
+            formato, dispositivo = self.entrada_audio
+            comando += ['-f', formato, '-thread_queue_size', '1024', '-i', dispositivo,
+                        '-map', '0:v', '-map', '1:a']
+        comando += [
+            '-c:v', 'libx264', '-preset', self.preset, '-crf', str(self.crf),
+            '-threads', str(self.threads), '-pix_fmt', 'yuv420p',
+        ]
+        if con_audio:
+            comando += ['-c:a', 'aac', '-b:a', '128k', '-shortest']
+        if self.duracion_segmento:
+            directorio = ruta_segmentos_para(ruta_archivo)
+            comando += [
+                # Keyframe en cada límite para que los segmentos corten exactamente
+                '-force_key_frames', f'expr:gte(t,n_forced*{self.duracion_segmento})',
+                '-f', 'segment',
+                '-segment_time', str(self.duracion_segmento),
+                '-segment_format', 'mpegts',
+                '-segment_list', str(directorio / LISTA_SEGMENTOS),
+                '-segment_list_type', 'csv',
+                '-reset_timestamps', '0',
+                str(directorio / PATRON_SEGMENTO),
+            ]
+        else:
+            comando += ['-movflags', '+faststart', str(ruta_archivo)]
+        return comando
+
+    def iniciar_grabacion(self, ruta_archivo: str, resolucion: str = '720p', codec: str = 'H.264', audio: str = 'AAC'):
+        if self.is_recording:
+            raise RuntimeError("Grabación ya en curso")
+
+        ruta_path = Path(ruta_archivo)
+        if not ruta_path.parent.is_dir():
+            raise ValueError(f"El directorio {ruta_path.parent} no existe")
+
+        resolucion_map = {'720p': (1280, 720)}
+        if resolucion not in resolucion_map:
+            raise ValueError(f"Resolución {resolucion} no soportada")
+        if codec != 'H.264':
+            raise ValueError(f"Codec {codec} no soportado")
+        width, height = resolucion_map[resolucion]
+        con_audio = audio == 'AAC' and self.entrada_audio is not None
+
+        # Buffer reutilizable: cada frame se vuelca aquí (con resize si hace falta) y se escribe sin copias extra
+        self._buffer = np.empty((height, width, 3), dtype=np.uint8)
+        self._vista = memoryview(self._buffer).cast('B')
+        self.timestamps = []
+        self._stderr.clear()
+
+        if self.duracion_segmento:
+            self.ruta_segmentos = ruta_segmentos_para(ruta_path)
+            if self.ruta_segmentos.exists():
+                shutil.rmtree(self.ruta_segmentos)
+            self.ruta_segmentos.mkdir(parents=True)
+
+        comando = self.construir_comando(ruta_archivo, width, height, con_audio)
+        try:
+            self.proceso = subprocess.Popen(
+                comando, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+        except Exception as e:
+            self.proceso = None
+            raise RuntimeError(f"Error al iniciar ffmpeg: {str(e)}")
+
+        self._lector_stderr = threading.Thread(
+            target=lambda: self._stderr.extend(l.decode(errors='replace') for l in self.proceso.stderr),
+            daemon=True,
+        )
+        self._lector_stderr.start()
+        self.output_file = ruta_archivo
+        self.inicio_monotonico = self._reloj()
+        self.is_recording = True
+        print(f"Iniciando grabación con ffmpeg (stdin) en {ruta_archivo} "
+              f"({resolucion}, preset={self.preset}, crf={self.crf}, audio={'sí' if con_audio else 'no'})")
+
+    def procesar_frame(self, frame, marca_tiempo=None):
+        """Escribe un frame BGR. `marca_tiempo` (monotónica) es el instante de captura, si se conoce."""
+        if not self.is_recording or self.proceso is None:
+            return
+        instante = marca_tiempo if marca_tiempo is not None else self._reloj()
+        alto, ancho = self._buffer.shape[:2]
+        if frame.shape[0] != alto or frame.shape[1] != ancho:
+            cv2.resize(frame, (ancho, alto), dst=self._buffer)
+        else:
+            np.copyto(self._buffer, frame, casting='unsafe')
+        try:
+            self.proceso.stdin.write(self._vista)
+        except (BrokenPipeError, ValueError):
+            raise RuntimeError(f"ffmpeg terminó inesperadamente: {''.join(self._stderr).strip()}")
+        self.timestamps.append(instante - self.inicio_monotonico)
+
+    def detener_grabacion(self):
+        if not self.is_recording or self.proceso is None:
+            raise RuntimeError("No hay grabación en curso")
+        try:
+            try:
+                self.proceso.stdin.close()
+            except BrokenPipeError:
+                pass
+            retorno = self.proceso.wait(timeout=30)
+            if self._lector_stderr is not None:
+                self._lector_stderr.join(timeout=5)
+            if retorno != 0:
+                raise RuntimeError(f"ffmpeg terminó con código {retorno}: {''.join(self._stderr).strip()}")
+            print(f"Grabación detenida y guardada en {self.output_file} ({len(self.timestamps)} frames)")
+        except subprocess.TimeoutExpired:
+            self.proceso.kill()
+            raise RuntimeError("ffmpeg no terminó a tiempo y fue forzado a cerrar")
+        finally:
+            self.proceso = None
+            self.is_recording = False
+            self._buffer = None
+            self._vista = None
+
+
 def obtener_capturador():
     sistema = platform.system()
     if sistema == 'Darwin':
@@ -195,31 +400,7 @@ def obtener_capturador():
     elif sistema == 'Windows':
         return CapturadorVideoWindows()
     else:
-        # Para otros sistemas (Linux) devolvemos un capturador básico que usa OpenCV
-        class CapturadorVideoLinux(CapturadorVideo):
-            def __init__(self):
-                self.out = None
-                self.is_recording = False
-
-            def iniciar_grabacion(self, ruta_archivo: str, resolucion: str = '720p', codec: str = 'H.264', audio: str = 'AAC'):
-                resolucion_map = {'720p': (1280, 720)}
-                if resolucion not in resolucion_map:
-                    raise ValueError(f"Resolución {resolucion} no soportada")
-                width, height = resolucion_map[resolucion]
-                fourcc = cv2.VideoWriter_fourcc(*'X264')
-                self.out = cv2.VideoWriter(str(ruta_archivo), fourcc, 30.0, (width, height))
-                self.is_recording = True
-                print(f"Iniciando grabación en {ruta_archivo} en Linux (sin audio)")
-
-            def procesar_frame(self, frame):
-                if self.is_recording and self.out:
-                    self.out.write(frame)
-
-            def detener_grabacion(self):
-                if self.out:
-                    self.out.release()
-                self.out = None
-                self.is_recording = False
-                print("Grabación detenida en Linux (sin audio)")
-
-        return CapturadorVideoLinux()
\ No newline at end of file
+        # En Linux se prefiere ffmpeg por stdin; OpenCV queda como respaldo si no está instalado
+        if shutil.which('ffmpeg'):
+            return CapturadorVideoFFmpeg()
+        return CapturadorVideoLinux()